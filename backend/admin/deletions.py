@@ -0,0 +1,244 @@
+"""
+Background cascading deletes of users and destinations
+
+Deleting a user or destination marks it with deleted_at (which hides it
+from the API) and queues a job in deletion_jobs. The worker then deletes
+the related rows table by table in small rowid chunks, committing after
+each one so other writers get the lock in between, and removes the entity
+itself in a final step. Jobs resume from their current step after a
+restart, since every chunk only picks rows that still exist. A job whose
+chunks keep failing is marked 'failed' after DELETION_MAX_ATTEMPTS, so the
+jobs queued behind it still run; its entity stays hidden. Review stats
+are updated per chunk as reviews are deleted, so until a user's job
+finishes, destination review totals still include their hidden reviews.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from database import get_db
+from admin.stats import record_change, record_reviews_removed, record_trips_removed, record_user_removed
+from config import settings
+from reviews.stats import refresh_review_stats
+from social.snapshots import drop_snapshots, snapshot_cache
+
+ENTITY_TABLES = {
+    "user": "users",
+    "destination": "destinations",
+}
+
+# Entity -> (table, rows owned by the entity) in deletion order, before "finalize"
+STEPS = {
+    "user": [
+        ("favorites", "user_id = ?"),
+        ("trips", "user_id = ?"),
+        ("reviews", "user_id = ?"),
+    ],
+    "destination": [
+        ("favorites", "destination_id = ?"),
+        ("reviews", "destination_id = ?"),
+        ("hotel_rooms", "hotel_id IN (SELECT id FROM hotels WHERE destination_id = ?)"),
+        ("hotels", "destination_id = ?"),
+        ("trips", "destination_id = ?"),
+    ],
+}
+
+
+def step_names(entity: str) -> list:
+    return [table for table, _ in STEPS[entity]] + ["finalize"]
+
+
+def enqueue_deletion(cursor, entity: str, entity_id: int):
+    """Tombstone an entity and queue its deletion, returns the job id or None if not found
+
+    Call inside the writing transaction.
+    """
+    cursor.execute(
+        f"UPDATE {ENTITY_TABLES[entity]} SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL",
+        (datetime.now().isoformat(), entity_id)
+    )
+    if cursor.rowcount == 0:
+        return None
+
+    cursor.execute(
+        "INSERT INTO deletion_jobs (entity, entity_id, step) VALUES (?, ?, ?)",
+        (entity, entity_id, step_names(entity)[0])
+    )
+    return cursor.lastrowid
+
+
+def _before_delete(cursor, table: str, where: str, params: list, stale: set) -> list:
+    """Update stats for a chunk about to be deleted, returns share tokens to invalidate"""
+    if table == "trips":
+        tokens = drop_snapshots(cursor, where, params)
+        record_trips_removed(cursor, where, params)
+        return tokens
+    if table == "reviews":
+        record_reviews_removed(cursor, where, params)
+        cursor.execute(f"SELECT DISTINCT destination_id FROM reviews WHERE {where}", params)
+        stale.update(r["destination_id"] for r in cursor.fetchall())
+    return []
+
+
+def _finalize(cursor, job: dict, stale: set):
+    """Delete the entity itself and recompute the aggregates its rows fed"""
+    entity_id = job["entity_id"]
+    if job["entity"] == "user":
+        record_user_removed(cursor, entity_id)
+        cursor.execute("DELETE FROM sessions WHERE user_id = ?", (entity_id,))
+        cursor.execute("DELETE FROM users WHERE id = ?", (entity_id,))
+        refresh_review_stats(cursor, sorted(stale))
+    else:
+        cursor.execute("DELETE FROM destination_stats WHERE destination_id = ?", (entity_id,))
+        cursor.execute("DELETE FROM destination_popularity WHERE destination_id = ?", (entity_id,))
+        cursor.execute("DELETE FROM destinations WHERE id = ?", (entity_id,))
+        if cursor.rowcount:
+            record_change(cursor, destinations=-1)
+
+
+def delete_chunk(conn, job: dict, chunk_size: int) -> int:
+    """Delete the next chunk of rows for a job, returns rows deleted"""
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+
+    c.execute("SELECT step, stale_destinations FROM deletion_jobs WHERE id = ?", (job["id"],))
+    row = c.fetchone()
+    step = row["step"]
+    stale = set(json.loads(row["stale_destinations"] or "[]"))
+    steps = step_names(job["entity"])
+
+    deleted = 0
+    tokens = []
+    if step == "finalize":
+        _finalize(c, job, stale)
+        c.execute(
+            "UPDATE deletion_jobs SET status = 'done', step = NULL, error = NULL, finished_at = ? WHERE id = ?",
+            (datetime.now().isoformat(), job["id"])
+        )
+    else:
+        table, owned = step, dict(STEPS[job["entity"]])[step]
+        c.execute(f"SELECT rowid FROM {table} WHERE {owned} LIMIT ?", (job["entity_id"], chunk_size))
+        rowids = [r[0] for r in c.fetchall()]
+
+        if rowids:
+            where = f"rowid IN ({', '.join('?' * len(rowids))})"
+            tokens = _before_delete(c, table, where, rowids, stale)
+            c.execute(f"DELETE FROM {table} WHERE {where}", rowids)
+            deleted = c.rowcount
+
+        if len(rowids) < chunk_size:
+            step = steps[steps.index(step) + 1]
+
+        c.execute("""
+            UPDATE deletion_jobs
+            SET step = ?, rows_deleted = rows_deleted + ?, stale_destinations = ?, error = NULL
+            WHERE id = ?
+        """, (step, deleted, json.dumps(sorted(stale)), job["id"]))
+
+    conn.commit()
+    snapshot_cache.invalidate(tokens)
+    return deleted
+
+
+class DeletionWorker:
+    """Daemon thread that drains the deletion job queue"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.rows_deleted = 0
+        self.chunks_processed = 0
+        self.busy_seconds = 0.0
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="deletion-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self):
+        """Wake the worker after a job was enqueued"""
+        self._wake.set()
+
+    def _next_job(self, conn):
+        c = conn.cursor()
+        c.execute("""
+            SELECT * FROM deletion_jobs
+            WHERE status IN ('pending', 'running')
+            ORDER BY id LIMIT 1
+        """)
+        job = c.fetchone()
+        if job and job["status"] == "pending":
+            c.execute(
+                "UPDATE deletion_jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), job["id"])
+            )
+            conn.commit()
+        return dict(job) if job else None
+
+    def _record_failure(self, conn, job: dict, error: str):
+        """Count a failed attempt, giving up on the job after DELETION_MAX_ATTEMPTS"""
+        conn.execute("""
+            UPDATE deletion_jobs
+            SET attempts = attempts + 1, error = ?,
+                status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END,
+                finished_at = CASE WHEN attempts + 1 >= ? THEN ? ELSE finished_at END
+            WHERE id = ?
+        """, (error, settings.DELETION_MAX_ATTEMPTS, settings.DELETION_MAX_ATTEMPTS,
+              datetime.now().isoformat(), job["id"]))
+        conn.commit()
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = get_db()
+            job = None
+            try:
+                job = self._next_job(conn)
+                while job and not self._stop.is_set():
+                    started = time.perf_counter()
+                    deleted = delete_chunk(conn, job, settings.DELETION_CHUNK_SIZE)
+                    self.busy_seconds += time.perf_counter() - started
+                    self.rows_deleted += deleted
+                    self.chunks_processed += 1
+
+                    # Yield the write lock before the next chunk
+                    self._stop.wait(settings.DELETION_PAUSE_SECONDS)
+                    job = self._next_job(conn)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Deletion worker error: {e}")
+                try:
+                    conn.rollback()
+                    if job:
+                        self._record_failure(conn, job, str(e))
+                except Exception as record_error:
+                    # Usually the same lock contention; the attempt goes uncounted
+                    # and the job is retried next poll instead of killing the thread
+                    print(f"Deletion worker could not record the failure: {record_error}")
+            finally:
+                conn.close()
+
+            self._wake.wait(settings.DELETION_POLL_SECONDS)
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "rows_deleted": self.rows_deleted,
+            "chunks_processed": self.chunks_processed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "chunk_size": settings.DELETION_CHUNK_SIZE,
+            "last_error": self.last_error
+        }
+
+
+deletion_worker = DeletionWorker()
@@ -0,0 +1,108 @@
+"""
+Streaming exports of admin data
+
+Rows are read in fetchmany batches from a read-only connection and encoded
+as CSV or NDJSON (optionally gzip-compressed) one batch at a time, so memory
+use does not depend on the table size. The database runs in WAL mode and
+each export reads inside one transaction, so it sees a consistent snapshot
+and never blocks writers.
+"""
+import csv
+import io
+import json
+import zlib
+import sqlite3
+from config import settings
+
+# Export name -> query; column names come from the cursor description
+EXPORTS = {
+    "trips": """
+        SELECT t.id, t.user_id, u.username, t.destination_id, d.name as destination_name,
+               d.country, t.start_date, t.end_date, t.num_travelers, t.flight_price,
+               t.hotel_price, t.total_cost, t.status, t.is_public, t.created_at
+        FROM trips t
+        LEFT JOIN users u ON u.id = t.user_id
+        LEFT JOIN destinations d ON d.id = t.destination_id
+        ORDER BY t.id
+    """,
+    "users": """
+        SELECT u.id, u.email, u.username, u.avatar_url, u.created_at,
+               COALESCE(s.trip_count, 0) as trip_count,
+               COALESCE(s.review_count, 0) as review_count
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        ORDER BY u.id
+    """,
+    "reviews": """
+        SELECT r.id, r.user_id, u.username, r.destination_id, d.name as destination_name,
+               r.rating, r.title, r.content, r.travel_date, r.helpful_count, r.created_at
+        FROM reviews r
+        LEFT JOIN users u ON u.id = r.user_id
+        LEFT JOIN destinations d ON d.id = r.destination_id
+        ORDER BY r.id
+    """,
+}
+
+# Format -> (media type, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def open_snapshot():
+    """Read-only connection; rows read in one transaction come from one snapshot"""
+    conn = sqlite3.connect(
+        f"file:{settings.DATABASE_URL}?mode=ro",
+        uri=True,
+        check_same_thread=False,
+        isolation_level=None
+    )
+    conn.execute("BEGIN")
+    return conn
+
+
+def _encode_batches(cursor, fmt: str):
+    """Yield one encoded text chunk per fetchmany batch"""
+    columns = [col[0] for col in cursor.description]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if fmt == "csv":
+        writer.writerow(columns)
+
+    while True:
+        rows = cursor.fetchmany(settings.EXPORT_BATCH_SIZE)
+        if not rows:
+            break
+        if fmt == "csv":
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                buffer.write("\n")
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_rows(table: str, fmt: str = "csv", compress: bool = False):
+    """Generate the encoded export of one table as bytes chunks"""
+    conn = open_snapshot()
+    # gzip container (wbits 16 + 15), flushed per batch so clients see progress
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    try:
+        cursor = conn.execute(EXPORTS[table])
+        for chunk in _encode_batches(cursor, fmt):
+            data = chunk.encode()
+            if gzip:
+                data = gzip.compress(data) + gzip.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        if gzip:
+            yield gzip.flush()
+    finally:
+        conn.close()
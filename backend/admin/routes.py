@@ -2,11 +2,30 @@
 Admin dashboard routes
 """
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import Optional
-from datetime import datetime, timedelta
-from database import get_db
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from bus import invalidation_bus
+from config import settings
+from database import USER_SEARCH_FTS, get_db
+from admin.deletions import deletion_worker, enqueue_deletion, step_names
+from admin.export import EXPORTS, FORMATS, export_rows
+from admin.stats import GRANULARITIES, record_change, record_reviews_removed
 from auth.utils import get_current_user
 from models import DestinationBase
+from pagination import decode_cursor, encode_cursor
+from destinations.trending import trending
+from external.weather import weather_cache
+from external.flights import flight_cache, flight_prewarmer
+from external.hotel_inventory import load_hotels
+from external.resilience import provider_guards
+from profiling import ProfilerBusy, collapsed, flamegraph, profile_workers
+from reviews.stats import record_review_removed
+from shared_cache import shared_cache
+from social.snapshots import drop_snapshots, rebuild_destination_snapshots, snapshot_cache
+from trips.repricing import enqueue_repricing, repricing_worker
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -23,80 +42,54 @@ def require_admin(user: dict = Depends(get_current_user)):
 # Dashboard stats
 @router.get("/dashboard/stats")
 def get_dashboard_stats(admin: dict = Depends(require_admin)):
-    """Get dashboard statistics"""
+    """Get dashboard statistics from the materialized stats tables"""
     conn = get_db()
     c = conn.cursor()
 
-    # Total counts
-    c.execute("SELECT COUNT(*) as total FROM users")
-    total_users = c.fetchone()["total"]
-
-    c.execute("SELECT COUNT(*) as total FROM destinations")
-    total_destinations = c.fetchone()["total"]
-
-    c.execute("SELECT COUNT(*) as total FROM trips")
-    total_trips = c.fetchone()["total"]
-
-    c.execute("SELECT COUNT(*) as total FROM reviews")
-    total_reviews = c.fetchone()["total"]
-
-    # Recent stats (last 30 days)
-    thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-
-    c.execute("SELECT COUNT(*) as count FROM users WHERE created_at > ?", (thirty_days_ago,))
-    new_users = c.fetchone()["count"]
-
-    c.execute("SELECT COUNT(*) as count FROM trips WHERE created_at > ?", (thirty_days_ago,))
-    new_trips = c.fetchone()["count"]
-
-    c.execute("SELECT COUNT(*) as count FROM reviews WHERE created_at > ?", (thirty_days_ago,))
-    new_reviews = c.fetchone()["count"]
-
-    # Revenue calculation (mock - sum of trip costs)
-    c.execute("SELECT SUM(total_cost) as revenue FROM trips")
-    total_revenue = c.fetchone()["revenue"] or 0
-
-    c.execute("SELECT SUM(total_cost) as revenue FROM trips WHERE created_at > ?", (thirty_days_ago,))
-    monthly_revenue = c.fetchone()["revenue"] or 0
-
-    # Top destinations
+    # Totals, last 30 days, top destinations and recent bookings in one query
     c.execute("""
-              SELECT d.name, d.country, COUNT(t.id) as bookings
-              FROM destinations d
-                       LEFT JOIN trips t ON d.id = t.destination_id
-              GROUP BY d.id
-              ORDER BY bookings DESC LIMIT 5
+              SELECT (SELECT json_group_object(name, value) FROM dashboard_counters) as totals,
+                     (SELECT json_object(
+                                 'new_users', COALESCE(SUM(new_users), 0),
+                                 'new_trips', COALESCE(SUM(new_trips), 0),
+                                 'new_reviews', COALESCE(SUM(new_reviews), 0),
+                                 'revenue', COALESCE(SUM(revenue), 0))
+                      FROM dashboard_daily
+                      WHERE day > date('now', '-30 days')) as monthly,
+                     (SELECT json_group_array(json_object(
+                                 'name', name, 'country', country, 'bookings', bookings))
+                      FROM (SELECT * FROM dashboard_top_destinations ORDER BY rank)) as top_destinations,
+                     (SELECT json_group_array(json_object(
+                                 'type', 'trip', 'username', username,
+                                 'destination', destination, 'created_at', created_at))
+                      FROM (SELECT u.username, d.name as destination, t.created_at
+                            FROM trips t
+                                     JOIN users u ON t.user_id = u.id
+                                     JOIN destinations d ON t.destination_id = d.id
+                            ORDER BY t.created_at DESC LIMIT 10)) as recent_activities
               """)
-    top_destinations = [dict(r) for r in c.fetchall()]
-
-    # Recent activities
-    c.execute("""
-              SELECT 'trip' as type, u.username, d.name as destination, t.created_at
-              FROM trips t
-                       JOIN users u ON t.user_id = u.id
-                       JOIN destinations d ON t.destination_id = d.id
-              ORDER BY t.created_at DESC LIMIT 10
-              """)
-    recent_activities = [dict(r) for r in c.fetchall()]
-
+    row = c.fetchone()
     conn.close()
 
+    totals = json.loads(row["totals"])
+    monthly = json.loads(row["monthly"])
+
     return {
         "totals": {
-            "users": total_users,
-            "destinations": total_destinations,
-            "trips": total_trips,
-            "reviews": total_reviews,
-            "revenue": round(total_revenue, 2)
+            "users": int(totals.get("users", 0)),
+            "destinations": int(totals.get("destinations", 0)),
+            "trips": int(totals.get("trips", 0)),
+            "reviews": int(totals.get("reviews", 0)),
+            "revenue": round(totals.get("revenue", 0), 2)
         },
         "monthly": {
-            "new_users": new_users,
-            "new_trips": new_trips,
-            "new_reviews": new_reviews,
-            "revenue": round(monthly_revenue, 2)
+            "new_users": monthly["new_users"],
+            "new_trips": monthly["new_trips"],
+            "new_reviews": monthly["new_reviews"],
+            "revenue": round(monthly["revenue"], 2)
         },
-        "top_destinations": top_destinations,
-        "recent_activities": recent_activities
+        "top_destinations": json.loads(row["top_destinations"]),
+        "recent_activities": json.loads(row["recent_activities"])
     }
 
 
@@ -105,69 +98,78 @@ def get_dashboard_stats(admin: dict = Depends(require_admin)):
 def get_all_users(
         admin: dict = Depends(require_admin),
         limit: int = 50,
-        offset: int = 0,
+        cursor: Optional[str] = None,
         search: Optional[str] = None
 ):
-    """Get all users with pagination"""
+    """Get users, newest first, one keyset page at a time"""
+    limit = max(1, min(limit, 200))
     conn = get_db()
     c = conn.cursor()
 
-    if search:
-        c.execute("""
-                  SELECT u.*,
-                         COUNT(DISTINCT t.id) as trip_count,
-                         COUNT(DISTINCT r.id) as review_count
-                  FROM users u
-                           LEFT JOIN trips t ON u.id = t.user_id
-                           LEFT JOIN reviews r ON u.id = r.user_id
-                  WHERE u.username LIKE ?
-                     OR u.email LIKE ?
-                  GROUP BY u.id LIMIT ?
-                  OFFSET ?
-                  """, (f"%{search}%", f"%{search}%", limit, offset))
-    else:
-        c.execute("""
-                  SELECT u.*,
-                         COUNT(DISTINCT t.id) as trip_count,
-                         COUNT(DISTINCT r.id) as review_count
-                  FROM users u
-                           LEFT JOIN trips t ON u.id = t.user_id
-                           LEFT JOIN reviews r ON u.id = r.user_id
-                  GROUP BY u.id
-                  ORDER BY u.created_at DESC LIMIT ?
-                  OFFSET ?
-                  """, (limit, offset))
-
+    conditions = ["u.deleted_at IS NULL"]
+    params = []
+    if search and USER_SEARCH_FTS and len(search) >= 3:
+        # Trigram phrase match is a case-insensitive substring match
+        conditions.append("u.id IN (SELECT rowid FROM users_fts WHERE users_fts MATCH ?)")
+        params.append('"{}"'.format(search.replace('"', '""')))
+    elif search:
+        # Trigrams need at least three characters
+        conditions.append("(u.username LIKE ? OR u.email LIKE ?)")
+        params.extend([f"%{search}%", f"%{search}%"])
+    if cursor:
+        conditions.append("(u.created_at, u.id) < (?, ?)")
+        params.extend(decode_cursor(cursor, 2))
+    params.append(limit + 1)
+
+    c.execute(f"""
+        SELECT u.id, u.email, u.username, u.avatar_url, u.created_at,
+               COALESCE(s.trip_count, 0) as trip_count,
+               COALESCE(s.review_count, 0) as review_count
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY u.created_at DESC, u.id DESC
+        LIMIT ?
+    """, params)
     users = [dict(r) for r in c.fetchall()]
 
-    c.execute("SELECT COUNT(*) as total FROM users")
-    total = c.fetchone()["total"]
-
+    c.execute("SELECT value FROM dashboard_counters WHERE name = 'users'")
+    row = c.fetchone()
     conn.close()
 
-    return {"users": users, "total": total}
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor([users[-1]["created_at"], users[-1]["id"]])
+
+    return {"users": users, "total": int(row["value"]) if row else 0, "next_cursor": next_cursor}
 
 
 @router.delete("/users/{user_id}")
 def delete_user(user_id: int, admin: dict = Depends(require_admin)):
-    """Delete a user (admin only)"""
+    """Delete a user and their data in the background (admin only)"""
     if user_id == admin["id"]:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
 
     conn = get_db()
     c = conn.cursor()
 
-    # Delete user's data
+    job_id = enqueue_deletion(c, "user", user_id)
+    if job_id is None:
+        conn.close()
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Sign the user out and unpublish their shared trips right away
     c.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
-    c.execute("DELETE FROM favorites WHERE user_id = ?", (user_id,))
-    c.execute("DELETE FROM trips WHERE user_id = ?", (user_id,))
-    c.execute("DELETE FROM reviews WHERE user_id = ?", (user_id,))
-    c.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    tokens = drop_snapshots(c, "user_id = ?", (user_id,))
 
     conn.commit()
     conn.close()
 
-    return {"message": "User deleted successfully"}
+    snapshot_cache.invalidate(tokens)
+    deletion_worker.notify()
+
+    return {"message": "User deletion started", "job_id": job_id}
 
 
 # Destination management
@@ -189,6 +191,8 @@ def create_destination(dest: DestinationBase, admin: dict = Depends(require_admi
               ))
 
     dest_id = c.lastrowid
+    record_change(c, destinations=1)
+    load_hotels(c, {"id": dest_id, "name": dest.name, "avg_daily_cost": dest.avg_daily_cost})
     conn.commit()
     conn.close()
 
@@ -205,6 +209,12 @@ def update_destination(
     conn = get_db()
     c = conn.cursor()
 
+    c.execute(
+        "SELECT avg_daily_cost, flight_cost_estimate FROM destinations WHERE id = ?",
+        (dest_id,)
+    )
+    current = c.fetchone()
+
     c.execute("""
               UPDATE destinations
               SET name                 = ?,
@@ -218,7 +228,7 @@ def update_destination(
                   image_url            = ?,
                   latitude             = ?,
                   longitude            = ?
-              WHERE id = ?
+              WHERE id = ? AND deleted_at IS NULL
               """, (
                   dest.name, dest.country, dest.city_code, dest.description,
                   dest.best_months, dest.avg_daily_cost, dest.flight_cost_estimate,
@@ -228,31 +238,191 @@ def update_destination(
     if c.rowcount == 0:
         raise HTTPException(status_code=404, detail="Destination not found")
 
+    # Planned trips keep stale prices until the repricing worker walks them
+    repricing_job_id = None
+    if (current["avg_daily_cost"] != dest.avg_daily_cost
+            or current["flight_cost_estimate"] != dest.flight_cost_estimate):
+        repricing_job_id = enqueue_repricing(c, dest_id)
+
+    tokens = rebuild_destination_snapshots(c, dest_id)
+
     conn.commit()
     conn.close()
 
-    return {"message": "Destination updated"}
+    snapshot_cache.invalidate(tokens)
+
+    if repricing_job_id:
+        repricing_worker.notify()
+
+    return {"message": "Destination updated", "repricing_job_id": repricing_job_id}
 
 
 @router.delete("/destinations/{dest_id}")
 def delete_destination(dest_id: int, admin: dict = Depends(require_admin)):
-    """Delete destination"""
+    """Delete a destination and its data in the background"""
     conn = get_db()
     c = conn.cursor()
 
-    # Delete related data
-    c.execute("DELETE FROM favorites WHERE destination_id = ?", (dest_id,))
-    c.execute("DELETE FROM reviews WHERE destination_id = ?", (dest_id,))
-    c.execute("DELETE FROM trips WHERE destination_id = ?", (dest_id,))
-    c.execute("DELETE FROM destinations WHERE id = ?", (dest_id,))
-
-    if c.rowcount == 0:
+    job_id = enqueue_deletion(c, "destination", dest_id)
+    if job_id is None:
+        conn.close()
         raise HTTPException(status_code=404, detail="Destination not found")
 
+    tokens = drop_snapshots(c, "destination_id = ?", (dest_id,))
+
     conn.commit()
     conn.close()
 
-    return {"message": "Destination deleted"}
+    snapshot_cache.invalidate(tokens)
+    trending.remove(dest_id)
+    deletion_worker.notify()
+
+    return {"message": "Destination deletion started", "job_id": job_id}
+
+
+# Trip repricing
+@router.get("/repricing")
+def get_repricing_status(admin: dict = Depends(require_admin)):
+    """Get repricing queue progress and worker throughput"""
+    conn = get_db()
+    c = conn.cursor()
+
+    c.execute("""
+              SELECT j.*,
+                     d.name as destination_name,
+                     (SELECT COUNT(*)
+                      FROM trips t
+                      WHERE t.destination_id = j.destination_id
+                        AND t.status = 'planned'
+                        AND t.id > j.last_trip_id) as trips_remaining
+              FROM repricing_jobs j
+                       LEFT JOIN destinations d ON j.destination_id = d.id
+              WHERE j.status IN ('pending', 'running')
+              ORDER BY j.id
+              """)
+    active_jobs = [dict(r) for r in c.fetchall()]
+
+    c.execute("""
+              SELECT j.*, d.name as destination_name
+              FROM repricing_jobs j
+                       LEFT JOIN destinations d ON j.destination_id = d.id
+              WHERE j.status IN ('done', 'failed')
+              ORDER BY j.id DESC LIMIT 20
+              """)
+    recent_jobs = [dict(r) for r in c.fetchall()]
+
+    conn.close()
+
+    return {
+        "worker": repricing_worker.stats(),
+        "active": active_jobs,
+        "recent": recent_jobs
+    }
+
+
+# Background deletions
+@router.get("/deletions")
+def get_deletion_status(admin: dict = Depends(require_admin)):
+    """Get deletion queue progress and worker throughput"""
+    conn = get_db()
+    c = conn.cursor()
+
+    c.execute("""
+              SELECT * FROM deletion_jobs
+              WHERE status IN ('pending', 'running')
+              ORDER BY id
+              """)
+    active_jobs = [dict(r) for r in c.fetchall()]
+
+    c.execute("""
+              SELECT * FROM deletion_jobs
+              WHERE status IN ('done', 'failed')
+              ORDER BY id DESC LIMIT 20
+              """)
+    recent_jobs = [dict(r) for r in c.fetchall()]
+
+    conn.close()
+
+    return {
+        "worker": deletion_worker.stats(),
+        "active": active_jobs,
+        "recent": recent_jobs
+    }
+
+
+@router.get("/deletions/{job_id}")
+def get_deletion_job(job_id: int, admin: dict = Depends(require_admin)):
+    """Get one deletion job's progress"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT * FROM deletion_jobs WHERE id = ?", (job_id,))
+    job = c.fetchone()
+    conn.close()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+
+    job = dict(job)
+    job["stale_destinations"] = json.loads(job["stale_destinations"] or "[]")
+    steps = step_names(job["entity"])
+    job["steps"] = steps
+    job["steps_done"] = len(steps) if job["status"] == "done" else steps.index(job["step"])
+    return job
+
+
+# External providers
+@router.get("/providers/stats")
+def get_provider_stats(admin: dict = Depends(require_admin)):
+    """Get breaker state, fallback counts and cache metrics for external providers"""
+    return {
+        "providers": {name: guard.stats() for name, guard in provider_guards.items()},
+        "weather_cache": weather_cache.stats(),
+        "flight_cache": flight_cache.stats(),
+        "flight_prewarm": flight_prewarmer.stats()
+    }
+
+
+# Multi-worker mode
+@router.get("/workers")
+def get_worker_stats(admin: dict = Depends(require_admin)):
+    """Invalidation bus and shared cache state of the worker serving this request"""
+    return {
+        "pid": os.getpid(),
+        "multi_worker": settings.MULTI_WORKER,
+        "invalidation_bus": invalidation_bus.stats(),
+        "shared_cache": shared_cache.stats() if shared_cache else None
+    }
+
+
+# Profiling
+@router.get("/profile")
+async def profile(
+        seconds: float = 5,
+        interval_ms: float = 5,
+        format: str = "collapsed",
+        idle: bool = False,
+        admin: dict = Depends(require_admin)
+):
+    """Sample every worker thread for a few seconds (collapsed stacks or flamegraph JSON)"""
+    if format not in ("collapsed", "flamegraph"):
+        raise HTTPException(status_code=400, detail="format must be collapsed or flamegraph")
+    seconds = max(0.1, min(seconds, settings.PROFILE_MAX_SECONDS))
+    interval = max(1.0, interval_ms) / 1000
+
+    try:
+        sampler = await profile_workers(seconds, interval, idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    stacks = sampler.stacks()
+    if format == "flamegraph":
+        return {
+            "seconds": seconds,
+            "interval_ms": interval * 1000,
+            "ticks": sampler.ticks,
+            "flamegraph": flamegraph(stacks, settings.PROFILE_MAX_STACKS)
+        }
+    return PlainTextResponse(collapsed(stacks, settings.PROFILE_MAX_STACKS))
 
 
 # Review moderation
@@ -283,22 +453,17 @@ def delete_review_admin(review_id: int, admin: dict = Depends(require_admin)):
     c = conn.cursor()
 
     # Get destination_id before deletion
-    c.execute("SELECT destination_id FROM reviews WHERE id = ?", (review_id,))
+    c.execute("SELECT destination_id, rating FROM reviews WHERE id = ?", (review_id,))
     review = c.fetchone()
 
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    destination_id = review["destination_id"]
-
+    record_reviews_removed(c, "id = ?", (review_id,))
     c.execute("DELETE FROM reviews WHERE id = ?", (review_id,))
 
-    # Recalculate rating
-    c.execute("SELECT AVG(rating) as avg FROM reviews WHERE destination_id = ?", (destination_id,))
-    result = c.fetchone()
-    avg_rating = result["avg"] if result["avg"] else 4.0
-
-    c.execute("UPDATE destinations SET rating = ? WHERE id = ?", (round(avg_rating, 1), destination_id))
+    # Update destination stats and rating
+    record_review_removed(c, review["destination_id"], review["rating"])
 
     conn.commit()
     conn.close()
@@ -342,77 +507,156 @@ def get_all_trips(
 
 
 # Analytics
+def analytics_range(start: Optional[str], end: Optional[str], granularity: str):
+    """Validate an analytics date range, defaulting to the last 12 months (UTC days)"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid granularity. Must be one of: {', '.join(GRANULARITIES)}"
+        )
+
+    try:
+        end_day = datetime.strptime(end, "%Y-%m-%d").date() if end else datetime.now(timezone.utc).date()
+        start_day = datetime.strptime(start, "%Y-%m-%d").date() if start else end_day - timedelta(days=365)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    return start_day.isoformat(), end_day.isoformat()
+
+
 @router.get("/analytics/revenue")
-def get_revenue_analytics(admin: dict = Depends(require_admin)):
-    """Get revenue analytics"""
+def get_revenue_analytics(
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        granularity: str = "month",
+        admin: dict = Depends(require_admin)
+):
+    """Get bookings and revenue per period and per destination, from the daily rollups"""
+    start, end = analytics_range(start, end, granularity)
+    period = GRANULARITIES[granularity]
+
     conn = get_db()
     c = conn.cursor()
 
-    # Revenue by month (last 12 months)
-    c.execute("""
-              SELECT strftime('%Y-%m', created_at) as month,
-            COUNT(*) as bookings,
-            SUM(total_cost) as revenue
-              FROM trips
-              WHERE created_at > date ('now', '-12 months')
-              GROUP BY month
-              ORDER BY month
-              """)
+    c.execute(f"""
+              SELECT {period} as period,
+                     SUM(new_trips) as bookings,
+                     SUM(revenue)   as revenue
+              FROM dashboard_daily
+              WHERE day BETWEEN ? AND ?
+              GROUP BY period
+              HAVING bookings != 0 OR revenue != 0
+              ORDER BY period
+              """, (start, end))
 
-    monthly_revenue = [dict(r) for r in c.fetchall()]
+    series = [dict(r) for r in c.fetchall()]
 
     # Revenue by destination
     c.execute("""
               SELECT d.name,
                      d.country,
-                     COUNT(t.id)       as bookings,
-                     SUM(t.total_cost) as revenue
-              FROM destinations d
-                       LEFT JOIN trips t ON d.id = t.destination_id
-              GROUP BY d.id
-              ORDER BY revenue DESC LIMIT 10
-              """)
+                     r.bookings,
+                     r.revenue
+              FROM (SELECT destination_id, SUM(bookings) as bookings, SUM(revenue) as revenue
+                    FROM daily_destination_revenue
+                    WHERE day BETWEEN ? AND ?
+                    GROUP BY destination_id) r
+                       JOIN destinations d ON d.id = r.destination_id
+              ORDER BY r.revenue DESC LIMIT 10
+              """, (start, end))
 
     destination_revenue = [dict(r) for r in c.fetchall()]
 
     conn.close()
 
     return {
-        "monthly": monthly_revenue,
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "series": series,
         "by_destination": destination_revenue
     }
 
 
 @router.get("/analytics/users")
-def get_user_analytics(admin: dict = Depends(require_admin)):
-    """Get user analytics"""
+def get_user_analytics(
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        granularity: str = "month",
+        admin: dict = Depends(require_admin)
+):
+    """Get new and active users per period, from the daily rollups"""
+    start, end = analytics_range(start, end, granularity)
+    period = GRANULARITIES[granularity]
+
     conn = get_db()
     c = conn.cursor()
 
     # User growth
-    c.execute("""
-              SELECT strftime('%Y-%m', created_at) as month,
-            COUNT(*) as new_users
-              FROM users
-              WHERE created_at > date ('now', '-12 months')
-              GROUP BY month
-              ORDER BY month
-              """)
+    c.execute(f"""
+              SELECT {period} as period,
+                     SUM(new_users) as new_users
+              FROM dashboard_daily
+              WHERE day BETWEEN ? AND ?
+              GROUP BY period
+              HAVING new_users != 0
+              ORDER BY period
+              """, (start, end))
 
     user_growth = [dict(r) for r in c.fetchall()]
 
-    # Active users (users who made trips in last 30 days)
+    # Active users (users who made trips) per period and over the whole range
+    c.execute(f"""
+              SELECT {period} as period,
+                     COUNT(DISTINCT user_id) as active_users
+              FROM daily_active_users
+              WHERE day BETWEEN ? AND ?
+              GROUP BY period
+              ORDER BY period
+              """, (start, end))
+
+    active_series = [dict(r) for r in c.fetchall()]
+
     c.execute("""
               SELECT COUNT(DISTINCT user_id) as active_users
-              FROM trips
-              WHERE created_at > date ('now', '-30 days')
-              """)
+              FROM daily_active_users
+              WHERE day BETWEEN ? AND ?
+              """, (start, end))
 
     active_users = c.fetchone()["active_users"]
 
     conn.close()
 
     return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
         "growth": user_growth,
+        "active": active_series,
         "active_users": active_users
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/export/{table}")
+def export_table(
+        table: str,
+        format: str = "csv",
+        gzip: bool = False,
+        admin: dict = Depends(require_admin)
+):
+    """Stream a full export of trips, users or reviews as CSV or NDJSON"""
+    if table not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export, use one of: {', '.join(EXPORTS)}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+
+    media_type, extension = FORMATS[format]
+    filename = f"{table}.{extension}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        media_type = "application/gzip"
+
+    return StreamingResponse(export_rows(table, format, gzip), media_type=media_type, headers=headers)
\ No newline at end of file
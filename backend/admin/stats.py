@@ -0,0 +1,458 @@
+"""
+Materialized admin dashboard statistics and daily analytics rollups
+
+dashboard_counters holds running totals (users, destinations, trips,
+reviews, revenue) and dashboard_daily holds per-day counts of new users,
+trips, reviews and trip revenue. Two more daily rollups back the
+analytics endpoints: daily_destination_revenue (bookings and revenue per
+destination) and daily_active_users (users with trips created that day).
+Write paths update all of them in the same transaction, so the dashboard
+and analytics read rollup rows instead of scanning the tables. The
+top-destinations list is refreshed periodically and a reconciliation pass
+rewrites everything from the source tables to correct any drift. The same
+write paths and reconciliation also keep user_stats (each user's trip and
+review counts) and users_fts (the trigram index behind the admin user
+search) up to date.
+
+Check or rebuild from the command line:
+    python -m admin.stats --check
+    python -m admin.stats --rebuild
+"""
+import argparse
+import sys
+import threading
+import time
+from config import settings
+from database import USER_SEARCH_FTS, get_db
+
+COUNTERS = ("users", "destinations", "trips", "reviews", "revenue")
+
+# Counter -> dashboard_daily column
+DAILY_COLUMNS = {
+    "users": "new_users",
+    "trips": "new_trips",
+    "reviews": "new_reviews",
+    "revenue": "revenue",
+}
+
+# Counter -> user_stats column
+USER_COLUMNS = {
+    "trips": "trip_count",
+    "reviews": "review_count",
+}
+
+TOP_DESTINATIONS = 5
+
+# Analytics granularity -> SQL expression bucketing a YYYY-MM-DD day column
+# (weeks start on Monday and are labelled by that date)
+GRANULARITIES = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m', day)",
+}
+
+
+def record_change(cursor, day: str = None, user_id: int = None, **deltas):
+    """Add deltas to the totals and to one day's bucket (today in UTC by default)
+
+    day is a YYYY-MM-DD string matching date(created_at) of the rows changed.
+    Trip and review deltas also go to user_id's counts when it is given.
+    """
+    cursor.executemany("""
+        INSERT INTO dashboard_counters (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    """, [(name, delta) for name, delta in deltas.items() if delta])
+
+    per_user = {USER_COLUMNS[name]: delta for name, delta in deltas.items() if name in USER_COLUMNS and delta}
+    if user_id is not None and per_user:
+        cursor.execute(f"""
+            INSERT INTO user_stats (user_id, {', '.join(per_user)})
+            VALUES (?, {', '.join('?' * len(per_user))})
+            ON CONFLICT(user_id) DO UPDATE SET
+                {', '.join(f'{col} = {col} + excluded.{col}' for col in per_user)}
+        """, (user_id, *per_user.values()))
+
+    daily = {DAILY_COLUMNS[name]: delta for name, delta in deltas.items() if name in DAILY_COLUMNS and delta}
+    if not daily:
+        return
+
+    cursor.execute(f"""
+        INSERT INTO dashboard_daily (day, {', '.join(daily)})
+        VALUES (COALESCE(?, date('now')), {', '.join('?' * len(daily))})
+        ON CONFLICT(day) DO UPDATE SET
+            {', '.join(f'{col} = {col} + excluded.{col}' for col in daily)}
+    """, (day, *daily.values()))
+
+
+def _record_trip_rollups(cursor, day, destination_id: int, user_id: int, bookings: int, revenue: float):
+    """Apply trip deltas to the per-destination and active-user rollups"""
+    cursor.execute("""
+        INSERT INTO daily_destination_revenue (day, destination_id, bookings, revenue)
+        VALUES (COALESCE(?, date('now')), ?, ?, ?)
+        ON CONFLICT(day, destination_id) DO UPDATE SET
+            bookings = bookings + excluded.bookings,
+            revenue = revenue + excluded.revenue
+    """, (day, destination_id, bookings, revenue))
+
+    if not bookings:
+        return
+
+    cursor.execute("""
+        INSERT INTO daily_active_users (day, user_id, trips)
+        VALUES (COALESCE(?, date('now')), ?, ?)
+        ON CONFLICT(day, user_id) DO UPDATE SET trips = trips + excluded.trips
+    """, (day, user_id, bookings))
+    if bookings < 0:
+        cursor.execute(
+            "DELETE FROM daily_active_users WHERE day = ? AND user_id = ? AND trips <= 0",
+            (day, user_id)
+        )
+
+
+def record_user_added(cursor, user_id: int, username: str, email: str):
+    record_change(cursor, users=1)
+    if USER_SEARCH_FTS:
+        cursor.execute(
+            "INSERT INTO users_fts (rowid, username, email) VALUES (?, ?, ?)",
+            (user_id, username, email)
+        )
+
+
+def record_trip_added(cursor, destination_id: int, user_id: int, total_cost: float):
+    record_change(cursor, user_id=user_id, trips=1, revenue=total_cost)
+    _record_trip_rollups(cursor, None, destination_id, user_id, 1, total_cost)
+
+
+def record_trip_repriced(cursor, day: str, destination_id: int, delta: float):
+    """Apply a revenue change to the day the repriced trips were created"""
+    record_change(cursor, day, revenue=delta)
+    _record_trip_rollups(cursor, day, destination_id, None, 0, delta)
+
+
+def record_trips_removed(cursor, where: str, params: tuple):
+    """Update stats for trips matching where (call before deleting them)"""
+    cursor.execute(f"""
+        SELECT date(created_at) as day, destination_id, user_id,
+               COUNT(*) as count, SUM(total_cost) as revenue
+        FROM trips
+        WHERE {where}
+        GROUP BY day, destination_id, user_id
+    """, params)
+    for row in cursor.fetchall():
+        revenue = row["revenue"] or 0
+        record_change(cursor, row["day"], row["user_id"], trips=-row["count"], revenue=-revenue)
+        _record_trip_rollups(
+            cursor, row["day"], row["destination_id"], row["user_id"], -row["count"], -revenue
+        )
+
+
+def record_reviews_removed(cursor, where: str, params: tuple):
+    """Update stats for reviews matching where (call before deleting them)"""
+    cursor.execute(f"""
+        SELECT date(created_at) as day, user_id, COUNT(*) as count
+        FROM reviews
+        WHERE {where}
+        GROUP BY day, user_id
+    """, params)
+    for row in cursor.fetchall():
+        record_change(cursor, row["day"], row["user_id"], reviews=-row["count"])
+
+
+def record_user_removed(cursor, user_id: int):
+    """Update stats for a user and everything they own (call before deleting)"""
+    record_trips_removed(cursor, "user_id = ?", (user_id,))
+    record_reviews_removed(cursor, "user_id = ?", (user_id,))
+    cursor.execute("SELECT date(created_at) as day FROM users WHERE id = ?", (user_id,))
+    row = cursor.fetchone()
+    if row:
+        record_change(cursor, row["day"], users=-1)
+    cursor.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,))
+    if USER_SEARCH_FTS:
+        cursor.execute("DELETE FROM users_fts WHERE rowid = ?", (user_id,))
+
+
+# ==================== TOP DESTINATIONS ====================
+def refresh_top_destinations(conn) -> int:
+    """Recompute the most booked destinations"""
+    c = conn.cursor()
+    c.execute("""
+        SELECT t.destination_id, d.name, d.country, t.bookings
+        FROM (
+            SELECT destination_id, COUNT(*) as bookings
+            FROM trips
+            GROUP BY destination_id
+        ) t
+        JOIN destinations d ON d.id = t.destination_id
+        ORDER BY t.bookings DESC, t.destination_id
+        LIMIT ?
+    """, (TOP_DESTINATIONS,))
+    top = c.fetchall()
+
+    # Pad with unbooked destinations, like the old LEFT JOIN did (with no
+    # bookings at all there is nothing to exclude; NOT IN (NULL) matches no rows)
+    if len(top) < TOP_DESTINATIONS:
+        booked = [r["destination_id"] for r in top]
+        exclude = f"WHERE id NOT IN ({', '.join('?' * len(booked))})" if booked else ""
+        c.execute(f"""
+            SELECT id as destination_id, name, country, 0 as bookings
+            FROM destinations
+            {exclude}
+            ORDER BY id
+            LIMIT ?
+        """, (*booked, TOP_DESTINATIONS - len(top)))
+        top += c.fetchall()
+
+    c.execute("DELETE FROM dashboard_top_destinations")
+    c.executemany("""
+        INSERT INTO dashboard_top_destinations (rank, destination_id, name, country, bookings)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(rank, *tuple(row)) for rank, row in enumerate(top, 1)])
+    conn.commit()
+    return len(top)
+
+
+# ==================== RECONCILIATION ====================
+# Rollup table -> (key columns, value columns, aggregate over the source tables)
+ROLLUPS = {
+    "dashboard_daily": (
+        ("day",),
+        ("new_users", "new_trips", "new_reviews", "revenue"),
+        """
+        SELECT day, SUM(new_users), SUM(new_trips), SUM(new_reviews), SUM(revenue)
+        FROM (
+            SELECT date(created_at) as day, 1 as new_users, 0 as new_trips, 0 as new_reviews, 0 as revenue
+            FROM users
+            UNION ALL
+            SELECT date(created_at), 0, 1, 0, total_cost FROM trips
+            UNION ALL
+            SELECT date(created_at), 0, 0, 1, 0 FROM reviews
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day
+        """
+    ),
+    "daily_destination_revenue": (
+        ("day", "destination_id"),
+        ("bookings", "revenue"),
+        """
+        SELECT date(created_at) as day, destination_id, COUNT(*), COALESCE(SUM(total_cost), 0)
+        FROM trips
+        WHERE created_at IS NOT NULL
+        GROUP BY day, destination_id
+        """
+    ),
+    "daily_active_users": (
+        ("day", "user_id"),
+        ("trips",),
+        """
+        SELECT date(created_at) as day, user_id, COUNT(*)
+        FROM trips
+        WHERE created_at IS NOT NULL
+        GROUP BY day, user_id
+        """
+    ),
+    "user_stats": (
+        ("user_id",),
+        ("trip_count", "review_count"),
+        """
+        SELECT user_id, SUM(trips), SUM(reviews)
+        FROM (
+            SELECT user_id, 1 as trips, 0 as reviews FROM trips
+            UNION ALL
+            SELECT user_id, 0, 1 FROM reviews
+        )
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        """
+    ),
+}
+
+
+def _expected_counters(cursor) -> dict:
+    cursor.execute("""
+        SELECT (SELECT COUNT(*) FROM users) as users,
+               (SELECT COUNT(*) FROM destinations) as destinations,
+               (SELECT COUNT(*) FROM trips) as trips,
+               (SELECT COUNT(*) FROM reviews) as reviews,
+               (SELECT COALESCE(SUM(total_cost), 0) FROM trips) as revenue
+    """)
+    return dict(cursor.fetchone())
+
+
+def _rows_by_key(cursor, query: str, key_size: int) -> dict:
+    cursor.execute(query)
+    return {tuple(r)[:key_size]: tuple(r)[key_size:] for r in cursor.fetchall()}
+
+
+def _normalize(values) -> tuple:
+    return tuple(round(v or 0, 2) for v in values)
+
+
+def check_dashboard_stats(conn) -> list:
+    """Return the counters and rollup rows that differ from the source tables"""
+    c = conn.cursor()
+    counters = _expected_counters(c)
+    c.execute("SELECT name, value FROM dashboard_counters")
+    stored_counters = {r["name"]: r["value"] for r in c.fetchall()}
+
+    drifted = [
+        name for name in COUNTERS
+        if _normalize([counters[name]]) != _normalize([stored_counters.get(name)])
+    ]
+
+    for table, (keys, values, query) in ROLLUPS.items():
+        expected = _rows_by_key(c, query, len(keys))
+        stored = _rows_by_key(c, f"SELECT {', '.join(keys + values)} FROM {table}", len(keys))
+        empty = (0,) * len(values)
+        drifted += sorted(
+            f"{table}:{'/'.join(map(str, key))}"
+            for key in set(expected) | set(stored)
+            if _normalize(expected.get(key, empty)) != _normalize(stored.get(key, empty))
+        )
+
+    if USER_SEARCH_FTS:
+        c.execute("""
+            SELECT (SELECT COUNT(*) FROM users) as users,
+                   (SELECT COUNT(*) FROM users_fts) as indexed
+        """)
+        row = c.fetchone()
+        if row["users"] != row["indexed"]:
+            drifted.append("users_fts")
+    return drifted
+
+
+def rebuild_dashboard_stats(conn) -> int:
+    """Rewrite counters and rollups from the source tables, returns rollup rows written"""
+    c = conn.cursor()
+    # Hold the write lock so no write lands between reading and replacing
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute("DELETE FROM dashboard_counters")
+        c.executemany(
+            "INSERT INTO dashboard_counters (name, value) VALUES (?, ?)",
+            _expected_counters(c).items()
+        )
+
+        written = 0
+        for table, (keys, values, query) in ROLLUPS.items():
+            c.execute(f"DELETE FROM {table}")
+            c.execute(f"INSERT INTO {table} ({', '.join(keys + values)}) {query}")
+            written += c.rowcount
+
+        if USER_SEARCH_FTS:
+            c.execute("DELETE FROM users_fts")
+            c.execute("INSERT INTO users_fts (rowid, username, email) SELECT id, username, email FROM users")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return written
+
+
+def ensure_dashboard_stats(conn):
+    """Backfill stats, rollups and user search for databases created before their tables existed"""
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT EXISTS (SELECT 1 FROM dashboard_counters) as has_counters,
+               EXISTS (SELECT 1 FROM trips) as has_trips,
+               EXISTS (SELECT 1 FROM daily_destination_revenue) as has_rollups,
+               EXISTS (SELECT 1 FROM trips UNION ALL SELECT 1 FROM reviews) as has_activity,
+               EXISTS (SELECT 1 FROM user_stats) as has_user_stats,
+               EXISTS (SELECT 1 FROM users) as has_users,
+               {'EXISTS (SELECT 1 FROM users_fts)' if USER_SEARCH_FTS else '1'} as has_user_search
+    """)
+    row = c.fetchone()
+    if (not row["has_counters"]
+            or (row["has_trips"] and not row["has_rollups"])
+            or (row["has_activity"] and not row["has_user_stats"])
+            or (row["has_users"] and not row["has_user_search"])):
+        rebuild_dashboard_stats(conn)
+    refresh_top_destinations(conn)
+
+
+# ==================== BACKGROUND REFRESH ====================
+class DashboardRefresher:
+    """Refreshes top destinations and periodically reconciles the counters"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_reconcile = time.monotonic()
+        self.refreshes = 0
+        self.reconciliations = 0
+        self.drift_corrected = 0
+
+    def reconcile(self) -> list:
+        """Rebuild the stats if they drifted, returns what had drifted"""
+        conn = get_db()
+        try:
+            drifted = check_dashboard_stats(conn)
+            if drifted:
+                print(f"⚠️  Dashboard stats drift in: {', '.join(drifted[:10])}")
+                rebuild_dashboard_stats(conn)
+                self.drift_corrected += 1
+            self.reconciliations += 1
+            return drifted
+        finally:
+            conn.close()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dashboard-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(settings.DASHBOARD_REFRESH_SECONDS):
+            try:
+                conn = get_db()
+                try:
+                    refresh_top_destinations(conn)
+                    self.refreshes += 1
+                finally:
+                    conn.close()
+
+                if time.monotonic() - self._last_reconcile >= settings.DASHBOARD_RECONCILE_SECONDS:
+                    self._last_reconcile = time.monotonic()
+                    self.reconcile()
+            except Exception as e:
+                print(f"Dashboard refresh error: {e}")
+
+
+dashboard_refresher = DashboardRefresher()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild admin dashboard statistics")
+    parser.add_argument("--rebuild", action="store_true", help="rewrite stats from the source tables")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    conn = get_db()
+    drifted = check_dashboard_stats(conn)
+
+    if drifted:
+        print(f"⚠️  Dashboard stats drift in: {', '.join(drifted)}")
+    else:
+        print("✅ Dashboard stats are consistent")
+
+    if args.rebuild:
+        rows = rebuild_dashboard_stats(conn)
+        refresh_top_destinations(conn)
+        print(f"✅ Rebuilt dashboard stats ({rows} rollup rows)")
+
+    conn.close()
+
+    if drifted and not args.rebuild:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 import sqlite3
 from database import get_db
+from admin.stats import record_user_added
 from models import UserCreate, UserLogin, UserResponse
 from auth.utils import hash_password, create_session, get_current_user, delete_session, security
 
@@ -22,6 +23,7 @@ def register(user: UserCreate):
             (user.email, user.username, hash_password(user.password))
         )
         user_id = c.lastrowid
+        record_user_added(c, user_id, user.username, user.email)
         conn.commit()
         
         token = create_session(user_id)
@@ -49,7 +51,7 @@ def login(creds: UserLogin):
     c = conn.cursor()
     
     c.execute(
-        "SELECT * FROM users WHERE email = ? AND password_hash = ?",
+        "SELECT * FROM users WHERE email = ? AND password_hash = ? AND deleted_at IS NULL",
         (creds.email, hash_password(creds.password))
     )
     user = c.fetchone()
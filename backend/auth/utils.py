@@ -40,7 +40,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     c.execute("""
         SELECT u.* FROM users u
         JOIN sessions s ON u.id = s.user_id
-        WHERE s.token = ? AND s.expires_at > ?
+        WHERE s.token = ? AND s.expires_at > ? AND u.deleted_at IS NULL
     """, (token, datetime.now().isoformat()))
     
     user = c.fetchone()
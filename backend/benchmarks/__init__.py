@@ -0,0 +1,3 @@
+"""
+Benchmarks for the hot paths (run from backend/, e.g. python -m benchmarks.review_pages)
+"""
@@ -0,0 +1,74 @@
+"""
+Cold start: process start to first request served
+
+Spawns `uvicorn main:app` and polls GET /health until it answers, timing
+from process spawn, so interpreter start, imports, startup and the first
+request all count (the "Ready in" line the app logs starts at the import
+of main and misses the interpreter and uvicorn). Three cases:
+
+- empty: DATABASE_URL does not exist, so startup runs the DDL, seeding and
+  hotel generation
+- snapshot: DATABASE_URL does not exist and is restored from a prebuilt
+  DATABASE_SNAPSHOT
+- restart: DATABASE_URL exists with the current schema, so DDL is skipped
+
+    python -m benchmarks.cold_start --repeat 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from snapshot import build_snapshot
+from benchmarks.common import free_port, report, spawn, stop, summarize, wait_until_up
+
+
+def remove_database(path: str):
+    for suffix in ("", "-wal", "-shm", ".lock"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def first_request_ms(env: dict) -> float:
+    """Milliseconds from spawning a worker to its first 200 from /health"""
+    port = free_port()
+    started = time.perf_counter()
+    api = spawn(["uvicorn", "main:app", "--port", str(port)], env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/health", api, timeout=120)
+        return (time.perf_counter() - started) * 1000
+    finally:
+        stop(api)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="travelmate-bench-cold-start-")
+    try:
+        snapshot = os.path.join(workdir, "catalog.db")
+        database = os.path.join(workdir, "travel.db")
+        build_snapshot(snapshot)
+
+        cases = {
+            "empty": ({"DATABASE_URL": database, "DATABASE_SNAPSHOT": ""}, True),
+            "snapshot": ({"DATABASE_URL": database, "DATABASE_SNAPSHOT": snapshot}, True),
+            "restart": ({"DATABASE_URL": database, "DATABASE_SNAPSHOT": ""}, False),
+        }
+        rows = []
+        for name, (env, fresh) in cases.items():
+            samples = []
+            for _ in range(args.repeat):
+                if fresh:
+                    remove_database(database)
+                samples.append(first_request_ms(env))
+            rows.append((name, summarize(samples)))
+        report("process start to first request", rows)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
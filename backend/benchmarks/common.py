@@ -0,0 +1,109 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from config import settings
+from database import get_db, init_db, mark_schema_current
+from snapshot import prepare_data
+
+
+def temp_database(name: str) -> str:
+    """Point the app at a fresh, fully prepared database in the temp dir"""
+    path = os.path.join(tempfile.gettempdir(), f"travelmate-bench-{name}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    settings.DATABASE_URL = path
+    init_db()
+    conn = get_db()
+    prepare_data(conn)
+    mark_schema_current(conn)
+    conn.close()
+    return path
+
+
+def insert_users(conn, count: int) -> list:
+    """Bulk insert benchmark users, returns their ids"""
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO users (email, username, password_hash) VALUES (?, ?, 'x')",
+        ((f"bench{i}@example.com", f"bench{i}") for i in range(start + 1, start + count + 1))
+    )
+    conn.commit()
+    return list(range(start + 1, start + count + 1))
+
+
+def timed(fn, repeat: int = 20) -> dict:
+    """Run fn repeatedly, returns median and p95 in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples: list) -> dict:
+    """Median and p95 of millisecond samples"""
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3)
+    }
+
+
+def report(title: str, rows: list):
+    """Print (label, result dict) rows as an aligned table"""
+    print(f"\n{title}")
+    width = max(len(label) for label, _ in rows)
+    for label, result in rows:
+        print(f"  {label.ljust(width)}  " + "  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn(module_args: list, env: dict = None) -> subprocess.Popen:
+    """Start python -m <module_args> from the backend directory with extra env vars"""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", *module_args],
+        cwd=backend,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> float:
+    """Poll url until it answers 200, returns seconds waited"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"process exited with {process.returncode} before {url} answered")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} did not answer within {timeout}s")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
@@ -0,0 +1,100 @@
+"""
+Admin dashboard latency as the tables grow
+
+Grows users, trips and reviews in steps up to --trips trips, rebuilds the
+materialized stats after each step (what reconciliation does) and times
+GET /admin/dashboard/stats against the ten queries it replaced, which
+scanned users, trips and reviews on every load. The materialized read
+should stay flat while the old queries grow with the tables.
+
+    python -m benchmarks.dashboard --trips 1000000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from database import get_db
+from admin.routes import get_dashboard_stats
+from admin.stats import rebuild_dashboard_stats, refresh_top_destinations
+from benchmarks.common import insert_users, report, temp_database, timed
+
+STEPS = 4
+
+
+def grow(conn, trips: int, rng: random.Random):
+    """Add trips with one user per 10 trips and one review per 2 trips, spread over a year"""
+    destination_ids = [r[0] for r in conn.execute("SELECT id FROM destinations")]
+    user_ids = insert_users(conn, max(1, trips // 10))
+    now = datetime.now(timezone.utc)
+
+    def created_at():
+        return (now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))).strftime("%Y-%m-%d %H:%M:%S")
+
+    for start in range(0, trips, 50000):
+        count = min(50000, trips - start)
+        conn.executemany("""
+            INSERT INTO trips (user_id, destination_id, start_date, end_date, total_cost, created_at)
+            VALUES (?, ?, '2026-06-01', '2026-06-08', ?, ?)
+        """, ((rng.choice(user_ids), rng.choice(destination_ids), round(rng.uniform(500, 5000), 2), created_at())
+              for _ in range(count)))
+        conn.executemany("""
+            INSERT INTO reviews (user_id, destination_id, rating, title, created_at)
+            VALUES (?, ?, ?, 'Benchmark review', ?)
+        """, ((rng.choice(user_ids), rng.choice(destination_ids), rng.randint(1, 5), created_at())
+              for _ in range(count // 2)))
+        conn.commit()
+
+
+def legacy_dashboard():
+    """The ten queries the dashboard ran before the stats were materialized"""
+    conn = get_db()
+    c = conn.cursor()
+    thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
+    for table in ("users", "destinations", "trips", "reviews"):
+        c.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+    for table in ("users", "trips", "reviews"):
+        c.execute(f"SELECT COUNT(*) FROM {table} WHERE created_at > ?", (thirty_days_ago,)).fetchone()
+    c.execute("SELECT SUM(total_cost) FROM trips").fetchone()
+    c.execute("SELECT SUM(total_cost) FROM trips WHERE created_at > ?", (thirty_days_ago,)).fetchone()
+    c.execute("""
+        SELECT d.name, d.country, COUNT(t.id) as bookings
+        FROM destinations d LEFT JOIN trips t ON d.id = t.destination_id
+        GROUP BY d.id
+        ORDER BY bookings DESC LIMIT 5
+    """).fetchall()
+    c.execute("""
+        SELECT 'trip' as type, u.username, d.name as destination, t.created_at
+        FROM trips t
+        JOIN users u ON t.user_id = u.id
+        JOIN destinations d ON t.destination_id = d.id
+        ORDER BY t.created_at DESC LIMIT 10
+    """).fetchall()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trips", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    temp_database("dashboard")
+    rng = random.Random(42)
+    conn = get_db()
+    total = 0
+    for step in range(1, STEPS + 1):
+        target = args.trips * step // STEPS
+        grow(conn, target - total, rng)
+        total = target
+        rebuild_dashboard_stats(conn)
+        refresh_top_destinations(conn)
+        conn.execute("ANALYZE")
+
+        report(f"{total:,} trips", [
+            ("materialized", timed(lambda: get_dashboard_stats({}), args.repeat)),
+            ("old queries", timed(legacy_dashboard, args.repeat)),
+        ])
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
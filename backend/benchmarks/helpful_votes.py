@@ -0,0 +1,129 @@
+"""
+Helpful-vote storm on one hot review
+
+--threads threads each cast --votes votes on the same review, first with
+one UPDATE and commit per vote (what POST /reviews/{id}/helpful used to
+do), then through the HelpfulVoteBuffer with its flush thread running.
+While the buffered storm runs, a reader keeps reading the count the way
+GET /reviews does (table value plus pending votes) and checks it against
+the votes cast before and after each read: fewer means a flushed batch
+was missed (read before its commit, merged after it cleared the pending
+votes), more means it was counted twice.
+
+    python -m benchmarks.helpful_votes --threads 32 --votes 2000 --threshold 50
+"""
+import argparse
+import threading
+import time
+from config import settings
+from database import get_db
+from reviews.helpful import HelpfulVoteBuffer
+from benchmarks.common import insert_users, temp_database
+
+
+def create_review() -> int:
+    conn = get_db()
+    user_id = insert_users(conn, 1)[0]
+    review_id = conn.execute(
+        "INSERT INTO reviews (user_id, destination_id, rating, title) VALUES (?, 1, 5, 'Hot review')",
+        (user_id,)
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    return review_id
+
+
+def helpful_count(review_id: int) -> int:
+    conn = get_db()
+    count = conn.execute("SELECT helpful_count FROM reviews WHERE id = ?", (review_id,)).fetchone()[0]
+    conn.close()
+    return count
+
+
+def storm(threads: int, votes: int, vote) -> float:
+    """Run vote() threads * votes times across threads, returns seconds"""
+    barrier = threading.Barrier(threads + 1)
+
+    def cast():
+        barrier.wait()
+        for _ in range(votes):
+            vote()
+
+    workers = [threading.Thread(target=cast) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def direct_vote(review_id: int):
+    conn = get_db()
+    conn.execute("UPDATE reviews SET helpful_count = helpful_count + 1 WHERE id = ?", (review_id,))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--votes", type=int, default=2000)
+    parser.add_argument("--threshold", type=int, default=settings.HELPFUL_FLUSH_THRESHOLD,
+                        help="pending votes that trigger a flush (lower means more flushes for the reader to race)")
+    args = parser.parse_args()
+    total = args.threads * args.votes
+    settings.HELPFUL_FLUSH_THRESHOLD = args.threshold
+
+    temp_database("helpful")
+
+    review_id = create_review()
+    seconds = storm(args.threads, args.votes, lambda: direct_vote(review_id))
+    assert helpful_count(review_id) == total
+    print(f"direct:   {total:,} votes in {seconds:.2f}s ({total / seconds:,.0f} votes/s)")
+
+    review_id = create_review()
+    buffer = HelpfulVoteBuffer()
+    buffer.start()
+
+    missed = []
+    double_counted = []
+    reads = 0
+    reading = threading.Event()
+
+    def read_row():
+        conn = get_db()
+        row = dict(conn.execute("SELECT id, helpful_count FROM reviews WHERE id = ?", (review_id,)).fetchone())
+        conn.close()
+        return [row]
+
+    def read():
+        nonlocal reads
+        while not reading.is_set():
+            cast_before = buffer.votes_received
+            rows, pending = buffer.read_pending(read_row)
+            seen = rows[0]["helpful_count"] + pending[review_id]
+            cast_after = buffer.votes_received
+            reads += 1
+            if seen < cast_before:
+                missed.append((cast_before, seen))
+            if seen > cast_after:
+                double_counted.append((cast_after, seen))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    seconds = storm(args.threads, args.votes, lambda: buffer.add_vote(review_id))
+    buffer.stop()
+    reading.set()
+    reader.join()
+
+    assert helpful_count(review_id) == total
+    stats = buffer.stats()
+    print(f"buffered: {total:,} votes in {seconds:.2f}s ({total / seconds:,.0f} votes/s), "
+          f"{stats['flushes']} flushes")
+    print(f"reads: {reads:,}, missed a flushed batch: {len(missed)}, counted votes twice: {len(double_counted)}")
+
+
+if __name__ == "__main__":
+    main()
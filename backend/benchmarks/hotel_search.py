@@ -0,0 +1,94 @@
+"""
+Hotel search at 1M hotels
+
+Fills the hotel inventory with --hotels hotels (1M by default) spread over
+the seeded destinations with the inventory bulk loader
+(python -m external.hotel_inventory), then times one search page through the query
+behind GET /hotels/search for every sort order, with and without filters,
+on the first page and on a page deep into the results. Every query is
+served by the composite indexes on hotels, so latency should not depend
+on inventory size or page depth.
+
+    python -m benchmarks.hotel_search --hotels 1000000
+"""
+import argparse
+from database import get_db
+from external.hotel_inventory import reload_hotel_inventory
+from external.hotels import HOTEL_SORTS, query_hotels
+from pagination import encode_cursor
+from benchmarks.common import report, temp_database, timed
+
+PAGE_SIZE = 20
+
+FILTERS = {
+    "no filters": {},
+    "4+ stars": {"min_stars": 4},
+    "price range": {"min_price": 80, "max_price": 200},
+    "within 2km": {"max_distance": 2.0},
+    "4 guests": {"guests": 4},
+}
+
+
+def busiest_destination() -> tuple:
+    """(destination_id, hotel count) of the destination with the most hotels"""
+    conn = get_db()
+    row = conn.execute("""
+        SELECT destination_id, COUNT(*) FROM hotels
+        GROUP BY destination_id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    conn.close()
+    return row[0], row[1]
+
+
+def cursor_at(destination_id: int, sort: str, offset: int):
+    """Cursor for the unfiltered page starting at offset (None for the first page)"""
+    if offset == 0:
+        return None
+    columns, direction = HOTEL_SORTS[sort]
+    conn = get_db()
+    row = conn.execute(f"""
+        SELECT {", ".join(columns)} FROM hotels
+        WHERE destination_id = ?
+        ORDER BY {", ".join(f"{col} {direction}" for col in columns)}
+        LIMIT 1 OFFSET ?
+    """, (destination_id, offset - 1)).fetchone()
+    conn.close()
+    return encode_cursor(row)
+
+
+def search(destination_id: int, sort: str, cursor, filters: dict):
+    conn = get_db()
+    query_hotels(conn.cursor(), destination_id, sort=sort, limit=PAGE_SIZE, cursor=cursor, **filters)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hotels", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    temp_database("hotels")
+    conn = get_db()
+    destinations = conn.execute(
+        "SELECT COUNT(*) FROM destinations WHERE avg_daily_cost > 0 AND deleted_at IS NULL"
+    ).fetchone()[0]
+    conn.close()
+    loaded = reload_hotel_inventory(max(1, args.hotels // destinations))
+    destination_id, count = busiest_destination()
+    print(f"{loaded:,} hotels over {destinations} destinations, "
+          f"searching destination {destination_id} ({count:,} hotels)")
+
+    for sort in HOTEL_SORTS:
+        rows = []
+        for depth, offset in (("first", 0), ("deep", count // 2)):
+            cursor = cursor_at(destination_id, sort, offset)
+            for name, filters in FILTERS.items():
+                rows.append((f"{depth} page, {name}", timed(
+                    lambda: search(destination_id, sort, cursor, filters), args.repeat
+                )))
+        report(f"sort={sort}", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Deep review pages: keyset cursors vs OFFSET
+
+Loads --reviews reviews (1M by default) for one destination and times the
+first page, a page in the middle and the last page for every sort order,
+both through GET /reviews/{id} with a cursor and with the LIMIT/OFFSET
+query it replaced. Keyset pages should cost the same at any depth.
+
+    python -m benchmarks.review_pages --reviews 1000000
+"""
+import argparse
+import random
+from database import get_db
+from pagination import encode_cursor
+from reviews.routes import REVIEW_SORTS, get_reviews
+from reviews.stats import ensure_review_stats
+from benchmarks.common import insert_users, report, temp_database, timed
+
+DESTINATION_ID = 1
+PAGE_SIZE = 20
+
+
+def load_reviews(count: int, users: int):
+    conn = get_db()
+    user_ids = insert_users(conn, users)
+    rng = random.Random(42)
+    batch = []
+    for i in range(count):
+        batch.append((
+            rng.choice(user_ids), DESTINATION_ID, rng.randint(1, 5), f"Review {i}", "Benchmark review",
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00",
+            rng.randint(0, 500)
+        ))
+        if len(batch) == 50000:
+            _insert(conn, batch)
+            batch = []
+    _insert(conn, batch)
+    ensure_review_stats(conn)
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def _insert(conn, rows):
+    conn.executemany("""
+        INSERT INTO reviews (user_id, destination_id, rating, title, content, created_at, helpful_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+
+
+def cursor_at(sort: str, offset: int):
+    """Cursor for the page starting at offset (None for the first page)"""
+    if offset == 0:
+        return None
+    columns = REVIEW_SORTS[sort]
+    conn = get_db()
+    row = conn.execute(f"""
+        SELECT {", ".join(columns)} FROM reviews
+        WHERE destination_id = ?
+        ORDER BY {", ".join(f"{col} DESC" for col in columns)}
+        LIMIT 1 OFFSET ?
+    """, (DESTINATION_ID, offset - 1)).fetchone()
+    conn.close()
+    return encode_cursor(row)
+
+
+def offset_page(sort: str, offset: int):
+    conn = get_db()
+    order_by = ", ".join(f"r.{col} DESC" for col in REVIEW_SORTS[sort])
+    conn.execute(f"""
+        SELECT r.*, u.username, u.avatar_url
+        FROM reviews r JOIN users u ON r.user_id = u.id
+        WHERE r.destination_id = ?
+        ORDER BY {order_by}
+        LIMIT ? OFFSET ?
+    """, (DESTINATION_ID, PAGE_SIZE, offset)).fetchall()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    temp_database("reviews")
+    load_reviews(args.reviews, args.users)
+
+    depths = {"first": 0, "middle": args.reviews // 2, "last": args.reviews - PAGE_SIZE}
+    for sort in REVIEW_SORTS:
+        rows = []
+        for name, offset in depths.items():
+            cursor = cursor_at(sort, offset)
+            rows.append((f"keyset {name}", timed(
+                lambda: get_reviews(DESTINATION_ID, PAGE_SIZE, sort, cursor), args.repeat
+            )))
+            rows.append((f"offset {name}", timed(lambda: offset_page(sort, offset), args.repeat)))
+        report(f"sort={sort} ({args.reviews:,} reviews)", rows)
+
+
+if __name__ == "__main__":
+    main()
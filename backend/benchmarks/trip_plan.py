@@ -0,0 +1,113 @@
+"""
+Trip planning: GET /trips/plan vs the four-call sequence
+
+Starts the fake provider with --latency-ms of upstream latency and the API
+pointed at it (provider caches disabled, so every plan reaches upstream),
+then times planning a trip both ways:
+
+- sequence: GET /destinations/{id}, /weather/{id}, /flights/search and
+  /hotels/search one after another, as the frontend used to
+- plan: GET /trips/plan, streamed as Server-Sent Events
+
+and reports time to first byte and total latency for each.
+
+    python -m benchmarks.trip_plan --latency-ms 120 --repeat 20
+"""
+import argparse
+import time
+from datetime import date, timedelta
+import httpx
+from benchmarks.common import free_port, report, spawn, stop, summarize, temp_database, wait_until_up
+
+ORIGIN = "JFK"
+NIGHTS = 5
+
+
+def trip_params(destination_id: int) -> dict:
+    start = date.today() + timedelta(days=30)
+    return {
+        "destination_id": destination_id,
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=NIGHTS)).isoformat(),
+    }
+
+
+def sequence(client: httpx.Client, destination_id: int) -> tuple:
+    """(ttfb, total) seconds for the four separate calls"""
+    trip = trip_params(destination_id)
+    requests = [
+        (f"/destinations/{destination_id}", {}),
+        (f"/weather/{destination_id}", {"days": NIGHTS}),
+        ("/flights/search", {"origin": ORIGIN, "destination_id": destination_id, "date": trip["start_date"]}),
+        ("/hotels/search", {"destination_id": destination_id, "checkin": trip["start_date"],
+                            "checkout": trip["end_date"]}),
+    ]
+    started = time.perf_counter()
+    ttfb = None
+    for path, params in requests:
+        with client.stream("GET", path, params=params) as response:
+            response.raise_for_status()
+            for _ in response.iter_bytes():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+    return ttfb, time.perf_counter() - started
+
+
+def plan(client: httpx.Client, destination_id: int) -> tuple:
+    """(ttfb, total) seconds for one streamed /trips/plan"""
+    started = time.perf_counter()
+    ttfb = None
+    with client.stream("GET", "/trips/plan", params={**trip_params(destination_id), "origin": ORIGIN}) as response:
+        response.raise_for_status()
+        for _ in response.iter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+    return ttfb, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=120)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--destination-id", type=int, default=1)
+    args = parser.parse_args()
+
+    database = temp_database("trip-plan")
+    provider_port, api_port = free_port(), free_port()
+    provider_url = f"http://127.0.0.1:{provider_port}"
+    provider = spawn(["external.fake_provider", "--port", str(provider_port),
+                      "--latency-ms", str(args.latency_ms), "--latency-distribution", "fixed"])
+    api = spawn(["uvicorn", "main:app", "--port", str(api_port)], {
+        "DATABASE_URL": database,
+        "WEATHER_API_BASE_URL": provider_url,
+        "AMADEUS_API_BASE_URL": provider_url,
+        "WEATHER_API_KEY": "fake",
+        "AMADEUS_API_KEY": "fake",
+        "AMADEUS_API_SECRET": "fake",
+        "WEATHER_CACHE_TTL": "0",
+        "WEATHER_CACHE_STALE_TTL": "0",
+        "FLIGHT_CACHE_TTL": "0",
+        "FLIGHT_CACHE_STALE_TTL": "0",
+    })
+    try:
+        wait_until_up(f"{provider_url}/fake/stats", provider)
+        wait_until_up(f"http://127.0.0.1:{api_port}/health", api)
+
+        with httpx.Client(base_url=f"http://127.0.0.1:{api_port}", timeout=30.0) as client:
+            results = {}
+            for name, run in (("sequence", sequence), ("plan", plan)):
+                run(client, args.destination_id)  # connect and fetch the Amadeus token outside the timings
+                samples = [run(client, args.destination_id) for _ in range(args.repeat)]
+                results[name] = samples
+        rows = []
+        for name, samples in results.items():
+            rows.append((f"{name} ttfb", summarize([ttfb * 1000 for ttfb, _ in samples])))
+            rows.append((f"{name} total", summarize([total * 1000 for _, total in samples])))
+        report(f"trip planning ({args.latency_ms:g}ms upstream latency)", rows)
+    finally:
+        stop(api)
+        stop(provider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Cross-worker invalidation bus
+
+With several uvicorn workers each process keeps its own in-memory state
+(the shared-trip page LRU, trending scores), so a write handled by one
+worker has to reach the others. Writers publish an event to the
+invalidation_events table, inside their own transaction when they have
+one, so an event exists exactly when its write committed.
+
+Every worker runs a thread that reads PRAGMA data_version each
+BUS_POLL_SECONDS. It only changes when another connection commits, so an
+idle poll costs no table reads; when it moves, events newer than the last
+one seen are passed to the handlers subscribed to their topic. A worker
+skips its own events, which it already applied locally. A write is
+therefore visible in every worker within one poll interval plus handler
+time. Events older than BUS_RETENTION_SECONDS are pruned.
+
+publish() is a no-op unless MULTI_WORKER is on.
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from database import get_db
+from config import settings
+
+# Identifies this process's events
+ORIGIN = f"{os.getpid()}-{secrets.token_hex(4)}"
+
+PRUNE_INTERVAL_SECONDS = 60
+
+_handlers = {}
+
+
+def subscribe(topic: str, handler):
+    """Call handler(payload) for events on topic published by other workers"""
+    _handlers.setdefault(topic, []).append(handler)
+    return handler
+
+
+def publish(topic: str, payload, cursor=None):
+    """Queue an event for the other workers
+
+    Pass the cursor of an open write transaction to publish atomically with
+    it; otherwise the event is committed on its own connection.
+    """
+    if not settings.MULTI_WORKER:
+        return
+    row = (topic, json.dumps(payload), ORIGIN, time.time())
+    sql = "INSERT INTO invalidation_events (topic, payload, origin, published_at) VALUES (?, ?, ?, ?)"
+    if cursor is not None:
+        cursor.execute(sql, row)
+        return
+    conn = get_db()
+    try:
+        conn.execute(sql, row)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class InvalidationBus:
+    """Daemon thread applying other workers' events to this process"""
+
+    def __init__(self, origin: str = ORIGIN):
+        self.origin = origin
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_event_id = 0
+        self.polls = 0
+        self.events_applied = 0
+        self.handler_errors = 0
+        self.last_lag_seconds = None
+        self.max_lag_seconds = 0.0
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # State was just loaded from the database, so only later events matter
+        conn = get_db()
+        try:
+            self.last_event_id = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM invalidation_events"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def poll(self, conn) -> int:
+        """Apply events published since the last poll, returns how many"""
+        c = conn.cursor()
+        c.execute("""
+            SELECT id, topic, payload, origin, published_at FROM invalidation_events
+            WHERE id > ? ORDER BY id
+        """, (self.last_event_id,))
+        applied = 0
+        for event in c.fetchall():
+            self.last_event_id = event["id"]
+            if event["origin"] == self.origin:
+                continue
+            payload = json.loads(event["payload"])
+            for handler in _handlers.get(event["topic"], ()):
+                try:
+                    handler(payload)
+                except Exception as e:
+                    self.handler_errors += 1
+                    print(f"Invalidation handler error ({event['topic']}): {e}")
+            lag = time.time() - event["published_at"]
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            applied += 1
+        self.events_applied += applied
+        return applied
+
+    def prune(self, conn):
+        conn.execute(
+            "DELETE FROM invalidation_events WHERE published_at < ?",
+            (time.time() - settings.BUS_RETENTION_SECONDS,)
+        )
+        conn.commit()
+
+    def _run(self):
+        conn = get_db()
+        version = None
+        last_prune = time.monotonic()
+        try:
+            while not self._stop.wait(settings.BUS_POLL_SECONDS):
+                try:
+                    current = conn.execute("PRAGMA data_version").fetchone()[0]
+                    self.polls += 1
+                    if current != version:
+                        version = current
+                        self.poll(conn)
+                    if time.monotonic() - last_prune > PRUNE_INTERVAL_SECONDS:
+                        self.prune(conn)
+                        last_prune = time.monotonic()
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Invalidation bus error: {e}")
+                    conn.rollback()
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "origin": self.origin,
+            "last_event_id": self.last_event_id,
+            "polls": self.polls,
+            "events_applied": self.events_applied,
+            "handler_errors": self.handler_errors,
+            "last_lag_ms": round(self.last_lag_seconds * 1000, 1) if self.last_lag_seconds is not None else None,
+            "max_lag_ms": round(self.max_lag_seconds * 1000, 1),
+            "poll_interval_ms": settings.BUS_POLL_SECONDS * 1000,
+            "last_error": self.last_error
+        }
+
+
+invalidation_bus = InvalidationBus()
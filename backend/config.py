@@ -11,14 +11,114 @@ class Settings:
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
     AMADEUS_API_KEY = os.getenv("AMADEUS_API_KEY", "")
     AMADEUS_API_SECRET = os.getenv("AMADEUS_API_SECRET", "")
+    AMADEUS_TOKEN_REFRESH_MARGIN = float(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "60"))
     
-    # Database
+    # Provider base URLs (point both at external.fake_provider for offline load tests)
+    WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://api.openweathermap.org")
+    AMADEUS_API_BASE_URL = os.getenv("AMADEUS_API_BASE_URL", "https://api.amadeus.com")
+    
+    # Provider HTTP clients
+    PROVIDER_CONNECT_TIMEOUT = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", "3.0"))
+    PROVIDER_READ_TIMEOUT = float(os.getenv("PROVIDER_READ_TIMEOUT", "10.0"))
+    PROVIDER_MAX_KEEPALIVE = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "10"))
+    PROVIDER_KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "30.0"))
+    PROVIDER_HTTP2 = os.getenv("PROVIDER_HTTP2", "false").lower() == "true"
+    WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", "20"))
+    AMADEUS_MAX_CONNECTIONS = int(os.getenv("AMADEUS_MAX_CONNECTIONS", "20"))
+    
+    # Weather forecast cache (seconds); set WEATHER_CACHE_PATH to persist across restarts
+    WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "1800"))
+    WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "21600"))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "5000"))
+    WEATHER_CACHE_PATH = os.getenv("WEATHER_CACHE_PATH", "")
+    
+    # Flight offer cache and popular-route prewarming (seconds)
+    FLIGHT_CACHE_TTL = float(os.getenv("FLIGHT_CACHE_TTL", "300"))
+    FLIGHT_CACHE_STALE_TTL = float(os.getenv("FLIGHT_CACHE_STALE_TTL", "60"))
+    FLIGHT_CACHE_MAX_ENTRIES = int(os.getenv("FLIGHT_CACHE_MAX_ENTRIES", "20000"))
+    FLIGHT_PREWARM_INTERVAL = float(os.getenv("FLIGHT_PREWARM_INTERVAL", "60"))
+    FLIGHT_PREWARM_TOP_ROUTES = int(os.getenv("FLIGHT_PREWARM_TOP_ROUTES", "50"))
+    FLIGHT_PREWARM_CONCURRENCY = int(os.getenv("FLIGHT_PREWARM_CONCURRENCY", "4"))
+    # Multi-destination explore: concurrent upstream searches and destinations per request
+    FLIGHT_EXPLORE_CONCURRENCY = int(os.getenv("FLIGHT_EXPLORE_CONCURRENCY", "8"))
+    FLIGHT_EXPLORE_MAX_DESTINATIONS = int(os.getenv("FLIGHT_EXPLORE_MAX_DESTINATIONS", "30"))
+    
+    # Provider resilience: per-request deadlines, circuit breakers, hedging
+    WEATHER_DEADLINE_SECONDS = float(os.getenv("WEATHER_DEADLINE_SECONDS", "3.0"))
+    FLIGHTS_DEADLINE_SECONDS = float(os.getenv("FLIGHTS_DEADLINE_SECONDS", "5.0"))
+    BREAKER_ERROR_THRESHOLD = float(os.getenv("BREAKER_ERROR_THRESHOLD", "0.5"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "50"))
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    PROVIDER_HEDGE_ENABLED = os.getenv("PROVIDER_HEDGE_ENABLED", "false").lower() == "true"
+    PROVIDER_HEDGE_PERCENTILE = float(os.getenv("PROVIDER_HEDGE_PERCENTILE", "95"))
+    PROVIDER_HEDGE_MIN_SAMPLES = int(os.getenv("PROVIDER_HEDGE_MIN_SAMPLES", "20"))
+    
+    # Database (a missing DATABASE_URL is restored from DATABASE_SNAPSHOT, see snapshot.py)
     DATABASE_URL = os.getenv("DATABASE_URL", "travel.db")
+    DATABASE_SNAPSHOT = os.getenv("DATABASE_SNAPSHOT", "")
     
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     SESSION_EXPIRY_DAYS = 7
     
+    # Background repricing of planned trips
+    REPRICING_CHUNK_SIZE = int(os.getenv("REPRICING_CHUNK_SIZE", "500"))
+    REPRICING_PAUSE_SECONDS = float(os.getenv("REPRICING_PAUSE_SECONDS", "0.05"))
+    REPRICING_POLL_SECONDS = float(os.getenv("REPRICING_POLL_SECONDS", "2.0"))
+    REPRICING_MAX_ATTEMPTS = int(os.getenv("REPRICING_MAX_ATTEMPTS", "5"))
+    
+    # Background deletes of users and destinations
+    DELETION_CHUNK_SIZE = int(os.getenv("DELETION_CHUNK_SIZE", "500"))
+    DELETION_PAUSE_SECONDS = float(os.getenv("DELETION_PAUSE_SECONDS", "0.05"))
+    DELETION_POLL_SECONDS = float(os.getenv("DELETION_POLL_SECONDS", "2.0"))
+    DELETION_MAX_ATTEMPTS = int(os.getenv("DELETION_MAX_ATTEMPTS", "5"))
+    
+    # Helpful vote batching
+    HELPFUL_FLUSH_INTERVAL_SECONDS = float(os.getenv("HELPFUL_FLUSH_INTERVAL_SECONDS", "2.0"))
+    HELPFUL_FLUSH_THRESHOLD = int(os.getenv("HELPFUL_FLUSH_THRESHOLD", "500"))
+    
+    # Shared trip pages
+    SHARED_SNAPSHOT_CACHE_SIZE = int(os.getenv("SHARED_SNAPSHOT_CACHE_SIZE", "10000"))
+    SHARED_SNAPSHOT_MAX_AGE = int(os.getenv("SHARED_SNAPSHOT_MAX_AGE", "60"))
+    
+    # Trending destinations
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "72"))
+    TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", "20"))
+    TRENDING_PERSIST_SECONDS = float(os.getenv("TRENDING_PERSIST_SECONDS", "60"))
+    
+    # Admin dashboard: top destinations refresh and drift reconciliation
+    DASHBOARD_REFRESH_SECONDS = float(os.getenv("DASHBOARD_REFRESH_SECONDS", "60"))
+    DASHBOARD_RECONCILE_SECONDS = float(os.getenv("DASHBOARD_RECONCILE_SECONDS", "3600"))
+    
+    # Admin exports: rows fetched and encoded per batch
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Sampling profiler: admin profiles of all threads, and per-request profiles for
+    # requests sent with "X-Profile: <PROFILE_TOKEN>" (disabled while the token is empty)
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+    PROFILE_COOLDOWN_SECONDS = float(os.getenv("PROFILE_COOLDOWN_SECONDS", "10"))
+    PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", "64"))
+    PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "2000"))
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+    PROFILE_REQUEST_INTERVAL_MS = float(os.getenv("PROFILE_REQUEST_INTERVAL_MS", "1"))
+    PROFILE_REQUESTS_PER_MINUTE = int(os.getenv("PROFILE_REQUESTS_PER_MINUTE", "30"))
+    PROFILE_SUMMARY_ENTRIES = int(os.getenv("PROFILE_SUMMARY_ENTRIES", "8"))
+    
+    # Multi-worker mode (uvicorn --workers N; uvicorn also reads WEB_CONCURRENCY):
+    # provider responses go through a shared mmap-backed cache and in-memory
+    # state is kept in sync over the invalidation bus
+    WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+    MULTI_WORKER = os.getenv("MULTI_WORKER", str(WORKERS > 1)).lower() == "true"
+    SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+    SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "50000"))
+    SHARED_CACHE_MMAP_BYTES = int(os.getenv("SHARED_CACHE_MMAP_BYTES", str(256 * 1024 * 1024)))
+    BUS_POLL_SECONDS = float(os.getenv("BUS_POLL_SECONDS", "0.05"))
+    BUS_RETENTION_SECONDS = float(os.getenv("BUS_RETENTION_SECONDS", "300"))
+    
     # CORS
     CORS_ORIGINS = [
         "http://localhost:5173",
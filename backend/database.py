@@ -2,19 +2,66 @@
 Database connection and initialization
 """
 import sqlite3
+from contextlib import contextmanager
 from config import settings
+from metrics import count_statement, request_statements
+
+# FTS5's trigram tokenizer (substring search) needs SQLite 3.34+
+USER_SEARCH_FTS = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+# Stored in PRAGMA user_version once a database is fully set up; bump it
+# whenever the DDL in init_db or the startup backfills change
+SCHEMA_VERSION = 4
 
 def get_db():
     """Get database connection"""
     conn = sqlite3.connect(settings.DATABASE_URL, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    if request_statements.get() is not None:
+        conn.set_trace_callback(count_statement)
     return conn
 
-def init_db():
-    """Initialize database tables"""
+def add_column(cursor, table: str, column: str, definition: str):
+    """Add a column to an existing table unless it is already there"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in {r["name"] for r in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def mark_schema_current(conn):
+    """Record that the schema and startup backfills are at SCHEMA_VERSION"""
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+@contextmanager
+def schema_lock():
+    """Serialize schema setup between worker processes starting together"""
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): single worker only
+        yield
+        return
+    with open(f"{settings.DATABASE_URL}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def init_db() -> bool:
+    """Initialize database tables, returns False when the schema was already current"""
     conn = get_db()
     c = conn.cursor()
     
+    # WAL lets long reads (exports, dashboards) run alongside writers
+    c.execute("PRAGMA journal_mode=WAL")
+    
+    if schema_version(conn) == SCHEMA_VERSION:
+        conn.close()
+        return False
+    
     # Users table
     c.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -107,5 +154,270 @@ def init_db():
         )
     """)
     
+    # Repricing job queue (one row per destination cost change)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS repricing_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            destination_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            last_trip_id INTEGER DEFAULT 0,
+            trips_repriced INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            started_at TEXT,
+            finished_at TEXT,
+            FOREIGN KEY (destination_id) REFERENCES destinations(id)
+        )
+    """)
+    
+    # Background deletes of users and destinations (entity is 'user' or 'destination')
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS deletion_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            step TEXT,
+            rows_deleted INTEGER DEFAULT 0,
+            stale_destinations TEXT DEFAULT '[]',
+            error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            started_at TEXT,
+            finished_at TEXT
+        )
+    """)
+    
+    # Cross-worker invalidation events (see bus.py); AUTOINCREMENT so ids
+    # keep growing after old events are pruned
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS invalidation_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            origin TEXT NOT NULL,
+            published_at REAL NOT NULL
+        )
+    """)
+    
+    # Tombstones: rows being deleted by a deletion job are hidden from the API
+    add_column(c, "users", "deleted_at", "TEXT")
+    add_column(c, "destinations", "deleted_at", "TEXT")
+    
+    # Failed attempts per repricing job; jobs are marked 'failed' after
+    # REPRICING_MAX_ATTEMPTS so they stop blocking the queue
+    add_column(c, "repricing_jobs", "attempts", "INTEGER DEFAULT 0")
+    add_column(c, "repricing_jobs", "error", "TEXT")
+    
+    # Same for deletion jobs, after DELETION_MAX_ATTEMPTS
+    add_column(c, "deletion_jobs", "attempts", "INTEGER DEFAULT 0")
+    
+    # Per-destination review stats (count, sum and rating histogram)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS destination_stats (
+            destination_id INTEGER PRIMARY KEY,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            r1 INTEGER NOT NULL DEFAULT 0,
+            r2 INTEGER NOT NULL DEFAULT 0,
+            r3 INTEGER NOT NULL DEFAULT 0,
+            r4 INTEGER NOT NULL DEFAULT 0,
+            r5 INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (destination_id) REFERENCES destinations(id)
+        )
+    """)
+    
+    # Serialized snapshots of shared trips
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS shared_trip_snapshots (
+            share_token TEXT PRIMARY KEY,
+            trip_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            updated_at TEXT,
+            FOREIGN KEY (trip_id) REFERENCES trips(id)
+        )
+    """)
+    
+    # Decayed popularity scores (score as of scored_at, unix seconds)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS destination_popularity (
+            destination_id INTEGER PRIMARY KEY,
+            score REAL NOT NULL DEFAULT 0,
+            scored_at REAL NOT NULL,
+            FOREIGN KEY (destination_id) REFERENCES destinations(id)
+        )
+    """)
+    
+    # Admin dashboard running totals (users, destinations, trips, reviews, revenue)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_counters (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL DEFAULT 0
+        )
+    """)
+    
+    # Admin dashboard per-day counts (day is date(created_at), UTC)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_daily (
+            day TEXT PRIMARY KEY,
+            new_users INTEGER NOT NULL DEFAULT 0,
+            new_trips INTEGER NOT NULL DEFAULT 0,
+            new_reviews INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0
+        )
+    """)
+    
+    # Periodically refreshed most booked destinations
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_top_destinations (
+            rank INTEGER PRIMARY KEY,
+            destination_id INTEGER NOT NULL,
+            name TEXT,
+            country TEXT,
+            bookings INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    # Daily bookings and revenue per destination (day is date(trips.created_at))
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS daily_destination_revenue (
+            day TEXT NOT NULL,
+            destination_id INTEGER NOT NULL,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, destination_id)
+        ) WITHOUT ROWID
+    """)
+    
+    # Users who created trips on each day, with their trip count
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS daily_active_users (
+            day TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            trips INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, user_id)
+        ) WITHOUT ROWID
+    """)
+    
+    # Per-user trip and review counts for the admin user list
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            trip_count INTEGER NOT NULL DEFAULT 0,
+            review_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    # Trigram index over username and email (rowid is the user id)
+    if USER_SEARCH_FTS:
+        c.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts
+            USING fts5(username, email, tokenize='trigram')
+        """)
+    
+    # Hotel inventory
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS hotels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            destination_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            stars INTEGER NOT NULL,
+            price_per_night REAL NOT NULL,
+            rating REAL,
+            reviews INTEGER DEFAULT 0,
+            amenities TEXT,
+            image TEXT,
+            distance_from_center REAL,
+            breakfast_included INTEGER DEFAULT 0,
+            free_cancellation INTEGER DEFAULT 0,
+            description TEXT,
+            FOREIGN KEY (destination_id) REFERENCES destinations(id)
+        )
+    """)
+    
+    # Room types and nightly rates per hotel
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS hotel_rooms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hotel_id INTEGER NOT NULL,
+            room_type TEXT NOT NULL,
+            size_sqm INTEGER,
+            beds TEXT,
+            view TEXT,
+            max_guests INTEGER NOT NULL,
+            nightly_rate REAL NOT NULL,
+            FOREIGN KEY (hotel_id) REFERENCES hotels(id)
+        )
+    """)
+    
+    # Indexes
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_created_at
+        ON users (created_at DESC, id DESC)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trips_destination_status
+        ON trips (destination_id, status, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trips_user
+        ON trips (user_id, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trips_created_at
+        ON trips (created_at)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reviews_destination_newest
+        ON reviews (destination_id, created_at DESC, id DESC)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reviews_destination_rating
+        ON reviews (destination_id, rating DESC, created_at DESC, id DESC)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reviews_destination_helpful
+        ON reviews (destination_id, helpful_count DESC, id DESC)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reviews_user
+        ON reviews (user_id, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_favorites_destination
+        ON favorites (destination_id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_shared_trip_snapshots_trip
+        ON shared_trip_snapshots (trip_id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_repricing_jobs_status
+        ON repricing_jobs (status, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_deletion_jobs_status
+        ON deletion_jobs (status, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_invalidation_events_published
+        ON invalidation_events (published_at)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hotels_destination_price
+        ON hotels (destination_id, price_per_night, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hotels_destination_stars_price
+        ON hotels (destination_id, stars, price_per_night, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hotels_destination_distance
+        ON hotels (destination_id, distance_from_center, id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hotel_rooms_hotel
+        ON hotel_rooms (hotel_id, max_guests)
+    """)
+    
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+    return True
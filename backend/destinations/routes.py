@@ -6,6 +6,8 @@ from typing import Optional, List
 from database import get_db
 from models import SuggestionRequest
 from auth.utils import get_optional_user
+from config import settings
+from destinations.trending import trending
 
 router = APIRouter(prefix="/destinations", tags=["Destinations"])
 
@@ -19,9 +21,9 @@ def get_destinations(
     c = conn.cursor()
     
     if category:
-        c.execute("SELECT * FROM destinations WHERE category = ?", (category,))
+        c.execute("SELECT * FROM destinations WHERE category = ? AND deleted_at IS NULL", (category,))
     else:
-        c.execute("SELECT * FROM destinations")
+        c.execute("SELECT * FROM destinations WHERE deleted_at IS NULL")
     
     destinations = [dict(r) for r in c.fetchall()]
     
@@ -38,12 +40,34 @@ def get_destinations(
     conn.close()
     return destinations
 
+@router.get("/trending")
+def get_trending(limit: int = 10):
+    """Get trending destinations by time-decayed favorites, bookings and reviews"""
+    top = trending.top(max(1, min(limit, settings.TRENDING_TOP_K)))
+    if not top:
+        return []
+    
+    ids = [dest_id for dest_id, _ in top]
+    conn = get_db()
+    c = conn.cursor()
+    c.execute(
+        f"SELECT * FROM destinations WHERE id IN ({', '.join('?' * len(ids))}) AND deleted_at IS NULL",
+        ids
+    )
+    rows = {r["id"]: dict(r) for r in c.fetchall()}
+    conn.close()
+    
+    return [
+        {**rows[dest_id], "trending_score": round(score, 3)}
+        for dest_id, score in top if dest_id in rows
+    ]
+
 @router.get("/{dest_id}")
 def get_destination(dest_id: int):
     """Get single destination by ID"""
     conn = get_db()
     c = conn.cursor()
-    c.execute("SELECT * FROM destinations WHERE id = ?", (dest_id,))
+    c.execute("SELECT * FROM destinations WHERE id = ? AND deleted_at IS NULL", (dest_id,))
     row = c.fetchone()
     conn.close()
     
@@ -57,7 +81,7 @@ def get_suggestions(req: SuggestionRequest):
     """Get AI-powered destination suggestions based on preferences"""
     conn = get_db()
     c = conn.cursor()
-    c.execute("SELECT * FROM destinations")
+    c.execute("SELECT * FROM destinations WHERE deleted_at IS NULL")
     destinations = [dict(r) for r in c.fetchall()]
     conn.close()
     
@@ -0,0 +1,203 @@
+"""
+Time-decayed trending destinations
+
+Each favorite, booking and review adds a weighted event to a destination
+score that decays exponentially with a configurable half-life. Scores use
+forward decay against a fixed landmark time, so an event only touches its
+own destination and the relative order never changes as time passes. The
+top-k list is recomputed on write, and reads return it as is.
+
+Scores are persisted to destination_popularity periodically and loaded
+on startup. In multi-worker mode every event is also published on the
+invalidation bus and replayed by the other workers with its original
+timestamp, so all of them hold the same scores.
+"""
+import bisect
+import calendar
+import math
+import threading
+import time
+from datetime import datetime
+from database import get_db
+from config import settings
+from bus import publish, subscribe
+
+# "unfavorite" is recorded at the favorite's own timestamp, so it removes
+# exactly that favorite's decayed contribution
+EVENT_WEIGHTS = {
+    "favorite": 3.0,
+    "unfavorite": -3.0,
+    "trip": 5.0,
+    "review": 2.0,
+}
+
+# Rebase the landmark before exp() grows past this exponent
+MAX_EXPONENT = 60.0
+
+
+def event_time(created_at: str) -> float:
+    """Unix time of a created_at column (SQLite CURRENT_TIMESTAMP, UTC)"""
+    created = datetime.strptime(created_at[:19], "%Y-%m-%d %H:%M:%S")
+    return calendar.timegm(created.timetuple())
+
+
+class TrendingScores:
+    """Forward-decayed popularity scores with a precomputed top-k list"""
+
+    def __init__(self, half_life_hours: float, top_k: int):
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.top_k = top_k
+        self.landmark = time.time()
+        self._scores = {}
+        self._order = []
+        self._top = ()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _weight_at(self, timestamp: float) -> float:
+        return math.exp(self.decay_rate * (timestamp - self.landmark))
+
+    def _rebase(self, landmark: float):
+        """Move the landmark forward, scaling every score down to match"""
+        factor = math.exp(self.decay_rate * (self.landmark - landmark))
+        self._scores = {dest_id: s * factor for dest_id, s in self._scores.items()}
+        self._order = [(key * factor, dest_id) for key, dest_id in self._order]
+        self._top = tuple((dest_id, s * factor) for dest_id, s in self._top)
+        self.landmark = landmark
+        self._dirty.update(self._scores)
+
+    def _unlink(self, destination_id: int):
+        """Drop a destination from the sorted order"""
+        old = self._scores.get(destination_id)
+        if old is None:
+            return
+        index = bisect.bisect_left(self._order, (-old, destination_id))
+        if index < len(self._order) and self._order[index] == (-old, destination_id):
+            del self._order[index]
+
+    def _set(self, destination_id: int, score: float):
+        """Update one score and its position in the sorted order (descending)"""
+        self._unlink(destination_id)
+        self._scores[destination_id] = score
+        bisect.insort(self._order, (-score, destination_id))
+        self._publish()
+
+    def _publish(self):
+        self._top = tuple((dest_id, -key) for key, dest_id in self._order[:self.top_k])
+
+    def record(self, destination_id: int, event: str, timestamp: float = None):
+        """Add a weighted event for a destination"""
+        timestamp = timestamp or time.time()
+        self._record(destination_id, event, timestamp)
+        publish("trending", {"destination_id": destination_id, "event": event, "timestamp": timestamp})
+
+    def remove(self, destination_id: int):
+        """Forget a destination (e.g. after it is deleted)"""
+        self._remove(destination_id)
+        publish("trending.remove", destination_id)
+
+    def _record(self, destination_id: int, event: str, timestamp: float):
+        with self._lock:
+            if self.decay_rate * (timestamp - self.landmark) > MAX_EXPONENT:
+                self._rebase(timestamp)
+            delta = EVENT_WEIGHTS[event] * self._weight_at(timestamp)
+            score = max(0.0, self._scores.get(destination_id, 0.0) + delta)
+            self._set(destination_id, score)
+            self._dirty.add(destination_id)
+
+    def _remove(self, destination_id: int):
+        with self._lock:
+            self._unlink(destination_id)
+            self._scores.pop(destination_id, None)
+            self._dirty.discard(destination_id)
+            self._publish()
+
+    def top(self, limit: int = None) -> list:
+        """Current top destinations as [(destination_id, decayed score)]"""
+        # _rebase() replaces both together
+        with self._lock:
+            top, landmark = self._top, self.landmark
+        decay = math.exp(-self.decay_rate * (time.time() - landmark))
+        return [(dest_id, score * decay) for dest_id, score in top[:limit] if score > 0]
+
+    # ==================== PERSISTENCE ====================
+    def load(self, conn):
+        """Load persisted scores, backfilling from history on first run"""
+        c = conn.cursor()
+        c.execute("SELECT destination_id, score, scored_at FROM destination_popularity")
+        rows = c.fetchall()
+
+        with self._lock:
+            self._scores, self._order, self._top = {}, [], ()
+            self.landmark = time.time()
+            for r in rows:
+                self._set(r["destination_id"], r["score"] * self._weight_at(r["scored_at"]))
+
+        if not rows:
+            self.backfill(conn)
+
+    def backfill(self, conn):
+        """Replay favorites, trips and reviews from their created_at timestamps"""
+        c = conn.cursor()
+        sources = (
+            ("favorite", "favorites"),
+            ("trip", "trips"),
+            ("review", "reviews"),
+        )
+        for event, table in sources:
+            c.execute(f"SELECT destination_id, created_at FROM {table}")
+            for r in c.fetchall():
+                if r["created_at"]:
+                    self._record(r["destination_id"], event, event_time(r["created_at"]))
+        self.persist()
+
+    def persist(self):
+        """Write changed scores, normalized to the current time"""
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            decay = math.exp(-self.decay_rate * (now - self.landmark))
+            rows = [
+                (dest_id, self._scores[dest_id] * decay, now)
+                for dest_id in self._dirty if dest_id in self._scores
+            ]
+            self._dirty = set()
+
+        conn = get_db()
+        conn.executemany("""
+            INSERT INTO destination_popularity (destination_id, score, scored_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(destination_id) DO UPDATE SET
+                score = excluded.score,
+                scored_at = excluded.scored_at
+        """, rows)
+        conn.commit()
+        conn.close()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trending-persist", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.persist()
+
+    def _run(self):
+        while not self._stop.wait(settings.TRENDING_PERSIST_SECONDS):
+            try:
+                self.persist()
+            except Exception as e:
+                print(f"Trending persist error: {e}")
+
+
+trending = TrendingScores(settings.TRENDING_HALF_LIFE_HOURS, settings.TRENDING_TOP_K)
+subscribe("trending", lambda e: trending._record(e["destination_id"], e["event"], e["timestamp"]))
+subscribe("trending.remove", trending._remove)
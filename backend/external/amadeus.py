@@ -0,0 +1,88 @@
+"""
+Amadeus OAuth token management
+
+The access token is cached until shortly before expires_in runs out.
+Concurrent callers that find it missing or expired await the same
+in-flight refresh instead of each posting to the token endpoint.
+"""
+import asyncio
+import time
+from config import settings
+from external.clients import provider_clients
+
+
+class AmadeusAuthError(Exception):
+    """The token endpoint did not return an access token"""
+
+
+class AmadeusTokenManager:
+    """Caches the client-credentials token with single-flight refresh"""
+
+    def __init__(self, refresh_margin: float):
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh = None
+        self.refreshes = 0
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    async def _fetch(self) -> str:
+        client = provider_clients.get("amadeus")
+        resp = await client.post(
+            "/v1/security/oauth2/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": settings.AMADEUS_API_KEY,
+                "client_secret": settings.AMADEUS_API_SECRET
+            }
+        )
+        if resp.status_code != 200:
+            raise AmadeusAuthError(f"token request failed with {resp.status_code}")
+
+        data = resp.json()
+        token = data.get("access_token")
+        if not token:
+            raise AmadeusAuthError("token response has no access_token")
+
+        expires_in = float(data.get("expires_in", 0))
+        self._token = token
+        self._expires_at = time.monotonic() + max(0.0, expires_in - self.refresh_margin)
+        self.refreshes += 1
+        return token
+
+    async def get_token(self) -> str:
+        """Return a valid token, refreshing it at most once at a time"""
+        if self._valid():
+            return self._token
+
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._fetch())
+
+        # Shield so one cancelled caller doesn't cancel the shared refresh
+        return await asyncio.shield(self._refresh)
+
+    def invalidate(self, token: str):
+        """Drop a token the API rejected, unless it was already replaced"""
+        if self._token == token:
+            self._token = None
+            self._expires_at = 0.0
+
+
+amadeus_tokens = AmadeusTokenManager(settings.AMADEUS_TOKEN_REFRESH_MARGIN)
+
+
+async def amadeus_get(path: str, params: dict):
+    """GET an Amadeus endpoint, refreshing the token and retrying once on 401"""
+    client = provider_clients.get("amadeus")
+
+    token = await amadeus_tokens.get_token()
+    resp = await client.get(path, headers={"Authorization": f"Bearer {token}"}, params=params)
+
+    if resp.status_code == 401:
+        amadeus_tokens.invalidate(token)
+        token = await amadeus_tokens.get_token()
+        resp = await client.get(path, headers={"Authorization": f"Bearer {token}"}, params=params)
+
+    return resp
@@ -0,0 +1,181 @@
+"""
+In-process cache for external provider responses
+
+Entries are fresh for ttl seconds and then served stale for up to
+stale_ttl more while one background refresh runs. Concurrent misses for
+the same key share a single upstream call. The cache is a bounded LRU and
+can optionally be saved to and loaded from a JSON file so a restart
+starts warm.
+
+In multi-worker mode a SharedCache sits behind the LRU: fetched values are
+written to it and local misses read from it, so one worker's upstream call
+serves every worker on the host.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+class ProviderCache:
+    """TTL + stale-while-revalidate LRU with single-flight fetches"""
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_size: int, path: str = "",
+                 shared=None):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.path = path
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.evictions = 0
+        self.fetches = 0
+        self.miss_fetches = 0
+
+    def _store(self, key: str, value, fetched_at: float = None):
+        self._entries[key] = (value, fetched_at or time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _fetch_once(self, key: str, fetch) -> asyncio.Future:
+        """Start fetch() for a key unless one is already running"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        self.fetches += 1
+
+        async def run():
+            try:
+                value = await fetch()
+                self._store(key, value)
+                if self.shared is not None:
+                    # Serializing and the occasional prune stay off the event loop too
+                    await asyncio.to_thread(
+                        self.shared.put, self.name, key, value, time.time(), self.ttl + self.stale_ttl
+                    )
+                return value
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self._in_flight.pop(key, None)
+
+        task = self._in_flight[key] = asyncio.ensure_future(run())
+        return task
+
+    async def get(self, key: str, fetch):
+        """Return the cached value for key, calling fetch() on a miss
+
+        fetch is a zero-argument coroutine function. Its exceptions propagate
+        to callers waiting on a miss and are swallowed for background
+        refreshes, where the stale value has already been returned.
+        """
+        entry = self._entries.get(key)
+        if entry is None and self.shared is not None:
+            # Fetched by another worker (file I/O, so off the event loop)
+            entry = await asyncio.to_thread(self.shared.get, self.name, key)
+            if entry is not None:
+                self.shared_hits += 1
+                self._store(key, *entry)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._in_flight:
+                    self.refreshes += 1
+                    task = self._fetch_once(key, fetch)
+                    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        if key not in self._in_flight:
+            self.miss_fetches += 1
+        return await asyncio.shield(self._fetch_once(key, fetch))
+
+    async def refresh(self, key: str, fetch):
+        """Fetch a key now regardless of its age (used for prewarming)"""
+        return await self._fetch_once(key, fetch)
+
+    def age(self, key: str):
+        """Seconds since the entry was fetched, or None if it is not cached"""
+        entry = self._entries.get(key)
+        return time.time() - entry[1] if entry else None
+
+    async def invalidate(self, key: str = None):
+        """Drop one key, or everything when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.delete, self.name, key)
+
+    # ==================== PERSISTENCE ====================
+    def load(self):
+        """Load entries saved by save(), skipping ones past their stale window"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load {self.name} cache: {e}")
+            return 0
+
+        cutoff = time.time() - self.ttl - self.stale_ttl
+        for key, (value, fetched_at) in saved.items():
+            if fetched_at > cutoff:
+                self._entries[key] = (value, fetched_at)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return len(self._entries)
+
+    def save(self):
+        """Write all entries to the persistence file, if one is configured"""
+        if not self.path:
+            return
+        # Per process, since every worker saves on shutdown
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(self._entries), f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "upstream_calls": self.fetches,
+            # Prewarming and stale refreshes also call upstream, but no lookup waited on them
+            "upstream_calls_saved": max(0, lookups - self.miss_fetches),
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+        }
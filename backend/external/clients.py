@@ -0,0 +1,89 @@
+"""
+Shared HTTP clients for external providers
+
+One httpx.AsyncClient per provider is created at startup and closed on
+shutdown, so calls reuse keep-alive connections instead of paying DNS,
+TCP and TLS setup on every request. Each provider gets its own pool
+limits and timeouts. httpx is imported when the first client is built,
+so workers running on mock data never load it.
+"""
+from config import settings
+
+PROVIDERS = {
+    "openweathermap": {
+        "base_url": settings.WEATHER_API_BASE_URL,
+        "max_connections": settings.WEATHER_MAX_CONNECTIONS,
+    },
+    "amadeus": {
+        "base_url": settings.AMADEUS_API_BASE_URL,
+        "max_connections": settings.AMADEUS_MAX_CONNECTIONS,
+    },
+}
+
+
+def provider_configured(name: str) -> bool:
+    """Whether a provider has the credentials to be called at all"""
+    if name == "openweathermap":
+        return bool(settings.WEATHER_API_KEY)
+    return bool(settings.AMADEUS_API_KEY and settings.AMADEUS_API_SECRET)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ProviderClients:
+    """Registry of long-lived AsyncClients keyed by provider name"""
+
+    def __init__(self, providers: dict):
+        self.providers = providers
+        self._clients = {}
+
+    def _build(self, name: str) -> "httpx.AsyncClient":
+        import httpx
+
+        config = self.providers[name]
+        use_http2 = settings.PROVIDER_HTTP2 and http2_available()
+        if settings.PROVIDER_HTTP2 and not use_http2:
+            print(f"⚠️  HTTP/2 requested for {name} but h2 is not installed, using HTTP/1.1")
+
+        return httpx.AsyncClient(
+            base_url=config["base_url"],
+            http2=use_http2,
+            limits=httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=settings.PROVIDER_MAX_KEEPALIVE,
+                keepalive_expiry=settings.PROVIDER_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.PROVIDER_READ_TIMEOUT,
+                connect=settings.PROVIDER_CONNECT_TIMEOUT,
+            ),
+        )
+
+    def start(self):
+        """Create a client for every configured provider"""
+        for name in self.providers:
+            if name not in self._clients:
+                self._clients[name] = self._build(name)
+
+    def get(self, name: str) -> "httpx.AsyncClient":
+        """Client for a provider, created on first use if start() was not called"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._build(name)
+        return client
+
+    async def close(self):
+        """Close every client and its pooled connections"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+provider_clients = ProviderClients(PROVIDERS)
@@ -0,0 +1,270 @@
+"""
+Local stand-in for the OpenWeatherMap and Amadeus APIs
+
+Implements the endpoints the real-API branches call:
+
+    GET  /data/2.5/forecast              OpenWeatherMap 3-hourly forecast
+    POST /v1/security/oauth2/token       Amadeus client-credentials token
+    GET  /v2/shopping/flight-offers      Amadeus flight offers
+
+with configurable latency, error rate, rate limit and payload size, so
+load tests can exercise those branches offline. Run it and point the API
+at it:
+
+    python -m external.fake_provider --port 8900 --latency-ms 120 --error-rate 0.05
+    WEATHER_API_BASE_URL=http://127.0.0.1:8900 AMADEUS_API_BASE_URL=http://127.0.0.1:8900 \\
+        WEATHER_API_KEY=fake AMADEUS_API_KEY=fake AMADEUS_API_SECRET=fake uvicorn main:app
+
+GET /fake/stats returns request counters and POST /fake/config changes
+settings at runtime (e.g. to start failing mid-test).
+"""
+import argparse
+import asyncio
+import math
+import random
+import secrets
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+PROVIDERS = ("openweathermap", "amadeus")
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+CONDITIONS = ["Clear", "Clouds", "Rain", "Drizzle", "Thunderstorm", "Snow", "Mist"]
+CARRIERS = ["AF", "BA", "LH", "EK", "QR", "SQ", "AA", "DL", "UA", "KL", "TK", "AY"]
+
+
+class FakeProviderConfig:
+    """Behaviour of the fake provider; every attribute can be changed at runtime"""
+
+    def __init__(self, **overrides):
+        self.latency_ms = 50.0              # median latency
+        self.latency_distribution = "lognormal"
+        self.latency_sigma = 0.5            # lognormal shape; uniform spans +/- sigma * median
+        self.error_rate = 0.0               # share of requests answered with error_status
+        self.error_status = 503
+        self.rate_limit = 0.0               # requests per second per provider, 0 = unlimited
+        self.offers = 10                    # flight offers per search (capped by "max")
+        self.segments = 1                   # segments per itinerary
+        self.forecast_points = 40           # forecast entries (capped by "cnt")
+        self.token_ttl = 1799               # seconds
+        self.seed = None
+        for name, value in overrides.items():
+            self.set(name, value)
+
+    def set(self, name: str, value):
+        if not hasattr(self, name):
+            raise ValueError(f"Unknown setting: {name}")
+        current = getattr(self, name)
+        if current is not None and value is not None:
+            value = type(current)(value)
+        if name == "latency_distribution" and value not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of: {', '.join(LATENCY_DISTRIBUTIONS)}")
+        setattr(self, name, value)
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with a one-second burst"""
+
+    def __init__(self):
+        self.tokens = None
+        self.updated = time.monotonic()
+
+    def allow(self, rate: float) -> bool:
+        if rate <= 0:
+            return True
+        now = time.monotonic()
+        if self.tokens is None:
+            self.tokens = rate
+        self.tokens = min(rate, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def create_app(config: FakeProviderConfig = None) -> FastAPI:
+    """Build the fake provider app"""
+    config = config or FakeProviderConfig()
+    rng = random.Random(config.seed)
+    limiters = {name: RateLimiter() for name in PROVIDERS}
+    tokens = {}
+    counters = {name: {"requests": 0, "errors": 0, "rate_limited": 0, "unauthorized": 0} for name in PROVIDERS}
+
+    app = FastAPI(title="Fake provider")
+
+    def latency() -> float:
+        median = config.latency_ms / 1000
+        if config.latency_distribution == "fixed":
+            return median
+        if config.latency_distribution == "uniform":
+            spread = median * config.latency_sigma
+            return max(0.0, rng.uniform(median - spread, median + spread))
+        return rng.lognormvariate(math.log(max(median, 1e-6)), config.latency_sigma)
+
+    async def admit(provider: str):
+        """Apply latency, rate limit and injected errors; returns an error response or None"""
+        stats = counters[provider]
+        stats["requests"] += 1
+        await asyncio.sleep(latency())
+
+        if not limiters[provider].allow(config.rate_limit):
+            stats["rate_limited"] += 1
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+
+        if config.error_rate and rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=config.error_status)
+
+        return None
+
+    @app.get("/data/2.5/forecast")
+    async def forecast(lat: float, lon: float, appid: str = "", cnt: int = 40, units: str = "metric"):
+        error = await admit("openweathermap")
+        if error:
+            return error
+        if not appid:
+            counters["openweathermap"]["unauthorized"] += 1
+            return JSONResponse({"cod": 401, "message": "Invalid API key"}, status_code=401)
+
+        start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        base = 25 - abs(lat) * 0.4
+        points = []
+        for i in range(min(cnt, config.forecast_points)):
+            at = start + timedelta(hours=3 * i)
+            points.append({
+                "dt": int(at.timestamp()),
+                "dt_txt": at.strftime("%Y-%m-%d %H:%M:%S"),
+                "main": {
+                    "temp": round(base + 5 * math.sin(i * math.pi / 4) + rng.uniform(-2, 2), 1),
+                    "humidity": rng.randint(30, 95)
+                },
+                "weather": [{"main": rng.choice(CONDITIONS)}]
+            })
+
+        return {"cod": "200", "cnt": len(points), "list": points}
+
+    @app.post("/v1/security/oauth2/token")
+    async def token(request: Request):
+        error = await admit("amadeus")
+        if error:
+            return error
+
+        form = parse_qs((await request.body()).decode())
+        grant_type = form.get("grant_type", [""])[0]
+        client_id = form.get("client_id", [""])[0]
+        client_secret = form.get("client_secret", [""])[0]
+        if grant_type != "client_credentials" or not client_id or not client_secret:
+            counters["amadeus"]["unauthorized"] += 1
+            return JSONResponse({"error": "invalid_client"}, status_code=401)
+
+        now = time.monotonic()
+        for expired in [t for t, expires_at in tokens.items() if expires_at < now]:
+            del tokens[expired]
+
+        access_token = secrets.token_urlsafe(24)
+        tokens[access_token] = now + config.token_ttl
+        return {"access_token": access_token, "token_type": "Bearer", "expires_in": config.token_ttl}
+
+    @app.get("/v2/shopping/flight-offers")
+    async def flight_offers(
+        request: Request,
+        originLocationCode: str,
+        destinationLocationCode: str,
+        departureDate: str,
+        adults: int = 1,
+        travelClass: str = "ECONOMY",
+        authorization: str = Header("")
+    ):
+        error = await admit("amadeus")
+        if error:
+            return error
+
+        access_token = authorization.removeprefix("Bearer ")
+        if tokens.get(access_token, 0) < time.monotonic():
+            tokens.pop(access_token, None)
+            counters["amadeus"]["unauthorized"] += 1
+            return JSONResponse({"errors": [{"status": 401, "title": "Invalid access token"}]}, status_code=401)
+
+        count = min(int(request.query_params.get("max", config.offers)), config.offers)
+        offers = []
+        for i in range(count):
+            carrier = rng.choice(CARRIERS)
+            departure = datetime.strptime(departureDate, "%Y-%m-%d") + timedelta(hours=rng.randint(6, 22))
+            segments = []
+            for s in range(config.segments):
+                arrival = departure + timedelta(hours=rng.randint(1, 8))
+                segments.append({
+                    "carrierCode": carrier,
+                    "number": str(rng.randint(100, 9999)),
+                    "departure": {
+                        "iataCode": originLocationCode if s == 0 else "HUB",
+                        "at": departure.isoformat()
+                    },
+                    "arrival": {
+                        "iataCode": destinationLocationCode if s == config.segments - 1 else "HUB",
+                        "at": arrival.isoformat()
+                    }
+                })
+                departure = arrival + timedelta(hours=1)
+
+            hours = rng.randint(2, 16)
+            offers.append({
+                "id": str(i + 1),
+                "price": {"total": f"{rng.uniform(80, 1200) * adults:.2f}", "currency": "EUR"},
+                "itineraries": [{"duration": f"PT{hours}H{rng.choice([0, 15, 30, 45])}M", "segments": segments}],
+                "travelerPricings": [{"fareOption": "STANDARD", "travelerType": "ADULT"}] * adults
+            })
+
+        return {"meta": {"count": len(offers)}, "data": offers}
+
+    @app.get("/fake/stats")
+    def stats():
+        return {"config": config.as_dict(), "providers": counters, "active_tokens": len(tokens)}
+
+    @app.post("/fake/config")
+    async def update_config(request: Request):
+        try:
+            for name, value in (await request.json()).items():
+                config.set(name, value)
+        except (ValueError, TypeError) as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return config.as_dict()
+
+    return app
+
+
+def main():
+    defaults = FakeProviderConfig()
+    parser = argparse.ArgumentParser(description="Run the fake OpenWeatherMap/Amadeus provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency_distribution)
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--rate-limit", type=float, default=defaults.rate_limit,
+                        help="requests per second per provider (0 = unlimited)")
+    parser.add_argument("--offers", type=int, default=defaults.offers)
+    parser.add_argument("--segments", type=int, default=defaults.segments)
+    parser.add_argument("--forecast-points", type=int, default=defaults.forecast_points)
+    parser.add_argument("--token-ttl", type=int, default=defaults.token_ttl)
+    parser.add_argument("--seed", type=int, default=None)
+    args = vars(parser.parse_args())
+
+    import uvicorn
+
+    host, port = args.pop("host"), args.pop("port")
+    print(f"🧪 Fake provider at http://{host}:{port}")
+    uvicorn.run(create_app(FakeProviderConfig(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Popular-route tracking and background prewarming for the flight cache
+
+Every search records its normalized route. A background task periodically
+refreshes the most requested routes before their cache entries expire,
+with bounded concurrency, so peak traffic is answered from the cache.
+"""
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime
+
+
+def flight_cache_key(origin: str, city_code: str, date: str, adults: int, cabin: str) -> str:
+    """Normalized cache key for a flight search"""
+    return f"{origin.strip().upper()}:{(city_code or '').upper()}:{date}:{adults}:{cabin.strip().lower()}"
+
+
+class RouteTracker:
+    """Counts searches per route; counts are halved each prewarm cycle"""
+
+    def __init__(self, max_routes: int = 10000):
+        self.max_routes = max_routes
+        self._counts = Counter()
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, route: tuple):
+        with self._lock:
+            self._counts[key] += 1
+            self._routes[key] = route
+            if len(self._counts) > self.max_routes:
+                for old_key, _ in self._counts.most_common()[self.max_routes // 2:]:
+                    del self._counts[old_key]
+                    del self._routes[old_key]
+
+    def most_common(self, n: int) -> list:
+        """[(key, route, count)] for the n most requested routes"""
+        with self._lock:
+            return [(key, self._routes[key], count) for key, count in self._counts.most_common(n)]
+
+    def decay(self):
+        """Halve every count so popularity follows recent traffic"""
+        with self._lock:
+            self._counts = Counter({k: c // 2 for k, c in self._counts.items() if c > 1})
+            self._routes = {k: self._routes[k] for k in self._counts}
+
+
+class FlightPrewarmer:
+    """Refreshes popular routes in the background"""
+
+    def __init__(self, cache, tracker: RouteTracker, fetch, interval: float, top_routes: int, concurrency: int):
+        self.cache = cache
+        self.tracker = tracker
+        self.fetch = fetch
+        self.interval = interval
+        self.top_routes = top_routes
+        self.concurrency = concurrency
+        self._task = None
+        self.routes_refreshed = 0
+        self.refresh_errors = 0
+
+    def _due(self, key: str) -> bool:
+        """Refresh when missing or within the last 20% of the TTL"""
+        age = self.cache.age(key)
+        return age is None or age > self.cache.ttl * 0.8
+
+    async def _refresh(self, semaphore, key, route):
+        async with semaphore:
+            try:
+                await self.cache.refresh(key, lambda: self.fetch(*route))
+                self.routes_refreshed += 1
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"Flight prewarm error for {key}: {e}")
+
+    async def run_once(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        jobs = [
+            self._refresh(semaphore, key, route)
+            for key, route, _ in self.tracker.most_common(self.top_routes)
+            if route[2] >= today and self._due(key)
+        ]
+        await asyncio.gather(*jobs)
+        self.tracker.decay()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Flight prewarm error: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "routes_refreshed": self.routes_refreshed,
+            "refresh_errors": self.refresh_errors,
+            "top_routes": [
+                {"route": key, "requests": count}
+                for key, _, count in self.tracker.most_common(self.top_routes)
+            ]
+        }
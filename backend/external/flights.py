@@ -2,11 +2,20 @@
 Flight search API with enhanced mock data
 """
 from fastapi import APIRouter, HTTPException
-import httpx
-import random
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+import numpy as np
 from datetime import datetime, timedelta
 from database import get_db
 from config import settings
+from shared_cache import shared_cache
+from external.amadeus import amadeus_get
+from external.cache import ProviderCache
+from external.resilience import Deadline, fallback_reason, provider_guards
+from external.flight_cache import FlightPrewarmer, RouteTracker, flight_cache_key
+from external.seeding import rng_for
 
 router = APIRouter(prefix="/flights", tags=["Flights"])
 
@@ -26,57 +35,178 @@ AIRLINES = [
     {"code": "AY", "name": "Finnair"},
 ]
 
+CABINS = ["Economy", "Premium Economy", "Business"]
+CABIN_WEIGHTS = [0.6, 0.2, 0.2]
+
 def generate_mock_flights(origin, destination, date, base_price, num_flights=6):
-    """Generate realistic mock flight data"""
-    flights = []
+    """Generate realistic mock flight data (same query, same flights)"""
+    rng = rng_for("flights", origin, destination, date, base_price, num_flights)
+    n = num_flights
     
-    for i in range(num_flights):
-        airline = random.choice(AIRLINES)
-        
-        # Generate departure and arrival times
-        dep_hour = random.randint(6, 22)
-        dep_min = random.choice([0, 15, 30, 45])
-        departure = f"{dep_hour:02d}:{dep_min:02d}"
-        
-        # Flight duration (5-15 hours based on distance)
-        duration_hours = random.randint(5, 15)
-        duration_mins = random.choice([0, 15, 30, 45])
-        duration = f"{duration_hours}h {duration_mins}m"
-        
-        # Calculate arrival time
-        arr_hour = (dep_hour + duration_hours) % 24
-        arr_min = (dep_min + duration_mins) % 60
-        arrival = f"{arr_hour:02d}:{arr_min:02d}"
-        
-        # Price variation
-        price_factor = 1.0 + (i * 0.15) + random.uniform(-0.1, 0.1)
-        price = round(base_price * price_factor, 2)
-        
-        # Stops
-        stops = 0 if i < 2 else (1 if i < 4 else 2)
-        
-        # Cabin class
-        cabin = random.choice(["Economy", "Economy", "Economy", "Premium Economy", "Business"])
-        
+    airline_idx = rng.integers(0, len(AIRLINES), n)
+    
+    # Generate departure and arrival times
+    dep_hour = rng.integers(6, 23, n)
+    dep_min = rng.choice([0, 15, 30, 45], n)
+    
+    # Flight duration (5-15 hours based on distance)
+    duration_hours = rng.integers(5, 16, n)
+    duration_mins = rng.choice([0, 15, 30, 45], n)
+    
+    # Calculate arrival time
+    arr_hour = (dep_hour + duration_hours) % 24
+    arr_min = (dep_min + duration_mins) % 60
+    
+    # Price variation
+    price_factor = 1.0 + np.arange(n) * 0.15 + rng.uniform(-0.1, 0.1, n)
+    prices = np.round(base_price * price_factor, 2)
+    
+    # Stops
+    stops = np.where(np.arange(n) < 2, 0, np.where(np.arange(n) < 4, 1, 2))
+    
+    # Cabin class
+    cabin_idx = rng.choice(len(CABINS), n, p=CABIN_WEIGHTS)
+    seats = rng.integers(1, 13, n)
+    baggage = rng.random(n) < 2 / 3
+    
+    # Sort by price, then convert to plain lists before building dicts
+    order = np.argsort(prices, kind="stable")
+    (airline_idx, dep_hour, dep_min, arr_hour, arr_min, duration_hours,
+     duration_mins, prices, stops, cabin_idx, seats, baggage) = (
+        a[order].tolist() for a in (
+            airline_idx, dep_hour, dep_min, arr_hour, arr_min, duration_hours,
+            duration_mins, prices, stops, cabin_idx, seats, baggage
+        )
+    )
+    
+    flights = []
+    for i in range(n):
+        airline = AIRLINES[airline_idx[i]]
         flights.append({
             "airline_code": airline["code"],
             "airline": airline["name"],
-            "price": price,
+            "price": prices[i],
             "currency": "USD",
-            "departure": departure,
-            "arrival": arrival,
-            "duration": duration,
-            "stops": stops,
-            "cabin": cabin,
-            "seats_available": random.randint(1, 12),
-            "baggage_included": random.choice([True, True, False])
+            "departure": f"{dep_hour[i]:02d}:{dep_min[i]:02d}",
+            "arrival": f"{arr_hour[i]:02d}:{arr_min[i]:02d}",
+            "duration": f"{duration_hours[i]}h {duration_mins[i]}m",
+            "stops": stops[i],
+            "cabin": CABINS[cabin_idx[i]],
+            "seats_available": seats[i],
+            "baggage_included": baggage[i]
         })
     
-    # Sort by price
-    flights.sort(key=lambda x: x["price"])
+    return flights
+
+async def fetch_amadeus_offers(origin, city_code, date, adults, cabin):
+    """Search Amadeus flight offers through the provider guard"""
+    return await provider_guards["amadeus"].call(
+        lambda: _fetch_amadeus_offers(origin, city_code, date, adults, cabin)
+    )
+
+async def _fetch_amadeus_offers(origin, city_code, date, adults, cabin):
+    """Search Amadeus flight offers and map them to our flight format"""
+    # Token is cached and refreshed by the token manager
+    search_resp = await amadeus_get(
+        "/v2/shopping/flight-offers",
+        params={
+            "originLocationCode": origin.upper(),
+            "destinationLocationCode": city_code,
+            "departureDate": date,
+            "adults": adults,
+            "max": 10,
+            "travelClass": cabin.upper()
+        }
+    )
+    search_resp.raise_for_status()
+    data = search_resp.json()
+    flights = []
+    
+    for offer in data.get("data", []):
+        seg = offer["itineraries"][0]["segments"][0]
+        flights.append({
+            "airline_code": seg["carrierCode"],
+            "airline": seg.get("carrierName", seg["carrierCode"]),
+            "price": float(offer["price"]["total"]),
+            "currency": offer["price"]["currency"],
+            "departure": seg["departure"]["at"],
+            "arrival": seg["arrival"]["at"],
+            "duration": offer["itineraries"][0]["duration"],
+            "stops": len(offer["itineraries"][0]["segments"]) - 1
+        })
     
     return flights
 
+flight_cache = ProviderCache(
+    "flights",
+    ttl=settings.FLIGHT_CACHE_TTL,
+    stale_ttl=settings.FLIGHT_CACHE_STALE_TTL,
+    max_size=settings.FLIGHT_CACHE_MAX_ENTRIES,
+    shared=shared_cache
+)
+route_tracker = RouteTracker()
+flight_prewarmer = FlightPrewarmer(
+    flight_cache,
+    route_tracker,
+    fetch_amadeus_offers,
+    interval=settings.FLIGHT_PREWARM_INTERVAL,
+    top_routes=settings.FLIGHT_PREWARM_TOP_ROUTES,
+    concurrency=settings.FLIGHT_PREWARM_CONCURRENCY
+)
+
+# Shared across requests so explore fan-outs can't flood the provider client
+explore_slots = asyncio.Semaphore(settings.FLIGHT_EXPLORE_CONCURRENCY)
+
+def validate_flight_date(date: str):
+    """Reject malformed or past dates"""
+    try:
+        flight_date = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    if flight_date < datetime.now():
+        raise HTTPException(
+            status_code=400,
+            detail="Flight date must be in the future"
+        )
+
+async def _bounded_fetch(route):
+    async with explore_slots:
+        return await fetch_amadeus_offers(*route)
+
+async def find_flights(origin, dest, date, adults, cabin, bounded=False):
+    """Flights for one destination: cached Amadeus offers, else mock data
+    
+    Returns (flights, source). With bounded=True upstream calls wait for a
+    slot in explore_slots; cache hits never do.
+    """
+    # Try Amadeus API if credentials available (cached per normalized query)
+    if settings.AMADEUS_API_KEY and settings.AMADEUS_API_SECRET:
+        route = (origin.strip().upper(), dest["city_code"], date, adults, cabin.strip().lower())
+        key = flight_cache_key(*route)
+        route_tracker.record(key, route)
+        fetch = (lambda: _bounded_fetch(route)) if bounded else (lambda: fetch_amadeus_offers(*route))
+        deadline = Deadline(settings.FLIGHTS_DEADLINE_SECONDS)
+        try:
+            flights = await deadline.run(flight_cache.get(key, fetch))
+            if flights:
+                return flights, "amadeus"
+        except Exception as e:
+            provider_guards["amadeus"].record_fallback(fallback_reason(e))
+            print(f"Amadeus API error: {e!r}")
+            # Fall through to mock data
+    
+    # Generate enhanced mock flight data
+    flights = generate_mock_flights(
+        origin.upper(),
+        dest["name"],
+        date,
+        dest["flight_cost_estimate"] * adults
+    )
+    return flights, "mock"
+
 @router.get("/search")
 async def search_flights(
     origin: str,
@@ -90,7 +220,7 @@ async def search_flights(
     c = conn.cursor()
     
     c.execute(
-        "SELECT city_code, name, flight_cost_estimate FROM destinations WHERE id = ?",
+        "SELECT city_code, name, flight_cost_estimate FROM destinations WHERE id = ? AND deleted_at IS NULL",
         (destination_id,)
     )
     dest = c.fetchone()
@@ -100,90 +230,18 @@ async def search_flights(
         raise HTTPException(status_code=404, detail="Destination not found")
     
     dest = dict(dest)
+    validate_flight_date(date)
     
-    # Validate date
-    try:
-        flight_date = datetime.strptime(date, "%Y-%m-%d")
-        if flight_date < datetime.now():
-            raise HTTPException(
-                status_code=400,
-                detail="Flight date must be in the future"
-            )
-    except ValueError:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid date format. Use YYYY-MM-DD"
-        )
+    flights, source = await find_flights(origin, dest, date, adults, cabin)
     
-    # Try Amadeus API if credentials available
-    if settings.AMADEUS_API_KEY and settings.AMADEUS_API_SECRET:
-        try:
-            async with httpx.AsyncClient() as client:
-                # Get access token
-                auth_resp = await client.post(
-                    "https://api.amadeus.com/v1/security/oauth2/token",
-                    data={
-                        "grant_type": "client_credentials",
-                        "client_id": settings.AMADEUS_API_KEY,
-                        "client_secret": settings.AMADEUS_API_SECRET
-                    },
-                    timeout=10.0
-                )
-                
-                if auth_resp.status_code == 200:
-                    token = auth_resp.json().get("access_token")
-                    
-                    # Search flights
-                    search_resp = await client.get(
-                        "https://api.amadeus.com/v2/shopping/flight-offers",
-                        headers={"Authorization": f"Bearer {token}"},
-                        params={
-                            "originLocationCode": origin.upper(),
-                            "destinationLocationCode": dest["city_code"],
-                            "departureDate": date,
-                            "adults": adults,
-                            "max": 10,
-                            "travelClass": cabin.upper()
-                        },
-                        timeout=10.0
-                    )
-                    
-                    if search_resp.status_code == 200:
-                        data = search_resp.json()
-                        flights = []
-                        
-                        for offer in data.get("data", []):
-                            seg = offer["itineraries"][0]["segments"][0]
-                            flights.append({
-                                "airline_code": seg["carrierCode"],
-                                "airline": seg.get("carrierName", seg["carrierCode"]),
-                                "price": float(offer["price"]["total"]),
-                                "currency": offer["price"]["currency"],
-                                "departure": seg["departure"]["at"],
-                                "arrival": seg["arrival"]["at"],
-                                "duration": offer["itineraries"][0]["duration"],
-                                "stops": len(offer["itineraries"][0]["segments"]) - 1
-                            })
-                        
-                        if flights:
-                            return {
-                                "origin": origin.upper(),
-                                "destination": dest["name"],
-                                "date": date,
-                                "flights": flights,
-                                "source": "amadeus"
-                            }
-        except Exception as e:
-            print(f"Amadeus API error: {e}")
-            # Fall through to mock data
-    
-    # Generate enhanced mock flight data
-    flights = generate_mock_flights(
-        origin.upper(),
-        dest["name"],
-        date,
-        dest["flight_cost_estimate"] * adults
-    )
+    if source == "amadeus":
+        return {
+            "origin": origin.upper(),
+            "destination": dest["name"],
+            "date": date,
+            "flights": flights,
+            "source": "amadeus"
+        }
     
     return {
         "origin": origin.upper(),
@@ -195,6 +253,98 @@ async def search_flights(
         "source": "mock"
     }
 
+@router.get("/explore")
+async def explore_flights(
+    origin: str,
+    date: str,
+    destination_ids: Optional[str] = None,
+    category: Optional[str] = None,
+    adults: int = 1,
+    cabin: str = "economy",
+    limit: int = 10
+):
+    """Cheapest flights from an origin across many destinations
+    
+    Searches run concurrently and stream back as NDJSON: one "offer" line
+    per destination as soon as it is ready, then a final "ranked" line with
+    the cheapest destinations in price order. Without destination_ids the
+    top-rated destinations (optionally of one category) are searched.
+    """
+    validate_flight_date(date)
+    max_destinations = settings.FLIGHT_EXPLORE_MAX_DESTINATIONS
+    
+    conn = get_db()
+    c = conn.cursor()
+    
+    if destination_ids:
+        try:
+            ids = [int(i) for i in destination_ids.split(",") if i.strip()][:max_destinations]
+        except ValueError:
+            conn.close()
+            raise HTTPException(status_code=400, detail="destination_ids must be comma-separated integers")
+        c.execute(
+            f"""SELECT id, city_code, name, country, flight_cost_estimate FROM destinations
+                WHERE id IN ({', '.join('?' * len(ids))}) AND deleted_at IS NULL""",
+            ids
+        )
+    elif category:
+        c.execute(
+            """SELECT id, city_code, name, country, flight_cost_estimate FROM destinations
+               WHERE category = ? AND deleted_at IS NULL ORDER BY rating DESC, id LIMIT ?""",
+            (category, max_destinations)
+        )
+    else:
+        c.execute(
+            """SELECT id, city_code, name, country, flight_cost_estimate FROM destinations
+               WHERE deleted_at IS NULL ORDER BY rating DESC, id LIMIT ?""",
+            (max_destinations,)
+        )
+    
+    destinations = [dict(r) for r in c.fetchall()]
+    conn.close()
+    
+    if not destinations:
+        raise HTTPException(status_code=404, detail="No destinations to search")
+    
+    async def search(dest):
+        flights, source = await find_flights(origin, dest, date, adults, cabin, bounded=True)
+        cheapest = min(flights, key=lambda f: f["price"]) if flights else None
+        return {
+            "destination_id": dest["id"],
+            "destination": dest["name"],
+            "country": dest["country"],
+            "destination_code": dest["city_code"],
+            "cheapest": cheapest,
+            "offers": len(flights),
+            "source": source
+        }
+    
+    async def stream():
+        tasks = [asyncio.ensure_future(search(dest)) for dest in destinations]
+        results = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                results.append(result)
+                yield json.dumps({"type": "offer", **result}) + "\n"
+        finally:
+            # Client went away: stop searches that haven't finished
+            for task in tasks:
+                task.cancel()
+        
+        ranked = sorted(
+            (r for r in results if r["cheapest"]),
+            key=lambda r: r["cheapest"]["price"]
+        )
+        yield json.dumps({
+            "type": "ranked",
+            "origin": origin.upper(),
+            "date": date,
+            "results": ranked[:max(1, limit)]
+        }) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.get("/airlines")
 def get_airlines():
     """Get list of available airlines"""
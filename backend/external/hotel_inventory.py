@@ -0,0 +1,138 @@
+"""
+Hotel inventory bulk loader
+
+Hotels are generated once per destination with the seeded mock generator
+and stored in the hotels table, with one hotel_rooms row per room type.
+Startup fills in any destination that has no hotels yet; the CLI loads
+large inventories for load testing:
+
+    python -m external.hotel_inventory --per-destination 40000
+"""
+import argparse
+import json
+import time
+from database import get_db, init_db
+from external.hotels import generate_mock_hotels
+
+DESCRIPTIONS = {
+    5: "Experience luxury and comfort in the heart of {city}.",
+    4: "Modern comfort with full-service amenities in {city}.",
+    3: "Comfortable, well-located rooms for exploring {city}.",
+    2: "Simple, friendly stay for travellers on a budget in {city}.",
+}
+
+# (room type, size in sqm, beds, view, max guests, rate relative to the hotel's base price)
+ROOM_TYPES = [
+    ("Standard Room", 25, "1 King or 2 Twin", None, 2, 1.0),
+    ("Deluxe Room", 35, "1 King", "City View", 3, 1.4),
+    ("Suite", 55, "1 King + Sofa", "Panoramic", 4, 2.2),
+]
+
+BATCH_SIZE = 50000
+
+
+def _hotel_rows(destination_id, destination_name, hotels):
+    for hotel in hotels:
+        yield (
+            destination_id,
+            hotel["name"],
+            hotel["stars"],
+            hotel["price_per_night"],
+            hotel["rating"],
+            hotel["reviews"],
+            json.dumps(hotel["amenities"]),
+            hotel["image"],
+            hotel["distance_from_center"],
+            int(hotel["breakfast_included"]),
+            int(hotel["free_cancellation"]),
+            DESCRIPTIONS[hotel["stars"]].format(city=destination_name)
+        )
+
+
+def load_hotels(cursor, destination, per_destination=8) -> int:
+    """Insert generated hotels and their rooms for one destination row
+
+    Hotel base price is 60% of the destination's average daily cost.
+    Returns the number of hotels inserted; the caller commits. Destinations
+    without a daily cost get no hotels until one is set.
+    """
+    if not destination["avg_daily_cost"]:
+        return 0
+
+    hotels = generate_mock_hotels(
+        destination["name"],
+        destination["avg_daily_cost"] * 0.6,
+        num_hotels=per_destination
+    )
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM hotels")
+    last_id = cursor.fetchone()[0]
+
+    for start in range(0, len(hotels), BATCH_SIZE):
+        cursor.executemany("""
+            INSERT INTO hotels
+            (destination_id, name, stars, price_per_night, rating, reviews, amenities,
+             image, distance_from_center, breakfast_included, free_cancellation, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, _hotel_rows(destination["id"], destination["name"], hotels[start:start + BATCH_SIZE]))
+
+    # Rooms are derived from the hotel rows in one statement per room type
+    for room_type, size, beds, view, max_guests, factor in ROOM_TYPES:
+        cursor.execute("""
+            INSERT INTO hotel_rooms
+            (hotel_id, room_type, size_sqm, beds, view, max_guests, nightly_rate)
+            SELECT id, ?, ?, ?, ?, ?, ROUND(price_per_night * ?, 2)
+            FROM hotels
+            WHERE id > ?
+        """, (room_type, size, beds, view, max_guests, factor, last_id))
+
+    return len(hotels)
+
+
+def ensure_hotel_inventory(conn, per_destination=8) -> int:
+    """Load hotels for every destination that has none yet"""
+    c = conn.cursor()
+    c.execute("""
+        SELECT id, name, avg_daily_cost FROM destinations d
+        WHERE avg_daily_cost > 0 AND deleted_at IS NULL
+          AND NOT EXISTS (SELECT 1 FROM hotels h WHERE h.destination_id = d.id)
+    """)
+    missing = [dict(r) for r in c.fetchall()]
+
+    loaded = sum(load_hotels(c, dest, per_destination) for dest in missing)
+    conn.commit()
+    return loaded
+
+
+def reload_hotel_inventory(per_destination: int) -> int:
+    """Replace all hotels with per_destination generated hotels per destination"""
+    init_db()
+    conn = get_db()
+    c = conn.cursor()
+
+    c.execute("BEGIN IMMEDIATE")
+    c.execute("DELETE FROM hotel_rooms")
+    c.execute("DELETE FROM hotels")
+    c.execute("SELECT id, name, avg_daily_cost FROM destinations WHERE deleted_at IS NULL")
+    destinations = [dict(r) for r in c.fetchall()]
+
+    loaded = sum(load_hotels(c, dest, per_destination) for dest in destinations)
+    conn.commit()
+    c.execute("ANALYZE hotels")
+    conn.close()
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reload the hotel inventory")
+    parser.add_argument("--per-destination", type=int, default=8,
+                        help="hotels to generate per destination")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    loaded = reload_hotel_inventory(args.per_destination)
+    print(f"✅ Loaded {loaded} hotels in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
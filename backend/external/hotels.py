@@ -1,10 +1,14 @@
 """
-Hotel search API with enhanced mock data
+Hotel search API over the hotel inventory
 """
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
-import random
+from typing import Optional
+import json
+import numpy as np
 from database import get_db
+from external.seeding import rng_for, shuffled_rows
+from pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/hotels", tags=["Hotels"])
 
@@ -56,79 +60,166 @@ HOTEL_IMAGES = [
     "https://images.unsplash.com/photo-1582719508461-905c673771fd?w=300",
 ]
 
-def generate_mock_hotels(destination_name, base_price, num_hotels=8):
-    """Generate realistic mock hotel data"""
+# Star tiers: (stars, template group, share of 8 hotels, price factor range,
+# rating range, review count range, amenity count range (None = all),
+# distance range, breakfast probability, free cancellation probability)
+HOTEL_TIERS = [
+    (5, "luxury", 2, (2.5, 3.5), (4.5, 5.0), (800, 2000), (5, 8), (0.5, 3.0), 0.5, 1.0),
+    (4, "upscale", 2, (1.5, 2.2), (4.0, 4.7), (400, 1200), (4, 6), (1.0, 5.0), 2 / 3, 0.5),
+    (3, "midrange", 3, (0.8, 1.3), (3.5, 4.3), (200, 600), (3, 5), (2.0, 8.0), 1.0, 0.0),
+    (2, "budget", 1, (0.3, 0.6), (3.5, 4.0), (100, 400), None, (3.0, 10.0), 1.0, 0.0),
+]
+
+def tier_counts(num_hotels):
+    """Split num_hotels across tiers in the 2/2/3/1 proportions"""
+    counts = [num_hotels * share // 8 for _, _, share, *_ in HOTEL_TIERS]
+    counts[2] += num_hotels - sum(counts)
+    return counts
+
+def generate_mock_hotels(destination_name, base_price, num_hotels=8, min_stars=0, max_price=None):
+    """Generate realistic mock hotel data (same query, same hotels)
+    
+    Each tier has its own seed, so filtering by stars or price returns a
+    subset of the unfiltered results, and filtered-out hotels are never
+    turned into dicts.
+    """
     hotels = []
     
-    # 5-star luxury
-    for _ in range(2):
-        template = random.choice(HOTEL_TEMPLATES["luxury"])
-        hotels.append({
-            "name": template.format(city=destination_name),
-            "stars": 5,
-            "price_per_night": round(base_price * random.uniform(2.5, 3.5), 2),
-            "rating": round(random.uniform(4.5, 5.0), 1),
-            "reviews": random.randint(800, 2000),
-            "amenities": random.sample(AMENITIES[5], k=random.randint(5, 8)),
-            "image": random.choice(HOTEL_IMAGES),
-            "distance_from_center": round(random.uniform(0.5, 3.0), 1),
-            "breakfast_included": random.choice([True, False]),
-            "free_cancellation": True
-        })
-    
-    # 4-star upscale
-    for _ in range(2):
-        template = random.choice(HOTEL_TEMPLATES["upscale"])
-        hotels.append({
-            "name": template.format(city=destination_name),
-            "stars": 4,
-            "price_per_night": round(base_price * random.uniform(1.5, 2.2), 2),
-            "rating": round(random.uniform(4.0, 4.7), 1),
-            "reviews": random.randint(400, 1200),
-            "amenities": random.sample(AMENITIES[4], k=random.randint(4, 6)),
-            "image": random.choice(HOTEL_IMAGES),
-            "distance_from_center": round(random.uniform(1.0, 5.0), 1),
-            "breakfast_included": random.choice([True, True, False]),
-            "free_cancellation": random.choice([True, False])
-        })
-    
-    # 3-star midrange
-    for _ in range(3):
-        template = random.choice(HOTEL_TEMPLATES["midrange"])
-        hotels.append({
-            "name": template.format(city=destination_name),
-            "stars": 3,
-            "price_per_night": round(base_price * random.uniform(0.8, 1.3), 2),
-            "rating": round(random.uniform(3.5, 4.3), 1),
-            "reviews": random.randint(200, 600),
-            "amenities": random.sample(AMENITIES[3], k=random.randint(3, 5)),
-            "image": random.choice(HOTEL_IMAGES),
-            "distance_from_center": round(random.uniform(2.0, 8.0), 1),
-            "breakfast_included": True,
-            "free_cancellation": False
-        })
-    
-    # 2-star budget
-    for _ in range(1):
-        template = random.choice(HOTEL_TEMPLATES["budget"])
-        hotels.append({
-            "name": template.format(city=destination_name),
-            "stars": 2,
-            "price_per_night": round(base_price * random.uniform(0.3, 0.6), 2),
-            "rating": round(random.uniform(3.5, 4.0), 1),
-            "reviews": random.randint(100, 400),
-            "amenities": AMENITIES[2],
-            "image": random.choice(HOTEL_IMAGES),
-            "distance_from_center": round(random.uniform(3.0, 10.0), 1),
-            "breakfast_included": True,
-            "free_cancellation": False
-        })
+    for tier, count in zip(HOTEL_TIERS, tier_counts(num_hotels)):
+        (stars, group, _, price_range, rating_range, review_range,
+         amenity_range, distance_range, breakfast_p, cancel_p) = tier
+        if count == 0 or stars < min_stars:
+            continue
+        
+        rng = rng_for("hotels", destination_name, base_price, num_hotels, stars)
+        templates = HOTEL_TEMPLATES[group]
+        amenities = AMENITIES[stars]
+        
+        prices = np.round(base_price * rng.uniform(*price_range, count), 2)
+        template_idx = rng.integers(0, len(templates), count)
+        ratings = np.round(rng.uniform(*rating_range, count), 1)
+        reviews = rng.integers(review_range[0], review_range[1] + 1, count)
+        image_idx = rng.integers(0, len(HOTEL_IMAGES), count)
+        distances = np.round(rng.uniform(*distance_range, count), 1)
+        breakfast = rng.random(count) < breakfast_p
+        free_cancellation = rng.random(count) < cancel_p
+        
+        if amenity_range:
+            amenity_counts = rng.integers(amenity_range[0], amenity_range[1] + 1, count)
+            amenity_order = shuffled_rows(rng, count, len(amenities))
+        
+        keep = np.ones(count, dtype=bool)
+        if max_price:
+            keep &= prices <= max_price
+        
+        for i in np.flatnonzero(keep).tolist():
+            if amenity_range:
+                hotel_amenities = [amenities[j] for j in amenity_order[i, :amenity_counts[i]].tolist()]
+            else:
+                hotel_amenities = list(amenities)
+            hotels.append({
+                "name": templates[template_idx[i]].format(city=destination_name),
+                "stars": stars,
+                "price_per_night": float(prices[i]),
+                "rating": float(ratings[i]),
+                "reviews": int(reviews[i]),
+                "amenities": hotel_amenities,
+                "image": HOTEL_IMAGES[image_idx[i]],
+                "distance_from_center": float(distances[i]),
+                "breakfast_included": bool(breakfast[i]),
+                "free_cancellation": bool(free_cancellation[i])
+            })
     
     # Sort by price
     hotels.sort(key=lambda x: x["price_per_night"], reverse=True)
     
     return hotels
 
+# Keyset columns and direction per sort order, each backed by an index on hotels
+HOTEL_SORTS = {
+    "price_high": (("price_per_night", "id"), "DESC"),
+    "price_low": (("price_per_night", "id"), "ASC"),
+    "distance": (("distance_from_center", "id"), "ASC"),
+}
+
+HOTEL_COLUMNS = """
+    id, name, stars, price_per_night, rating, reviews, amenities, image,
+    distance_from_center, breakfast_included, free_cancellation
+"""
+
+def hotel_from_row(row) -> dict:
+    """API shape for a hotels row"""
+    hotel = dict(row)
+    hotel["amenities"] = json.loads(hotel["amenities"] or "[]")
+    hotel["breakfast_included"] = bool(hotel["breakfast_included"])
+    hotel["free_cancellation"] = bool(hotel["free_cancellation"])
+    return hotel
+
+def query_hotels(
+    c,
+    destination_id,
+    guests=2,
+    min_stars=0,
+    max_stars=5,
+    min_price=None,
+    max_price=None,
+    max_distance=None,
+    sort="price_high",
+    limit=20,
+    cursor=None
+):
+    """One keyset page of hotels matching the filters, as (hotels, next_cursor)"""
+    limit = max(1, min(limit, 100))
+    columns, direction = HOTEL_SORTS[sort]
+    
+    conditions = ["destination_id = ?"]
+    params = [destination_id]
+    if min_stars > 0:
+        conditions.append("stars >= ?")
+        params.append(min_stars)
+    if max_stars < 5:
+        conditions.append("stars <= ?")
+        params.append(max_stars)
+    if min_price is not None:
+        conditions.append("price_per_night >= ?")
+        params.append(min_price)
+    if max_price:
+        conditions.append("price_per_night <= ?")
+        params.append(max_price)
+    if max_distance is not None:
+        conditions.append("distance_from_center <= ?")
+        params.append(max_distance)
+    if guests > 2:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM hotel_rooms r WHERE r.hotel_id = hotels.id AND r.max_guests >= ?)"
+        )
+        params.append(guests)
+    if cursor:
+        conditions.append("({}) {} ({})".format(
+            ", ".join(columns),
+            "<" if direction == "DESC" else ">",
+            ", ".join("?" * len(columns))
+        ))
+        params.extend(decode_cursor(cursor, len(columns)))
+    params.append(limit + 1)
+    
+    c.execute(f"""
+        SELECT {HOTEL_COLUMNS}
+        FROM hotels
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {', '.join(f'{col} {direction}' for col in columns)}
+        LIMIT ?
+    """, params)
+    
+    hotels = [hotel_from_row(r) for r in c.fetchall()]
+    
+    next_cursor = None
+    if len(hotels) > limit:
+        hotels = hotels[:limit]
+        next_cursor = encode_cursor(hotels[-1][col] for col in columns)
+    
+    return hotels, next_cursor
+
 @router.get("/search")
 def search_hotels(
     destination_id: int,
@@ -136,61 +227,69 @@ def search_hotels(
     checkout: str,
     guests: int = 2,
     min_stars: int = 0,
-    max_price: float = None
+    max_stars: int = 5,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    max_distance: Optional[float] = None,
+    sort: str = "price_high",
+    limit: int = 20,
+    cursor: Optional[str] = None
 ):
-    """Search for hotels at a destination"""
-    conn = get_db()
-    c = conn.cursor()
-    
-    c.execute(
-        "SELECT name, avg_daily_cost FROM destinations WHERE id = ?",
-        (destination_id,)
-    )
-    dest = c.fetchone()
-    conn.close()
-    
-    if not dest:
-        raise HTTPException(status_code=404, detail="Destination not found")
-    
-    dest = dict(dest)
+    """Search hotels at a destination, one keyset page at a time"""
+    if sort not in HOTEL_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort. Must be one of: {', '.join(HOTEL_SORTS)}"
+        )
     
     # Validate dates
     try:
         checkin_date = datetime.strptime(checkin, "%Y-%m-%d")
         checkout_date = datetime.strptime(checkout, "%Y-%m-%d")
-        
-        if checkin_date < datetime.now():
-            raise HTTPException(
-                status_code=400,
-                detail="Check-in date must be in the future"
-            )
-        
-        if checkout_date <= checkin_date:
-            raise HTTPException(
-                status_code=400,
-                detail="Check-out must be after check-in"
-            )
-        
-        nights = (checkout_date - checkin_date).days
-        
     except ValueError:
         raise HTTPException(
             status_code=400,
             detail="Invalid date format. Use YYYY-MM-DD"
         )
     
-    # Calculate base hotel price (60% of daily cost)
-    base_price = dest["avg_daily_cost"] * 0.6
+    if checkin_date < datetime.now():
+        raise HTTPException(
+            status_code=400,
+            detail="Check-in date must be in the future"
+        )
     
-    # Generate mock hotels
-    hotels = generate_mock_hotels(dest["name"], base_price)
+    if checkout_date <= checkin_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Check-out must be after check-in"
+        )
     
-    # Apply filters
-    if min_stars > 0:
-        hotels = [h for h in hotels if h["stars"] >= min_stars]
+    nights = (checkout_date - checkin_date).days
     
-    if max_price:
-        hotels = [h for h in hotels if h["price_per_night"] <= max_price]
+    conn = get_db()
+    c = conn.cursor()
+    
+    c.execute("SELECT name FROM destinations WHERE id = ? AND deleted_at IS NULL", (destination_id,))
+    dest = c.fetchone()
+    
+    if not dest:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Destination not found")
+    
+    hotels, next_cursor = query_hotels(
+        c,
+        destination_id,
+        guests=guests,
+        min_stars=min_stars,
+        max_stars=max_stars,
+        min_price=min_price,
+        max_price=max_price,
+        max_distance=max_distance,
+        sort=sort,
+        limit=limit,
+        cursor=cursor
+    )
+    conn.close()
     
     # Calculate total costs
     for hotel in hotels:
@@ -203,28 +302,52 @@ def search_hotels(
         "nights": nights,
         "guests": guests,
         "hotels": hotels,
-        "source": "mock"
+        "next_cursor": next_cursor,
+        "source": "inventory"
     }
 
 @router.get("/{hotel_id}/details")
-def get_hotel_details(hotel_id: str):
-    """Get detailed information about a specific hotel (mock)"""
+def get_hotel_details(hotel_id: int):
+    """Get detailed information about a specific hotel"""
+    conn = get_db()
+    c = conn.cursor()
+    
+    c.execute(
+        f"SELECT {HOTEL_COLUMNS}, destination_id, description FROM hotels WHERE id = ?",
+        (hotel_id,)
+    )
+    row = c.fetchone()
+    
+    if not row:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Hotel not found")
+    
+    c.execute("""
+        SELECT room_type, size_sqm, beds, view, max_guests, nightly_rate
+        FROM hotel_rooms
+        WHERE hotel_id = ?
+        ORDER BY nightly_rate
+    """, (hotel_id,))
+    rooms = [dict(r) for r in c.fetchall()]
+    conn.close()
+    
+    hotel = hotel_from_row(row)
+    distance = hotel["distance_from_center"]
+    
     return {
-        "id": hotel_id,
-        "description": "Experience luxury and comfort in the heart of the city.",
-        "rooms": [
-            {"type": "Standard Room", "size": "25 sqm", "beds": "1 King or 2 Twin"},
-            {"type": "Deluxe Room", "size": "35 sqm", "beds": "1 King", "view": "City View"},
-            {"type": "Suite", "size": "55 sqm", "beds": "1 King + Sofa", "view": "Panoramic"}
-        ],
+        **hotel,
+        "rooms": rooms,
         "policies": {
             "check_in": "15:00",
             "check_out": "11:00",
-            "cancellation": "Free cancellation up to 24 hours before check-in"
+            "cancellation": (
+                "Free cancellation up to 24 hours before check-in"
+                if hotel["free_cancellation"] else "Non-refundable"
+            )
         },
         "nearby_attractions": [
-            "City Center - 2 km",
+            f"City Center - {distance} km",
             "Museum - 1.5 km",
             "Beach - 5 km"
         ]
-    }
\ No newline at end of file
+    }
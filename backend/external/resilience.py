@@ -0,0 +1,266 @@
+"""
+Resilience layer for external provider calls
+
+Each provider has a ProviderGuard combining:
+- a circuit breaker that opens when the recent error rate crosses a
+  threshold and fails fast until a half-open probe succeeds
+- optional hedged requests: a second attempt starts when the first is
+  slower than a latency percentile, and the first answer wins
+- counters for fallbacks to cached or mock data
+
+Call latency, rejections, fallbacks and breaker states are also exported
+at /metrics.
+
+Deadline bounds the end-to-end time a request spends waiting on a
+provider, across retries and token refreshes.
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from config import settings
+from metrics import Counter, Gauge, Histogram, on_scrape
+
+provider_latency = Histogram(
+    "travelmate_provider_request_duration_seconds", "External provider call latency",
+    ("provider", "outcome")
+)
+provider_rejected = Counter(
+    "travelmate_provider_rejected_total", "Calls failed fast by an open circuit", ("provider",)
+)
+provider_fallbacks = Counter(
+    "travelmate_provider_fallbacks_total", "Responses served from mock data after a provider failure",
+    ("provider", "reason")
+)
+provider_circuit_open = Gauge(
+    "travelmate_provider_circuit_open", "1 while the provider's circuit breaker is open", ("provider",)
+)
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit breaker is open"""
+
+
+class Deadline:
+    """End-to-end time budget for one request"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    async def run(self, awaitable):
+        """Await within the remaining budget, raising asyncio.TimeoutError"""
+        return await asyncio.wait_for(awaitable, timeout=self.remaining())
+
+
+class CircuitBreaker:
+    """Error-rate breaker over a rolling window of recent calls"""
+
+    def __init__(self, error_threshold: float, min_calls: int, window: int, open_seconds: float):
+        self.error_threshold = error_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record(self, success: bool):
+        if self.state == "half_open":
+            self._probe_in_flight = False
+            if success:
+                self.state = "closed"
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+
+        self._outcomes.append(success)
+        if len(self._outcomes) >= self.min_calls and self.error_rate() >= self.error_threshold:
+            self._open()
+
+    def release(self):
+        """Forget an in-flight half-open probe that was cancelled"""
+        self._probe_in_flight = False
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+
+class LatencyTracker:
+    """Recent call latencies for percentile-based hedging"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float):
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+def _is_status_error(exc: Exception) -> bool:
+    # httpx is only loaded once a provider client exists (see external.clients)
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(exc, httpx.HTTPStatusError)
+
+
+def is_provider_failure(exc: Exception) -> bool:
+    """Client errors (4xx other than 429) mean the provider is healthy"""
+    if _is_status_error(exc):
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+class ProviderGuard:
+    """Circuit breaker, hedging and fallback accounting for one provider"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            settings.BREAKER_ERROR_THRESHOLD,
+            settings.BREAKER_MIN_CALLS,
+            settings.BREAKER_WINDOW,
+            settings.BREAKER_OPEN_SECONDS
+        )
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = {}
+
+    def _hedge_delay(self):
+        if not settings.PROVIDER_HEDGE_ENABLED or len(self.latency) < settings.PROVIDER_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(settings.PROVIDER_HEDGE_PERCENTILE)
+
+    async def _hedged(self, call, delay: float):
+        """Run call(); if it is slower than delay start a second one, first result wins"""
+        first = asyncio.ensure_future(call())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        second = asyncio.ensure_future(call())
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, call):
+        """Run call() (a zero-argument coroutine function) through the guard"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            provider_rejected.inc(self.name)
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        self.calls += 1
+        started = time.monotonic()
+        delay = self._hedge_delay()
+        try:
+            result = await (self._hedged(call, delay) if delay is not None else call())
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            failed = is_provider_failure(e)
+            self.failures += failed
+            self.breaker.record(not failed)
+            provider_latency.observe(
+                time.monotonic() - started, self.name, "failure" if failed else "client_error"
+            )
+            raise
+
+        elapsed = time.monotonic() - started
+        self.latency.add(elapsed)
+        self.breaker.record(True)
+        provider_latency.observe(elapsed, self.name, "success")
+        return result
+
+    def record_fallback(self, reason: str):
+        self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+        provider_fallbacks.inc(self.name, reason)
+
+    def stats(self) -> dict:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "breaker_state": self.breaker.state,
+            "error_rate": round(self.breaker.error_rate(), 3),
+            "times_opened": self.breaker.times_opened,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "fallbacks": self.fallbacks
+        }
+
+
+def fallback_reason(exc: Exception) -> str:
+    """Short label for why a provider call fell back"""
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "deadline"
+    if _is_status_error(exc):
+        return f"http_{exc.response.status_code}"
+    return "error"
+
+
+provider_guards = {
+    "openweathermap": ProviderGuard("openweathermap"),
+    "amadeus": ProviderGuard("amadeus"),
+}
+
+
+@on_scrape
+def _collect_breakers():
+    for name, guard in provider_guards.items():
+        provider_circuit_open.set(int(guard.breaker.state == "open"), name)
@@ -0,0 +1,28 @@
+"""
+Deterministic random generators for mock provider data
+
+Mock generators seed a NumPy Generator from a hash of their request
+parameters, so the same query always produces the same data and results
+can be cached and compared across runs.
+"""
+import hashlib
+import numpy as np
+
+
+def seed_for(*parts) -> int:
+    """Stable 64-bit seed from request parameters"""
+    key = "|".join(str(p) for p in parts).encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+def rng_for(*parts) -> np.random.Generator:
+    """NumPy Generator seeded from request parameters"""
+    return np.random.default_rng(seed_for(*parts))
+
+
+def shuffled_rows(rng: np.random.Generator, n: int, population: int) -> np.ndarray:
+    """(n, population) array where each row is an independent permutation of range(population)
+
+    Taking the first k entries of a row samples k items without replacement.
+    """
+    return np.argsort(rng.random((n, population)), axis=1)
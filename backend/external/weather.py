@@ -3,13 +3,25 @@ Weather API integration with enhanced mock data
 """
 from fastapi import APIRouter, HTTPException
 from datetime import datetime, timedelta
-import httpx
-import random
 from database import get_db
 from config import settings
+from shared_cache import shared_cache
+from external.cache import ProviderCache
+from external.clients import provider_clients
+from external.resilience import Deadline, fallback_reason, provider_guards
+from external.seeding import rng_for, seed_for
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
+weather_cache = ProviderCache(
+    "weather",
+    ttl=settings.WEATHER_CACHE_TTL,
+    stale_ttl=settings.WEATHER_CACHE_STALE_TTL,
+    max_size=settings.WEATHER_CACHE_MAX_ENTRIES,
+    path=settings.WEATHER_CACHE_PATH,
+    shared=shared_cache
+)
+
 # Enhanced mock weather conditions
 WEATHER_CONDITIONS = {
     "tropical": ["Sunny", "Partly Cloudy", "Scattered Showers", "Thunderstorms"],
@@ -18,61 +30,68 @@ WEATHER_CONDITIONS = {
     "desert": ["Sunny", "Hot and Sunny", "Clear Skies", "Dusty"],
 }
 
-def get_climate_zone(latitude):
-    """Determine climate zone from latitude"""
+# Base temperature by climate
+TEMP_RANGES = {
+    "tropical": (25, 32),
+    "temperate": (15, 25),
+    "cold": (-5, 10),
+    "desert": (30, 40),
+}
+
+# Weather icons
+ICON_MAP = {
+    "Sunny": "☀️", "Hot and Sunny": "🌞", "Clear Skies": "☀️",
+    "Partly Cloudy": "⛅", "Cloudy": "☁️", "Clear and Cold": "🌤️",
+    "Light Rain": "🌦️", "Scattered Showers": "🌧️",
+    "Thunderstorms": "⛈️", "Snow": "❄️", "Light Snow": "🌨️",
+    "Dusty": "🌫️"
+}
+
+def get_climate_zone(latitude, longitude=0.0):
+    """Determine climate zone from latitude (subtropics split by location)"""
     abs_lat = abs(latitude)
     if abs_lat < 23.5:
         return "tropical"
     elif abs_lat < 35:
-        return "desert" if random.random() > 0.5 else "temperate"
+        # Stable per location instead of a coin flip per request
+        return "desert" if seed_for("climate", round(latitude, 2), round(longitude, 2)) % 2 else "temperate"
     elif abs_lat < 60:
         return "temperate"
     else:
         return "cold"
 
 def generate_mock_weather(dest_name, latitude, longitude, days=7):
-    """Generate realistic mock weather data"""
-    climate = get_climate_zone(latitude)
+    """Generate realistic mock weather data (stable for a location and day)"""
+    climate = get_climate_zone(latitude, longitude)
     conditions = WEATHER_CONDITIONS[climate]
+    base_high, base_low = TEMP_RANGES[climate]
     
-    # Base temperature by climate
-    temp_ranges = {
-        "tropical": (25, 32),
-        "temperate": (15, 25),
-        "cold": (-5, 10),
-        "desert": (30, 40),
-    }
+    # numpy rejects negative sizes; like range(days), no days is an empty forecast
+    days = max(0, days)
+    today = datetime.now()
+    rng = rng_for("weather", dest_name, latitude, longitude, days, today.strftime("%Y-%m-%d"))
     
-    base_high, base_low = temp_ranges[climate]
+    # Add some variation, one draw per day for each field
+    temp_high = base_high + rng.integers(-3, 6, days)
+    temp_low = base_low + rng.integers(-3, 4, days)
+    condition_idx = rng.integers(0, len(conditions), days)
+    humidity = rng.integers(40, 86, days) if climate == "tropical" else rng.integers(30, 71, days)
+    wind_speed = rng.integers(5, 26, days)
+    temp_high, temp_low, condition_idx, humidity, wind_speed = (
+        a.tolist() for a in (temp_high, temp_low, condition_idx, humidity, wind_speed)
+    )
     
     forecast = []
     for i in range(days):
-        date = (datetime.now() + timedelta(days=i)).strftime("%Y-%m-%d")
-        
-        # Add some variation
-        temp_high = base_high + random.randint(-3, 5)
-        temp_low = base_low + random.randint(-3, 3)
-        
-        condition = random.choice(conditions)
-        humidity = random.randint(40, 85) if climate == "tropical" else random.randint(30, 70)
-        
-        # Weather icons
-        icon_map = {
-            "Sunny": "☀️", "Hot and Sunny": "🌞", "Clear Skies": "☀️",
-            "Partly Cloudy": "⛅", "Cloudy": "☁️", "Clear and Cold": "🌤️",
-            "Light Rain": "🌦️", "Scattered Showers": "🌧️",
-            "Thunderstorms": "⛈️", "Snow": "❄️", "Light Snow": "🌨️",
-            "Dusty": "🌫️"
-        }
-        
+        condition = conditions[condition_idx[i]]
         forecast.append({
-            "date": date,
-            "temp_high": temp_high,
-            "temp_low": temp_low,
+            "date": (today + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "temp_high": temp_high[i],
+            "temp_low": temp_low[i],
             "condition": condition,
-            "humidity": humidity,
-            "icon": icon_map.get(condition, "🌡️"),
-            "wind_speed": random.randint(5, 25)
+            "humidity": humidity[i],
+            "icon": ICON_MAP.get(condition, "🌡️"),
+            "wind_speed": wind_speed[i]
         })
     
     return {
@@ -82,6 +101,53 @@ def generate_mock_weather(dest_name, latitude, longitude, days=7):
         "climate_zone": climate
     }
 
+def forecast_cache_key(latitude, longitude, days):
+    """Cache key from coordinates rounded to ~1 km and the forecast length"""
+    return f"{latitude:.2f},{longitude:.2f},{days}"
+
+async def fetch_openweathermap(latitude, longitude, days):
+    """Fetch and summarize a daily forecast from OpenWeatherMap"""
+    client = provider_clients.get("openweathermap")
+    resp = await client.get(
+        "/data/2.5/forecast",
+        params={
+            "lat": latitude,
+            "lon": longitude,
+            "appid": settings.WEATHER_API_KEY,
+            "units": "metric",
+            "cnt": days * 8
+        }
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    
+    # Process API data
+    daily = {}
+    for item in data["list"]:
+        date = item["dt_txt"].split()[0]
+        if date not in daily:
+            daily[date] = {
+                "temps": [],
+                "conditions": [],
+                "humidity": []
+            }
+        daily[date]["temps"].append(item["main"]["temp"])
+        daily[date]["conditions"].append(item["weather"][0]["main"])
+        daily[date]["humidity"].append(item["main"]["humidity"])
+    
+    forecast = []
+    for date, vals in list(daily.items())[:days]:
+        condition = max(set(vals["conditions"]), key=vals["conditions"].count)
+        forecast.append({
+            "date": date,
+            "temp_high": round(max(vals["temps"])),
+            "temp_low": round(min(vals["temps"])),
+            "condition": condition,
+            "humidity": round(sum(vals["humidity"]) / len(vals["humidity"]))
+        })
+    
+    return forecast
+
 @router.get("/{destination_id}")
 async def get_weather(destination_id: int, days: int = 7):
     """Get weather forecast for a destination"""
@@ -89,7 +155,7 @@ async def get_weather(destination_id: int, days: int = 7):
     c = conn.cursor()
     
     c.execute(
-        "SELECT latitude, longitude, name FROM destinations WHERE id = ?",
+        "SELECT latitude, longitude, name FROM destinations WHERE id = ? AND deleted_at IS NULL",
         (destination_id,)
     )
     dest = c.fetchone()
@@ -98,59 +164,29 @@ async def get_weather(destination_id: int, days: int = 7):
     if not dest:
         raise HTTPException(status_code=404, detail="Destination not found")
     
-    dest = dict(dest)
-    
-    # Try real API if key available
+    return await find_weather(dict(dest), days)
+
+async def find_weather(dest, days):
+    """Forecast for a destination row: cached OpenWeatherMap data, else mock data"""
+    # Try real API if key available (cached per rounded coordinates and days)
     if settings.WEATHER_API_KEY:
+        guard = provider_guards["openweathermap"]
+        deadline = Deadline(settings.WEATHER_DEADLINE_SECONDS)
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(
-                    "https://api.openweathermap.org/data/2.5/forecast",
-                    params={
-                        "lat": dest["latitude"],
-                        "lon": dest["longitude"],
-                        "appid": settings.WEATHER_API_KEY,
-                        "units": "metric",
-                        "cnt": days * 8
-                    },
-                    timeout=10.0
+            forecast = await deadline.run(weather_cache.get(
+                forecast_cache_key(dest["latitude"], dest["longitude"], days),
+                lambda: guard.call(
+                    lambda: fetch_openweathermap(dest["latitude"], dest["longitude"], days)
                 )
-                
-                if resp.status_code == 200:
-                    data = resp.json()
-                    
-                    # Process API data
-                    daily = {}
-                    for item in data["list"]:
-                        date = item["dt_txt"].split()[0]
-                        if date not in daily:
-                            daily[date] = {
-                                "temps": [],
-                                "conditions": [],
-                                "humidity": []
-                            }
-                        daily[date]["temps"].append(item["main"]["temp"])
-                        daily[date]["conditions"].append(item["weather"][0]["main"])
-                        daily[date]["humidity"].append(item["main"]["humidity"])
-                    
-                    forecast = []
-                    for date, vals in list(daily.items())[:days]:
-                        condition = max(set(vals["conditions"]), key=vals["conditions"].count)
-                        forecast.append({
-                            "date": date,
-                            "temp_high": round(max(vals["temps"])),
-                            "temp_low": round(min(vals["temps"])),
-                            "condition": condition,
-                            "humidity": round(sum(vals["humidity"]) / len(vals["humidity"]))
-                        })
-                    
-                    return {
-                        "destination": dest["name"],
-                        "forecast": forecast,
-                        "source": "openweathermap"
-                    }
+            ))
+            return {
+                "destination": dest["name"],
+                "forecast": forecast,
+                "source": "openweathermap"
+            }
         except Exception as e:
-            print(f"Weather API error: {e}")
+            guard.record_fallback(fallback_reason(e))
+            print(f"Weather API error: {e!r}")
             # Fall through to mock data
     
     # Return enhanced mock data
@@ -159,4 +195,4 @@ async def get_weather(destination_id: int, days: int = 7):
         dest["latitude"],
         dest["longitude"],
         days
-    )
\ No newline at end of file
+    )
@@ -2,15 +2,37 @@
 TravelMate API - Main Application Entry Point
 Professional structure with modular architecture
 """
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+STARTED = time.perf_counter()
+
+from contextlib import contextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 # Configuration
 from config import settings
 
 # Database
-from database import init_db, get_db
-from destinations.mock_data import seed_destinations
+from database import init_db, get_db, mark_schema_current, schema_lock
+from snapshot import prepare_data, restore_snapshot
+
+# Telemetry
+import metrics
+from profiling import ProfileMiddleware, track_sync_endpoints
+
+# Background workers and caches
+from bus import invalidation_bus
+from admin.deletions import deletion_worker
+from admin.stats import dashboard_refresher
+from reviews.helpful import helpful_votes
+from destinations.trending import trending
+from external.clients import provider_clients, provider_configured
+from external.weather import weather_cache
+from external.flights import flight_prewarmer
+from external.resilience import provider_guards
+from trips.repricing import repricing_worker
 
 # Routers
 from auth.routes import router as auth_router
@@ -39,6 +61,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request metrics (outermost, so latency covers CORS handling too)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Opt-in per-request profiling ("X-Profile: <PROFILE_TOKEN>")
+if settings.PROFILE_TOKEN:
+    app.add_middleware(ProfileMiddleware)
+
 # Include all routers
 app.include_router(auth_router)
 app.include_router(destinations_router)
@@ -50,6 +80,8 @@ app.include_router(hotels_router)
 app.include_router(social_router)
 app.include_router(admin_router)
 
+IMPORTED = time.perf_counter()
+
 # Root endpoint
 @app.get("/")
 def root():
@@ -63,46 +95,161 @@ def root():
 
 # Health check endpoint
 @app.get("/health")
-def health_check():
-    """Health check endpoint"""
+def health_check(response: Response):
+    """Database round trip and external provider status"""
+    status = "healthy"
+    
+    started = time.perf_counter()
+    try:
+        conn = get_db()
+        try:
+            conn.execute("SELECT 1 FROM destinations LIMIT 1").fetchall()
+        finally:
+            conn.close()
+        database = {"status": "connected", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        database = {"status": "error", "error": str(e)}
+        status = "unhealthy"
+        response.status_code = 503
+    
+    providers = {}
+    for name, guard in provider_guards.items():
+        providers[name] = {
+            "mode": "live" if provider_configured(name) else "mock",
+            "breaker_state": guard.breaker.state,
+            "error_rate": round(guard.breaker.error_rate(), 3)
+        }
+        # Requests still succeed with mock data, so an open breaker only degrades
+        if provider_configured(name) and guard.breaker.state == "open" and status == "healthy":
+            status = "degraded"
+    
     return {
-        "status": "healthy",
-        "database": "connected",
+        "status": status,
+        "database": database,
+        "providers": providers,
         "version": settings.API_VERSION
     }
 
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Metrics in the Prometheus text format"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Startup phases as (name, seconds), printed once the API is ready
+startup_phases = []
+
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_phases.append((name, time.perf_counter() - started))
+
 # Startup event
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     """Initialize database and seed data on startup"""
     print("🚀 Starting TravelMate API...")
+    startup_phases[:] = [("imports", IMPORTED - STARTED)]
     
-    # Initialize database
-    init_db()
-    print("✅ Database initialized")
+    # Per-request profiles sample the threadpool thread running a sync endpoint
+    if settings.PROFILE_TOKEN:
+        track_sync_endpoints(app.routes)
     
-    # Seed destinations if needed
-    conn = get_db()
-    c = conn.cursor()
-    seed_destinations(c)
-    conn.commit()
-    conn.close()
-    print("✅ Mock data loaded")
+    # Schema setup, backfills and thread starts block, so they run off the event loop
+    await asyncio.to_thread(start_database_and_workers)
+    
+    # Keep-alive connection pools, only for providers with credentials
+    # (mock mode never imports httpx)
+    if any(provider_configured(name) for name in provider_guards):
+        with phase("provider clients"):
+            provider_clients.start()
+        print("✅ Provider clients ready")
+    
+    with phase("weather cache"):
+        if weather_cache.load():
+            print("✅ Weather cache restored")
     
+    if provider_configured("amadeus"):
+        flight_prewarmer.start()
+        print("✅ Flight route prewarming started")
+    
+    total = time.perf_counter() - STARTED
+    breakdown = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in startup_phases)
+    print(f"⏱️  Ready in {total * 1000:.0f}ms ({breakdown})")
     print(f"🌍 API running at http://localhost:8000")
     print(f"📚 Documentation at http://localhost:8000/docs")
 
+def start_database_and_workers():
+    # With several workers the first one sets the database up; the others
+    # wait for the lock and then find the schema current
+    with schema_lock():
+        # Fresh databases can start from a prebuilt snapshot
+        with phase("snapshot restore"):
+            restored = restore_snapshot(settings.DATABASE_SNAPSHOT, settings.DATABASE_URL)
+        if restored:
+            print("✅ Database restored from snapshot")
+        
+        # DDL, seeding and backfills only run when the schema version changed
+        with phase("schema"):
+            migrated = init_db()
+        conn = get_db()
+        if migrated:
+            print("✅ Database initialized")
+            prepare_data(conn, phase)
+            mark_schema_current(conn)
+            print("✅ Mock data loaded")
+        else:
+            print("✅ Database schema current")
+    with phase("trending"):
+        trending.load(conn)
+    conn.close()
+    
+    # Other workers' writes from here on are applied to this worker's state
+    if settings.MULTI_WORKER:
+        invalidation_bus.start()
+        print(f"✅ Invalidation bus started (worker pid {os.getpid()})")
+    
+    with phase("workers"):
+        # Resume any repricing jobs and deletions left over from the last run
+        repricing_worker.start()
+        deletion_worker.start()
+        helpful_votes.start()
+        trending.start()
+        dashboard_refresher.start()
+    print("✅ Background workers started")
+
 # Shutdown event
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     """Cleanup on shutdown"""
     print("👋 Shutting down TravelMate API...")
+    await flight_prewarmer.stop()
+    await provider_clients.close()
+    
+    # Thread joins and final DB/file writes, kept off the event loop
+    await asyncio.to_thread(stop_workers)
+
+def stop_workers():
+    invalidation_bus.stop()
+    repricing_worker.stop()
+    deletion_worker.stop()
+    
+    # Write helpful votes still buffered in memory
+    helpful_votes.stop()
+    trending.stop()
+    dashboard_refresher.stop()
+    weather_cache.save()
 
 if __name__ == "__main__":
     import uvicorn
+    # Reload only works with a single worker
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        workers=settings.WORKERS,
+        reload=settings.WORKERS == 1
     )
\ No newline at end of file
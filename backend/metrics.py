@@ -0,0 +1,217 @@
+"""
+In-process metrics in the Prometheus text format
+
+Counters, gauges and histograms are plain dicts keyed by label values,
+updated under one lock and rendered at /metrics. MetricsMiddleware records
+per-route request counts, latency, in-flight requests and the number of
+SQL statements each request ran; get_db() counts statements only for
+connections opened while a request is being handled, so background jobs
+and bulk loads pay nothing. Collectors registered with on_scrape() refresh
+gauges (threadpool usage, breaker states) when /metrics is read.
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_lock = threading.Lock()
+_metrics = []
+_collectors = []
+
+# SQL statements run by the current request (None outside requests)
+request_statements = contextvars.ContextVar("request_statements", default=None)
+
+
+def _label_text(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _value_text(value) -> str:
+    """Sample value at full precision (:g keeps only six significant digits)"""
+    if isinstance(value, int):
+        return repr(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        _metrics.append(self)
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, _label_text(self.labels, key), value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_value_text(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        with _lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket counts (last is +Inf), then sum
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        for key, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = _label_text(self.labels + ("le",), key + (f"{bound:g}" if bound != "+Inf" else bound,))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _label_text(self.labels, key)
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+def on_scrape(collector):
+    """Register a function run before every render, usually to set gauges"""
+    _collectors.append(collector)
+    return collector
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            print(f"Metrics collector error: {e}")
+
+    with _lock:
+        lines = [line for metric in _metrics for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+# ==================== HTTP ====================
+http_requests = Counter(
+    "travelmate_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_latency = Histogram(
+    "travelmate_http_request_duration_seconds", "Request latency until the response body is sent",
+    ("method", "route")
+)
+http_in_flight = Gauge("travelmate_http_requests_in_flight", "Requests being handled")
+http_statements = Histogram(
+    "travelmate_http_request_db_statements", "SQL statements run per request", ("method", "route"),
+    buckets=STATEMENT_BUCKETS
+)
+
+
+def count_statement(_sql):
+    """sqlite3 trace callback adding one statement to the current request"""
+    counter = request_statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        statements = [0]
+        token = request_statements.set(statements)
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            request_statements.reset(token)
+
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, path, str(status))
+            http_latency.observe(elapsed, method, path)
+            http_statements.observe(statements[0], method, path)
+
+
+# ==================== THREADPOOL ====================
+threadpool_size = Gauge("travelmate_threadpool_threads", "Worker threads available to sync endpoints")
+threadpool_busy = Gauge("travelmate_threadpool_busy", "Worker threads running sync endpoints")
+threadpool_waiting = Gauge("travelmate_threadpool_waiting", "Calls queued for a worker thread")
+
+
+@on_scrape
+def _collect_threadpool():
+    # Only valid on the event loop thread, which is where /metrics runs
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    threadpool_size.set(limiter.total_tokens)
+    threadpool_busy.set(limiter.borrowed_tokens)
+    threadpool_waiting.set(limiter.statistics().tasks_waiting)
@@ -0,0 +1,36 @@
+"""
+Opaque keyset cursors shared by the paginated endpoints
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64url'd without padding; the next page selects rows past it.
+"""
+from fastapi import HTTPException
+import base64
+import json
+
+
+def encode_cursor(values) -> str:
+    """Encode the sort key of the last row into an opaque cursor"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by encode_cursor
+
+    Anything else is a 400: undecodable input, a key of the wrong length,
+    or values that can't be bound as SQL parameters.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Only scalars can be bound as SQL parameters
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return values
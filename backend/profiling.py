@@ -0,0 +1,281 @@
+"""
+Sampling profiler for live workers
+
+A Sampler thread snapshots the Python stack of every other thread with
+sys._current_frames() at a fixed interval and counts identical stacks, so
+the profiled code runs unmodified and the cost is one stack walk per
+thread per interval. Stacks of idle threads (parked in threading, queue or
+selectors) are dropped unless asked for.
+
+Two entry points:
+- profile_workers(): admin endpoint, samples all threads for N seconds and
+  returns collapsed stacks or a d3-flame-graph tree; one at a time, with a
+  cooldown between runs
+- ProfileMiddleware: a request sent with "X-Profile: <PROFILE_TOKEN>" is
+  sampled while it runs and gets a Server-Timing header with its hottest
+  functions; rate limited per minute. Only the threads handling it are
+  sampled: the event loop thread, plus the threadpool thread while a sync
+  endpoint runs (track_sync_endpoints() wraps them at startup), so
+  concurrent requests to the same endpoint don't count
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from config import settings
+
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+class ProfilerBusy(Exception):
+    """Another profile is running or the cooldown has not passed"""
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Background thread counting the stacks of all other threads"""
+
+    def __init__(self, interval: float, include_idle: bool = False, threads: set = None):
+        self.interval = interval
+        self.include_idle = include_idle
+        # Only sample these thread idents (read on every tick, so it can change)
+        self.threads = threads
+        self.samples = Counter()
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                if not self.include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < settings.PROFILE_MAX_DEPTH:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(ident, str(ident)), tuple(stack))] += 1
+            self.ticks += 1
+
+    def stacks(self, containing=None) -> Counter:
+        """Sample counts keyed by (thread name, code objects root first)"""
+        if containing is None:
+            return self.samples
+        return Counter({key: n for key, n in self.samples.items() if containing in key[1]})
+
+
+def collapsed(stacks: Counter, max_stacks: int) -> str:
+    """Brendan Gregg's collapsed format, heaviest stacks first"""
+    lines = []
+    other = 0
+    for i, ((thread, codes), count) in enumerate(stacks.most_common()):
+        if i >= max_stacks:
+            other += count
+            continue
+        lines.append(";".join([thread, *map(frame_label, codes)]) + f" {count}")
+    if other:
+        lines.append(f"[truncated {len(stacks) - max_stacks} stacks] {other}")
+    return "\n".join(lines) + "\n"
+
+
+def flamegraph(stacks: Counter, max_stacks: int) -> dict:
+    """Nested {name, value, children} tree as used by d3-flame-graph"""
+    root = {"name": "all", "value": 0, "children": {}}
+    for i, ((thread, codes), count) in enumerate(stacks.most_common()):
+        path = [thread, *map(frame_label, codes)] if i < max_stacks else ["[truncated]"]
+        root["value"] += count
+        node = root
+        for name in path:
+            node = node["children"].setdefault(name, {"name": name, "value": 0, "children": {}})
+            node["value"] += count
+
+    def listify(node):
+        node["children"] = [listify(child) for child in node["children"].values()]
+        return node
+
+    return listify(root)
+
+
+def self_time(stacks: Counter) -> Counter:
+    """Samples per leaf function"""
+    leaves = Counter()
+    for (_, codes), count in stacks.items():
+        if codes:
+            leaves[frame_label(codes[-1])] += count
+    return leaves
+
+
+# ==================== ADMIN PROFILES ====================
+_profile_lock = threading.Lock()
+_last_profile = None
+
+
+async def profile_workers(seconds: float, interval: float, include_idle: bool = False) -> Sampler:
+    """Sample every thread for a while without blocking the event loop"""
+    global _last_profile
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        wait = _last_profile and _last_profile + settings.PROFILE_COOLDOWN_SECONDS - time.monotonic()
+        if wait and wait > 0:
+            raise ProfilerBusy(f"Profiler cooling down, retry in {wait:.0f}s")
+
+        sampler = Sampler(interval, include_idle)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            # Joining the sampler thread blocks
+            await asyncio.to_thread(sampler.stop)
+            _last_profile = time.monotonic()
+        return sampler
+    finally:
+        _profile_lock.release()
+
+
+# ==================== PER-REQUEST PROFILES ====================
+class RequestProfileLimiter:
+    """Allows at most `per_minute` profiled requests in any sliding minute"""
+
+    def __init__(self):
+        self._started = deque()
+        self._lock = threading.Lock()
+
+    def allow(self, per_minute: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._started and now - self._started[0] >= 60:
+                self._started.popleft()
+            if len(self._started) >= per_minute:
+                return False
+            self._started.append(now)
+            return True
+
+
+request_limiter = RequestProfileLimiter()
+
+# Thread idents handling the current profiled request (None outside profiles)
+request_threads = contextvars.ContextVar("request_threads", default=None)
+
+
+def _record_thread(endpoint):
+    """Wrap a sync endpoint so a profiled request samples the threadpool thread running it"""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        threads = request_threads.get()
+        if threads is None:
+            return endpoint(*args, **kwargs)
+        # The threadpool copies the request's context, so this is the profiled request's set
+        ident = threading.get_ident()
+        threads.add(ident)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            threads.discard(ident)
+    wrapper.records_thread = True
+    return wrapper
+
+
+def track_sync_endpoints(routes):
+    """Wrap the sync endpoint of every FastAPI route with _record_thread
+
+    Call once at startup, after every route is registered and before
+    requests are served. Included routers are resolved lazily on the first
+    request from their original routes' endpoints, so those are wrapped too.
+    """
+    for route in routes:
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            track_sync_endpoints(included.routes)
+            continue
+        endpoint = getattr(route, "endpoint", None)
+        if (inspect.isfunction(endpoint) and not getattr(endpoint, "records_thread", False)
+                and not inspect.iscoroutinefunction(endpoint) and not inspect.isgeneratorfunction(endpoint)):
+            route.endpoint = _record_thread(endpoint)
+            dependant = getattr(route, "dependant", None)
+            if dependant is not None and dependant.call is endpoint:
+                dependant.call = route.endpoint
+
+
+def server_timing(sampler: Sampler, stacks: Counter, entries: int) -> str:
+    """Server-Timing value: total sampled time, then the hottest functions by self time"""
+    interval_ms = sampler.interval * 1000
+    total = sum(stacks.values())
+    parts = [f'prof;desc="{total} samples";dur={total * interval_ms:.1f}']
+    for i, (label, count) in enumerate(self_time(stacks).most_common(entries), 1):
+        label = label.replace('"', "'")
+        parts.append(f'p{i};desc="{label}";dur={count * interval_ms:.1f}')
+    return ", ".join(parts)
+
+
+class ProfileMiddleware:
+    """ASGI middleware profiling requests that carry the profiling token"""
+
+    def __init__(self, app):
+        self.app = app
+        self.token = settings.PROFILE_TOKEN.encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or dict(scope["headers"]).get(b"x-profile") != self.token:
+            await self.app(scope, receive, send)
+            return
+
+        if not request_limiter.allow(settings.PROFILE_REQUESTS_PER_MINUTE):
+            await self.app(scope, receive, self._with_header(send, b"x-profile", b"rate-limited"))
+            return
+
+        # Async endpoints run on this (the event loop) thread
+        threads = {threading.get_ident()}
+        sampler = Sampler(settings.PROFILE_REQUEST_INTERVAL_MS / 1000, threads=threads)
+        sampler.start()
+        request = request_threads.set(threads)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start" and sampler.running:
+                # Profile the handler, not the time spent streaming the body
+                await asyncio.to_thread(sampler.stop)
+                endpoint = scope.get("endpoint")
+                stacks = sampler.stacks(getattr(endpoint, "__code__", None))
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing(sampler, stacks, settings.PROFILE_SUMMARY_ENTRIES).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            request_threads.reset(request)
+            if sampler.running:
+                await asyncio.to_thread(sampler.stop)
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def wrapped(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(name, value)]
+            await send(message)
+        return wrapped
@@ -0,0 +1,189 @@
+"""
+Coalesced helpful-vote counters
+
+Votes are accumulated in memory per review and written in one batched
+transaction when the flush interval elapses or enough votes are pending,
+instead of one UPDATE and commit per vote on a hot row. A vote only takes
+the lock of its counter shard; _pending_lock is taken by the flush and by
+readers. Readers add the pending votes (buffered plus being flushed) to
+what they read from the table, and redo the read if a flush committed
+while it ran, so a flushed batch is counted exactly once: either in the
+rows or in the pending votes.
+"""
+import threading
+from database import get_db
+from config import settings
+
+
+class _Shard:
+    __slots__ = ("counts", "lock", "pending", "added")
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.added = 0
+
+
+class ShardedCounter:
+    """Per-key integer counters split across lock-protected shards"""
+
+    def __init__(self, num_shards: int = 16):
+        self._shards = [_Shard() for _ in range(num_shards)]
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def add(self, key, amount: int = 1) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            shard.counts[key] = shard.counts.get(key, 0) + amount
+            shard.pending += amount
+            shard.added += amount
+
+    def restore(self, counts: dict) -> None:
+        """Put drained counts back (not counted as added again)"""
+        for key, amount in counts.items():
+            shard = self._shard(key)
+            with shard.lock:
+                shard.counts[key] = shard.counts.get(key, 0) + amount
+                shard.pending += amount
+
+    def get(self, key) -> int:
+        shard = self._shard(key)
+        with shard.lock:
+            return shard.counts.get(key, 0)
+
+    def pending(self) -> int:
+        """Total of all counts (without locking, so approximate while adds run)"""
+        return sum(shard.pending for shard in self._shards)
+
+    def added(self) -> int:
+        """Total ever added, restores excluded"""
+        return sum(shard.added for shard in self._shards)
+
+    def drain(self) -> dict:
+        """Remove and return all pending counts"""
+        drained = {}
+        for shard in self._shards:
+            with shard.lock:
+                pending = shard.counts
+                shard.counts = {}
+                shard.pending = 0
+            for key, amount in pending.items():
+                drained[key] = drained.get(key, 0) + amount
+        return drained
+
+
+class HelpfulVoteBuffer:
+    """Buffers helpful votes and flushes them to the reviews table"""
+
+    def __init__(self, num_shards: int = 16):
+        self._counter = ShardedCounter(num_shards)
+        self._in_flight = {}
+        self._commits = 0
+        self._flush_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.votes_flushed = 0
+        self.flushes = 0
+
+    @property
+    def votes_received(self) -> int:
+        return self._counter.added()
+
+    def add_vote(self, review_id: int) -> None:
+        self._counter.add(review_id)
+        if self._counter.pending() >= settings.HELPFUL_FLUSH_THRESHOLD:
+            self._wake.set()
+
+    def _pending(self, review_id: int) -> int:
+        return self._counter.get(review_id) + self._in_flight.get(review_id, 0)
+
+    def pending(self, review_id: int) -> int:
+        """Votes for a review not yet committed to the database"""
+        with self._pending_lock:
+            return self._pending(review_id)
+
+    def read_pending(self, read):
+        """Run read() for a list of review dicts, returns (reviews, pending votes by id)
+
+        read() runs again when a flush commits during it, since its rows
+        may or may not include the batch that just left the pending votes.
+        """
+        while True:
+            commits = self._commits
+            reviews = read()
+            with self._pending_lock:
+                if self._commits == commits:
+                    return reviews, {review["id"]: self._pending(review["id"]) for review in reviews}
+
+    def flush(self) -> int:
+        """Write all pending votes in a single transaction, returns votes written"""
+        with self._flush_lock:
+            with self._pending_lock:
+                self._in_flight = self._counter.drain()
+
+            if not self._in_flight:
+                return 0
+
+            conn = get_db()
+            try:
+                conn.executemany(
+                    "UPDATE reviews SET helpful_count = helpful_count + ? WHERE id = ?",
+                    [(amount, review_id) for review_id, amount in self._in_flight.items()]
+                )
+                # The votes move from in-flight to the table in one step for readers
+                with self._pending_lock:
+                    conn.commit()
+                    self._commits += 1
+                    written = sum(self._in_flight.values())
+                    self._in_flight = {}
+            except Exception as e:
+                # Put the votes back so the next flush retries them
+                conn.rollback()
+                print(f"Helpful vote flush error: {e}")
+                with self._pending_lock:
+                    self._counter.restore(self._in_flight)
+                    self._in_flight = {}
+                return 0
+            finally:
+                conn.close()
+
+            self.votes_flushed += written
+            self.flushes += 1
+            return written
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="helpful-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flush thread and write whatever is still pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(settings.HELPFUL_FLUSH_INTERVAL_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "votes_received": self.votes_received,
+            "votes_flushed": self.votes_flushed,
+            "flushes": self.flushes,
+            "pending": self._counter.pending()
+        }
+
+
+helpful_votes = HelpfulVoteBuffer()
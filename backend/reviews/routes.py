@@ -2,12 +2,25 @@
 Review and rating routes
 """
 from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
 from database import get_db
+from admin.stats import record_change, record_reviews_removed
+from destinations.trending import trending
 from models import ReviewCreate, ReviewResponse
+from pagination import decode_cursor, encode_cursor
 from auth.utils import get_current_user
+from reviews.helpful import helpful_votes
+from reviews.stats import record_review_added, record_review_removed, get_review_stats
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
+# Keyset columns per sort order (all descending), each backed by an index on reviews
+REVIEW_SORTS = {
+    "newest": ("created_at", "id"),
+    "highest_rating": ("rating", "created_at", "id"),
+    "most_helpful": ("helpful_count", "id"),
+}
+
 @router.post("", response_model=ReviewResponse)
 def create_review(review: ReviewCreate, user: dict = Depends(get_current_user)):
     """Create a new review for a destination"""
@@ -22,7 +35,7 @@ def create_review(review: ReviewCreate, user: dict = Depends(get_current_user)):
     
     # Check if destination exists
     c.execute(
-        "SELECT id FROM destinations WHERE id = ?",
+        "SELECT id FROM destinations WHERE id = ? AND deleted_at IS NULL",
         (review.destination_id,)
     )
     if not c.fetchone():
@@ -44,68 +57,90 @@ def create_review(review: ReviewCreate, user: dict = Depends(get_current_user)):
     
     review_id = c.lastrowid
     
-    # Update destination average rating
-    c.execute(
-        "SELECT AVG(rating) as avg_rating FROM reviews WHERE destination_id = ?",
-        (review.destination_id,)
-    )
-    avg_rating = c.fetchone()["avg_rating"]
-    
-    c.execute(
-        "UPDATE destinations SET rating = ? WHERE id = ?",
-        (round(avg_rating, 1), review.destination_id)
-    )
+    # Update destination stats and average rating
+    record_review_added(c, review.destination_id, review.rating)
+    record_change(c, user_id=user["id"], reviews=1)
     
     conn.commit()
     conn.close()
     
+    trending.record(review.destination_id, "review")
+    
     return ReviewResponse(id=review_id)
 
 @router.get("/{destination_id}")
 def get_reviews(
     destination_id: int,
     limit: int = 20,
-    offset: int = 0
+    sort: str = "newest",
+    cursor: Optional[str] = None
 ):
-    """Get all reviews for a destination"""
-    conn = get_db()
-    c = conn.cursor()
-    
-    # Get reviews
-    c.execute("""
-        SELECT r.*, u.username, u.avatar_url
-        FROM reviews r
-        JOIN users u ON r.user_id = u.id
-        WHERE r.destination_id = ?
-        ORDER BY r.created_at DESC
-        LIMIT ? OFFSET ?
-    """, (destination_id, limit, offset))
-    
-    reviews = [dict(r) for r in c.fetchall()]
+    """Get reviews for a destination, one keyset page at a time
+
+    total and distribution are eventually consistent with user deletions:
+    they still count a deleted user's reviews until the deletion job has
+    removed them, while the page already hides them.
+    """
+    if sort not in REVIEW_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort. Must be one of: {', '.join(REVIEW_SORTS)}"
+        )
     
-    # Get total count
-    c.execute(
-        "SELECT COUNT(*) as total FROM reviews WHERE destination_id = ?",
-        (destination_id,)
-    )
-    total = c.fetchone()["total"]
+    limit = max(1, min(limit, 100))
+    columns = REVIEW_SORTS[sort]
+    order_by = ", ".join(f"r.{col} DESC" for col in columns)
+    
+    params = [destination_id]
+    after = ""
+    if cursor:
+        params.extend(decode_cursor(cursor, len(columns)))
+        after = "AND ({}) < ({})".format(
+            ", ".join(f"r.{col}" for col in columns),
+            ", ".join("?" * len(columns))
+        )
+    params.append(limit + 1)
     
-    # Get rating distribution
-    c.execute("""
-        SELECT rating, COUNT(*) as count
-        FROM reviews
-        WHERE destination_id = ?
-        GROUP BY rating
-    """, (destination_id,))
+    conn = get_db()
+    c = conn.cursor()
     
-    distribution = {r["rating"]: r["count"] for r in c.fetchall()}
+    # Get reviews after the cursor
+    def read_page():
+        c.execute(f"""
+            SELECT r.id, r.user_id, r.destination_id, r.rating, r.title, r.content,
+                   r.travel_date, r.created_at, r.helpful_count,
+                   u.username, u.avatar_url
+            FROM reviews r
+            JOIN users u ON r.user_id = u.id
+            WHERE r.destination_id = ? AND u.deleted_at IS NULL {after}
+            ORDER BY {order_by}
+            LIMIT ?
+        """, params)
+        return [dict(r) for r in c.fetchall()]
+    
+    reviews, pending = helpful_votes.read_pending(read_page)
+    
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor(reviews[-1][col] for col in columns)
+    
+    # Include helpful votes that have not been flushed yet (after the cursor
+    # is taken, so it keeps matching the stored helpful_count)
+    for review in reviews:
+        review["helpful_count"] += pending[review["id"]]
+    
+    # Total and rating distribution come from the maintained stats row,
+    # which admin/deletions.py only corrects as it deletes the reviews
+    stats = get_review_stats(c, destination_id)
     
     conn.close()
     
     return {
         "reviews": reviews,
-        "total": total,
-        "distribution": distribution
+        "next_cursor": next_cursor,
+        "total": stats["total"],
+        "distribution": stats["distribution"]
     }
 
 @router.post("/{review_id}/helpful")
@@ -114,16 +149,15 @@ def mark_helpful(review_id: int, user: dict = Depends(get_current_user)):
     conn = get_db()
     c = conn.cursor()
     
-    c.execute(
-        "UPDATE reviews SET helpful_count = helpful_count + 1 WHERE id = ?",
-        (review_id,)
-    )
+    c.execute("SELECT id FROM reviews WHERE id = ?", (review_id,))
+    review = c.fetchone()
+    conn.close()
     
-    if c.rowcount == 0:
+    if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    conn.commit()
-    conn.close()
+    # Buffered and written in batches by the helpful vote flusher
+    helpful_votes.add_vote(review_id)
     
     return {"message": "Review marked as helpful"}
 
@@ -135,7 +169,7 @@ def delete_review(review_id: int, user: dict = Depends(get_current_user)):
     
     # Get review to check ownership and get destination_id
     c.execute(
-        "SELECT destination_id FROM reviews WHERE id = ? AND user_id = ?",
+        "SELECT destination_id, rating FROM reviews WHERE id = ? AND user_id = ?",
         (review_id, user["id"])
     )
     review = c.fetchone()
@@ -149,20 +183,11 @@ def delete_review(review_id: int, user: dict = Depends(get_current_user)):
     destination_id = review["destination_id"]
     
     # Delete review
+    record_reviews_removed(c, "id = ?", (review_id,))
     c.execute("DELETE FROM reviews WHERE id = ?", (review_id,))
     
-    # Recalculate destination rating
-    c.execute(
-        "SELECT AVG(rating) as avg_rating FROM reviews WHERE destination_id = ?",
-        (destination_id,)
-    )
-    result = c.fetchone()
-    avg_rating = result["avg_rating"] if result["avg_rating"] else 4.0
-    
-    c.execute(
-        "UPDATE destinations SET rating = ? WHERE id = ?",
-        (round(avg_rating, 1), destination_id)
-    )
+    # Update destination stats and average rating
+    record_review_removed(c, destination_id, review["rating"])
     
     conn.commit()
     conn.close()
@@ -0,0 +1,200 @@
+"""
+Incrementally maintained per-destination review statistics
+
+destination_stats holds the review count, rating sum and a five-bucket
+histogram for every destination. Review writes update it in the same
+transaction, so reads never aggregate over the reviews table.
+
+Check or rebuild from the command line:
+    python -m reviews.stats --check
+    python -m reviews.stats --rebuild
+"""
+import argparse
+import sys
+from database import get_db
+
+DEFAULT_RATING = 4.0
+BUCKETS = (1, 2, 3, 4, 5)
+
+
+def _apply(cursor, destination_id: int, rating: int, delta: int):
+    """Add delta reviews with the given rating and refresh destinations.rating"""
+    bucket = f"r{rating}"
+    cursor.execute(f"""
+        INSERT INTO destination_stats (destination_id, review_count, rating_sum, {bucket})
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(destination_id) DO UPDATE SET
+            review_count = review_count + excluded.review_count,
+            rating_sum = rating_sum + excluded.rating_sum,
+            {bucket} = {bucket} + excluded.{bucket}
+    """, (destination_id, delta, rating * delta, delta))
+
+    cursor.execute(
+        "SELECT review_count, rating_sum FROM destination_stats WHERE destination_id = ?",
+        (destination_id,)
+    )
+    row = cursor.fetchone()
+    cursor.execute(
+        "UPDATE destinations SET rating = ? WHERE id = ?",
+        (average_rating(row["review_count"], row["rating_sum"]), destination_id)
+    )
+
+
+def average_rating(count: int, rating_sum: int) -> float:
+    """Rounded average rating, or the default for destinations without reviews"""
+    if not count:
+        return DEFAULT_RATING
+    return round(rating_sum / count, 1)
+
+
+def record_review_added(cursor, destination_id: int, rating: int):
+    """Update stats after inserting a review"""
+    _apply(cursor, destination_id, rating, 1)
+
+
+def record_review_removed(cursor, destination_id: int, rating: int, count: int = 1):
+    """Update stats after deleting one or more reviews with the same rating"""
+    _apply(cursor, destination_id, rating, -count)
+
+
+def get_review_stats(cursor, destination_id: int) -> dict:
+    """Return total and rating distribution for a destination"""
+    cursor.execute(
+        "SELECT * FROM destination_stats WHERE destination_id = ?",
+        (destination_id,)
+    )
+    row = cursor.fetchone()
+
+    if not row:
+        return {"total": 0, "distribution": {r: 0 for r in BUCKETS}}
+
+    return {
+        "total": row["review_count"],
+        "distribution": {r: row[f"r{r}"] for r in BUCKETS}
+    }
+
+
+def _expected_stats(cursor, where: str = "1", params: tuple = ()) -> dict:
+    """Aggregate the reviews table into {destination_id: (count, sum, r1..r5)}"""
+    cursor.execute(f"""
+        SELECT destination_id,
+               COUNT(*) as review_count,
+               SUM(rating) as rating_sum,
+               SUM(rating = 1) as r1,
+               SUM(rating = 2) as r2,
+               SUM(rating = 3) as r3,
+               SUM(rating = 4) as r4,
+               SUM(rating = 5) as r5
+        FROM reviews
+        WHERE {where}
+        GROUP BY destination_id
+    """, params)
+    return {r["destination_id"]: tuple(r)[1:] for r in cursor.fetchall()}
+
+
+def check_review_stats(conn) -> list:
+    """Return destination ids whose stored stats differ from the reviews table"""
+    c = conn.cursor()
+    expected = _expected_stats(c)
+
+    c.execute("""
+        SELECT destination_id, review_count, rating_sum, r1, r2, r3, r4, r5
+        FROM destination_stats
+    """)
+    stored = {r["destination_id"]: tuple(r)[1:] for r in c.fetchall()}
+
+    empty = (0,) * 7
+    return sorted(
+        dest_id for dest_id in set(expected) | set(stored)
+        if expected.get(dest_id, empty) != stored.get(dest_id, empty)
+    )
+
+
+def refresh_review_stats(cursor, destination_ids):
+    """Recompute stats and ratings for some destinations from the reviews table"""
+    destination_ids = list(destination_ids)
+    if not destination_ids:
+        return
+    placeholders = ", ".join("?" * len(destination_ids))
+    expected = _expected_stats(cursor, f"destination_id IN ({placeholders})", destination_ids)
+
+    cursor.execute(f"DELETE FROM destination_stats WHERE destination_id IN ({placeholders})", destination_ids)
+    cursor.executemany("""
+        INSERT INTO destination_stats
+        (destination_id, review_count, rating_sum, r1, r2, r3, r4, r5)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(dest_id, *values) for dest_id, values in expected.items()])
+
+    empty = (0, 0)
+    cursor.executemany(
+        "UPDATE destinations SET rating = ? WHERE id = ?",
+        [(average_rating(*expected.get(dest_id, empty)[:2]), dest_id) for dest_id in destination_ids]
+    )
+
+
+def rebuild_review_stats(conn) -> int:
+    """Recompute all stats and ratings from the reviews table, returns rows written"""
+    c = conn.cursor()
+    expected = _expected_stats(c)
+
+    c.execute("SELECT destination_id FROM destination_stats")
+    emptied = {r["destination_id"] for r in c.fetchall()} - set(expected)
+
+    c.execute("DELETE FROM destination_stats")
+    c.executemany("""
+        INSERT INTO destination_stats
+        (destination_id, review_count, rating_sum, r1, r2, r3, r4, r5)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(dest_id, *values) for dest_id, values in expected.items()])
+
+    c.executemany(
+        "UPDATE destinations SET rating = ? WHERE id = ?",
+        [(average_rating(v[0], v[1]), dest_id) for dest_id, v in expected.items()]
+    )
+    c.executemany(
+        "UPDATE destinations SET rating = ? WHERE id = ?",
+        [(DEFAULT_RATING, dest_id) for dest_id in emptied]
+    )
+
+    conn.commit()
+    return len(expected)
+
+
+def ensure_review_stats(conn):
+    """Backfill stats once for databases created before the stats table existed"""
+    c = conn.cursor()
+    c.execute("SELECT EXISTS (SELECT 1 FROM destination_stats) as has_stats")
+    has_stats = c.fetchone()["has_stats"]
+    c.execute("SELECT EXISTS (SELECT 1 FROM reviews) as has_reviews")
+    has_reviews = c.fetchone()["has_reviews"]
+
+    if has_reviews and not has_stats:
+        rebuild_review_stats(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild review statistics")
+    parser.add_argument("--rebuild", action="store_true", help="rewrite stats from the reviews table")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    conn = get_db()
+    drifted = check_review_stats(conn)
+
+    if drifted:
+        print(f"⚠️  Stats drift for destinations: {', '.join(map(str, drifted))}")
+    else:
+        print("✅ Review stats are consistent")
+
+    if args.rebuild:
+        rows = rebuild_review_stats(conn)
+        print(f"✅ Rebuilt stats for {rows} destinations")
+
+    conn.close()
+
+    if drifted and not args.rebuild:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
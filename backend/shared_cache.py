@@ -0,0 +1,152 @@
+"""
+Cross-process cache tier for multi-worker deployments
+
+Every uvicorn worker keeps its own in-memory caches, so with N workers an
+upstream response is fetched up to N times. SharedCache is a second tier
+all workers on a host read: a small SQLite database on tmpfs (/dev/shm)
+opened with a large mmap_size, so lookups read shared memory pages without
+copying them into each process. Entries are JSON values with the time they
+were fetched and expire on their own; prune() drops expired rows and caps
+the row count. Only enabled in multi-worker mode.
+
+ProviderCache calls it through asyncio.to_thread, and connections never
+wait for a lock: WAL readers don't need one, and a write that finds
+another worker writing is dropped and counted in errors (the entry is
+still in the local cache).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import settings
+
+PRUNE_INTERVAL_SECONDS = 60
+
+
+def default_path() -> str:
+    """One cache file per database, on tmpfs when the host has it"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"
+    digest = hashlib.sha1(os.path.abspath(settings.DATABASE_URL).encode()).hexdigest()[:12]
+    return os.path.join(directory, f"travelmate-{digest}.cache.db")
+
+
+class SharedCache:
+    """Key/value entries with expiry shared by all worker processes"""
+
+    def __init__(self, path: str, max_entries: int, mmap_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+        self._last_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA mmap_size={self.mmap_bytes}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries(expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str):
+        """(value, fetched_at) if an unexpired entry exists, else None"""
+        try:
+            row = self._conn().execute(
+                "SELECT value, fetched_at FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def put(self, namespace: str, key: str, value, fetched_at: float, max_age: float):
+        """Store a value that stays valid until fetched_at + max_age"""
+        try:
+            data = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        try:
+            self._conn().execute("""
+                INSERT INTO entries (namespace, key, value, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET
+                    value = excluded.value,
+                    fetched_at = excluded.fetched_at,
+                    expires_at = excluded.expires_at
+            """, (namespace, key, data, fetched_at, fetched_at + max_age))
+            self.writes += 1
+        except sqlite3.Error:
+            self.errors += 1
+            return
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+            self.prune()
+
+    def delete(self, namespace: str, key: str = None):
+        """Drop one key, or the whole namespace when key is None"""
+        try:
+            if key is None:
+                self._conn().execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            else:
+                self._conn().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error:
+            self.errors += 1
+
+    def prune(self):
+        """Delete expired entries, then the oldest ones above max_entries"""
+        self._last_prune = time.monotonic()
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            conn.execute("""
+                DELETE FROM entries WHERE (namespace, key) IN (
+                    SELECT namespace, key FROM entries ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+        except sqlite3.Error:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        try:
+            entries = self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors
+        }
+
+
+shared_cache = SharedCache(
+    settings.SHARED_CACHE_PATH or default_path(),
+    settings.SHARED_CACHE_MAX_ENTRIES,
+    settings.SHARED_CACHE_MMAP_BYTES
+) if settings.MULTI_WORKER else None
@@ -0,0 +1,95 @@
+"""
+Prebuilt database snapshots for fast cold starts
+
+A snapshot is a database with the current schema, the destination catalog,
+hotel inventory and stats already in place. Build one ahead of time (e.g.
+when building the image):
+
+    python -m snapshot build catalog.db
+
+and set DATABASE_SNAPSHOT=catalog.db. When DATABASE_URL does not exist yet,
+startup restores it from the snapshot with SQLite's backup API, so a fresh
+worker skips DDL, seeding and hotel generation.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import nullcontext
+from config import settings
+from database import get_db, init_db, mark_schema_current, schema_version, SCHEMA_VERSION
+from destinations.mock_data import seed_destinations
+from reviews.stats import ensure_review_stats
+from external.hotel_inventory import ensure_hotel_inventory
+from admin.stats import ensure_dashboard_stats
+
+
+def prepare_data(conn, phase=lambda name: nullcontext()):
+    """Seed the catalog and backfill derived tables; safe to run repeatedly"""
+    with phase("seed"):
+        seed_destinations(conn.cursor())
+        conn.commit()
+    with phase("review stats"):
+        ensure_review_stats(conn)
+    with phase("hotel inventory"):
+        ensure_hotel_inventory(conn)
+    with phase("dashboard stats"):
+        ensure_dashboard_stats(conn)
+
+
+def restore_snapshot(snapshot: str, target: str) -> bool:
+    """Copy a snapshot to target if target does not exist yet"""
+    if not snapshot or not os.path.exists(snapshot) or os.path.exists(target):
+        return False
+
+    source = sqlite3.connect(f"file:{snapshot}?mode=ro", uri=True)
+    destination = sqlite3.connect(target)
+    try:
+        source.backup(destination)
+    finally:
+        source.close()
+        destination.close()
+    return True
+
+
+def build_snapshot(path: str):
+    """Create a fresh, fully prepared database at path"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    settings.DATABASE_URL = path
+    init_db()
+    conn = get_db()
+    prepare_data(conn)
+    mark_schema_current(conn)
+    # A single self-contained file that can be opened read-only
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect database snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build a snapshot with the current schema and catalog")
+    build.add_argument("path")
+    show = sub.add_parser("version", help="print a database's schema version")
+    show.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        build_snapshot(args.path)
+        size = os.path.getsize(args.path) / 1e6
+        print(f"✅ Built {args.path} ({size:.1f} MB) in {time.perf_counter() - started:.1f}s")
+    else:
+        conn = sqlite3.connect(f"file:{args.path}?mode=ro", uri=True)
+        version = schema_version(conn)
+        conn.close()
+        state = "current" if version == SCHEMA_VERSION else f"expected {SCHEMA_VERSION}"
+        print(f"Schema version {version} ({state})")
+
+
+if __name__ == "__main__":
+    main()
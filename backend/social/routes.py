@@ -1,12 +1,15 @@
 """
 Social features - sharing and favorites
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 import secrets
 import sqlite3
 from database import get_db
 from models import ShareResponse
 from auth.utils import get_current_user
+from config import settings
+from destinations.trending import event_time, trending
+from social.snapshots import build_snapshot, drop_snapshots, load_snapshot, snapshot_cache
 
 router = APIRouter(tags=["Social"])
 
@@ -28,9 +31,15 @@ def create_share_link(trip_id: int, user: dict = Depends(get_current_user)):
     if c.rowcount == 0:
         raise HTTPException(status_code=404, detail="Trip not found")
     
+    # Replace any snapshot under the previous token
+    tokens = drop_snapshots(c, "id = ?", (trip_id,))
+    build_snapshot(c, trip_id)
+    
     conn.commit()
     conn.close()
     
+    snapshot_cache.invalidate(tokens)
+    
     return ShareResponse(
         share_url=f"/shared/{share_token}",
         token=share_token
@@ -39,33 +48,30 @@ def create_share_link(trip_id: int, user: dict = Depends(get_current_user)):
 @router.get("/shared/{share_token}")
 def get_shared_trip(share_token: str):
     """View a shared trip (public access)"""
-    conn = get_db()
-    c = conn.cursor()
-    
-    c.execute("""
-        SELECT 
-            t.*,
-            d.name as destination_name,
-            d.country,
-            d.image_url,
-            d.description as destination_description,
-            u.username
-        FROM trips t
-        JOIN destinations d ON t.destination_id = d.id
-        JOIN users u ON t.user_id = u.id
-        WHERE t.share_token = ? AND t.is_public = 1
-    """, (share_token,))
-    
-    trip = c.fetchone()
-    conn.close()
-    
-    if not trip:
-        raise HTTPException(
-            status_code=404,
-            detail="Trip not found or not shared"
-        )
-    
-    return dict(trip)
+    payload = snapshot_cache.get(share_token)
+    
+    if payload is None:
+        # Taken before the read, so a concurrent invalidation wins over this put
+        generation = snapshot_cache.generation
+        conn = get_db()
+        c = conn.cursor()
+        payload = load_snapshot(c, share_token)
+        conn.commit()
+        conn.close()
+        
+        if payload is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Trip not found or not shared"
+            )
+        
+        snapshot_cache.put(share_token, payload, generation)
+    
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.SHARED_SNAPSHOT_MAX_AGE}"}
+    )
 
 @router.delete("/trips/{trip_id}/share")
 def remove_share_link(trip_id: int, user: dict = Depends(get_current_user)):
@@ -73,6 +79,8 @@ def remove_share_link(trip_id: int, user: dict = Depends(get_current_user)):
     conn = get_db()
     c = conn.cursor()
     
+    tokens = drop_snapshots(c, "id = ? AND user_id = ?", (trip_id, user["id"]))
+    
     c.execute(
         """UPDATE trips SET share_token = NULL, is_public = 0
            WHERE id = ? AND user_id = ?""",
@@ -85,6 +93,8 @@ def remove_share_link(trip_id: int, user: dict = Depends(get_current_user)):
     conn.commit()
     conn.close()
     
+    snapshot_cache.invalidate(tokens)
+    
     return {"message": "Trip is now private"}
 
 # ==================== FAVORITES ====================
@@ -96,7 +106,7 @@ def add_favorite(destination_id: int, user: dict = Depends(get_current_user)):
     
     # Check if destination exists
     c.execute(
-        "SELECT id FROM destinations WHERE id = ?",
+        "SELECT id FROM destinations WHERE id = ? AND deleted_at IS NULL",
         (destination_id,)
     )
     if not c.fetchone():
@@ -109,6 +119,7 @@ def add_favorite(destination_id: int, user: dict = Depends(get_current_user)):
         )
         conn.commit()
         message = "Added to favorites"
+        trending.record(destination_id, "favorite")
     except sqlite3.IntegrityError:
         message = "Already in favorites"
     
@@ -123,19 +134,27 @@ def remove_favorite(destination_id: int, user: dict = Depends(get_current_user))
     c = conn.cursor()
     
     c.execute(
-        "DELETE FROM favorites WHERE user_id = ? AND destination_id = ?",
+        "SELECT created_at FROM favorites WHERE user_id = ? AND destination_id = ?",
         (user["id"], destination_id)
     )
-    
-    if c.rowcount == 0:
+    favorite = c.fetchone()
+    if not favorite:
         raise HTTPException(
             status_code=404,
             detail="Favorite not found"
         )
     
+    c.execute(
+        "DELETE FROM favorites WHERE user_id = ? AND destination_id = ?",
+        (user["id"], destination_id)
+    )
     conn.commit()
     conn.close()
     
+    # Take back what the favorite added, not a full weight at today's value
+    if favorite["created_at"]:
+        trending.record(destination_id, "unfavorite", event_time(favorite["created_at"]))
+    
     return {"message": "Removed from favorites"}
 
 @router.get("/favorites")
@@ -148,7 +167,7 @@ def get_favorites(user: dict = Depends(get_current_user)):
         SELECT d.*, f.created_at as favorited_at
         FROM destinations d
         JOIN favorites f ON d.id = f.destination_id
-        WHERE f.user_id = ?
+        WHERE f.user_id = ? AND d.deleted_at IS NULL
         ORDER BY f.created_at DESC
     """, (user["id"],))
     
@@ -0,0 +1,164 @@
+"""
+Precomputed snapshots for public shared-trip pages
+
+A shared trip is serialized once when it is shared and rebuilt whenever
+the trip or its destination changes. GET /shared/{token} is then served
+from an in-process LRU backed by the shared_trip_snapshots table.
+
+Rebuild helpers run inside the caller's transaction and return the
+affected share tokens; call snapshot_cache.invalidate(tokens) after the
+commit. They also publish the tokens on the invalidation bus in the same
+transaction, so other workers drop their cached copies too.
+"""
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from config import settings
+from bus import publish, subscribe
+
+SNAPSHOT_QUERY = """
+    SELECT
+        t.*,
+        d.name as destination_name,
+        d.country,
+        d.image_url,
+        d.description as destination_description,
+        u.username
+    FROM trips t
+    JOIN destinations d ON t.destination_id = d.id
+    JOIN users u ON t.user_id = u.id
+    WHERE t.is_public = 1 AND t.share_token IS NOT NULL
+      AND d.deleted_at IS NULL AND u.deleted_at IS NULL
+"""
+
+
+def _store(cursor, rows) -> list:
+    """Serialize joined trip rows into the snapshot table"""
+    now = datetime.now().isoformat()
+    snapshots = [
+        (r["share_token"], r["id"], json.dumps(dict(r), separators=(",", ":")), now)
+        for r in rows
+    ]
+    cursor.executemany("""
+        INSERT INTO shared_trip_snapshots (share_token, trip_id, payload, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(share_token) DO UPDATE SET
+            trip_id = excluded.trip_id,
+            payload = excluded.payload,
+            updated_at = excluded.updated_at
+    """, snapshots)
+    return snapshots
+
+
+def _changed(cursor, tokens: list) -> list:
+    """Tell other workers that these snapshots changed"""
+    if tokens:
+        publish("snapshots", tokens, cursor)
+    return tokens
+
+
+def build_snapshot(cursor, trip_id: int):
+    """Build the snapshot for one shared trip, returns the payload or None"""
+    cursor.execute(SNAPSHOT_QUERY + " AND t.id = ?", (trip_id,))
+    snapshots = _store(cursor, cursor.fetchall())
+    return snapshots[0][2] if snapshots else None
+
+
+def rebuild_trip_snapshots(cursor, trip_ids) -> list:
+    """Rebuild snapshots for any shared trips among trip_ids"""
+    trip_ids = list(trip_ids)
+    if not trip_ids:
+        return []
+    placeholders = ", ".join("?" * len(trip_ids))
+    cursor.execute(SNAPSHOT_QUERY + f" AND t.id IN ({placeholders})", trip_ids)
+    return _changed(cursor, [s[0] for s in _store(cursor, cursor.fetchall())])
+
+
+def rebuild_destination_snapshots(cursor, destination_id: int) -> list:
+    """Rebuild snapshots for every shared trip to a destination"""
+    cursor.execute(SNAPSHOT_QUERY + " AND t.destination_id = ?", (destination_id,))
+    return _changed(cursor, [s[0] for s in _store(cursor, cursor.fetchall())])
+
+
+def drop_snapshots(cursor, where: str, params) -> list:
+    """Delete snapshots for trips matching a WHERE clause on trips"""
+    cursor.execute(f"""
+        SELECT share_token FROM shared_trip_snapshots
+        WHERE trip_id IN (SELECT id FROM trips WHERE {where})
+    """, params)
+    tokens = [r["share_token"] for r in cursor.fetchall()]
+    cursor.execute(f"""
+        DELETE FROM shared_trip_snapshots
+        WHERE trip_id IN (SELECT id FROM trips WHERE {where})
+    """, params)
+    return _changed(cursor, tokens)
+
+
+def load_snapshot(cursor, share_token: str):
+    """Read a snapshot, building it on first access for older shares"""
+    cursor.execute(
+        "SELECT payload FROM shared_trip_snapshots WHERE share_token = ?",
+        (share_token,)
+    )
+    row = cursor.fetchone()
+    if row:
+        return row["payload"]
+
+    cursor.execute(SNAPSHOT_QUERY + " AND t.share_token = ?", (share_token,))
+    snapshots = _store(cursor, cursor.fetchall())
+    return snapshots[0][2] if snapshots else None
+
+
+class SnapshotCache:
+    """Thread-safe LRU of serialized snapshots keyed by share token
+
+    Entries never expire, so a payload read before an invalidation must not
+    be cached after it: take `generation` before reading the snapshot and
+    pass it to put(), which skips tokens invalidated in between.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        # Token -> generation of its last invalidation (bounded like the entries)
+        self._invalidated = OrderedDict()
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, share_token: str):
+        with self._lock:
+            payload = self._entries.get(share_token)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(share_token)
+            self.hits += 1
+            return payload
+
+    def put(self, share_token: str, payload: str, generation: int = None):
+        with self._lock:
+            if generation is not None and self._invalidated.get(share_token, self._forgotten) > generation:
+                return
+            self._entries[share_token] = payload
+            self._entries.move_to_end(share_token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, share_tokens):
+        with self._lock:
+            self.generation += 1
+            for token in share_tokens:
+                self._entries.pop(token, None)
+                self._invalidated[token] = self.generation
+                self._invalidated.move_to_end(token)
+            while len(self._invalidated) > self.max_size:
+                _, generation = self._invalidated.popitem(last=False)
+                self._forgotten = max(self._forgotten, generation)
+
+
+snapshot_cache = SnapshotCache(settings.SHARED_SNAPSHOT_CACHE_SIZE)
+subscribe("snapshots", snapshot_cache.invalidate)
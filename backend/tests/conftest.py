@@ -0,0 +1,12 @@
+"""
+Shared pytest setup: backend on sys.path and a throwaway database
+"""
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# Before config is imported anywhere, so nothing touches travel.db
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(prefix="travelmate-tests-"), "test.db")
@@ -0,0 +1,141 @@
+"""
+Invalidation bus and shared cache between workers sharing one database
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import pytest
+from bus import ORIGIN, InvalidationBus, publish
+from config import settings
+from database import get_db, init_db
+from destinations.trending import trending
+from external.weather import forecast_cache_key
+from shared_cache import SharedCache
+from social.snapshots import rebuild_trip_snapshots
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DESTINATION_ID = 999_001
+
+
+def wait_for(condition, timeout: float) -> float:
+    """Seconds until condition() held, failing after timeout"""
+    started = time.monotonic()
+    while not condition():
+        assert time.monotonic() - started < timeout, "condition not met in time"
+        time.sleep(0.005)
+    return time.monotonic() - started
+
+
+@pytest.fixture(scope="module")
+def other_worker():
+    """A second API process on the test database and a shared cache on tmpfs"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    shared_dir = tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    shared_path = os.path.join(shared_dir, "cache.db")
+
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND,
+        env={
+            **os.environ,
+            "DATABASE_URL": settings.DATABASE_URL,
+            "MULTI_WORKER": "true",
+            "SHARED_CACHE_PATH": shared_path,
+            "BUS_POLL_SECONDS": str(settings.BUS_POLL_SECONDS),
+            # Nothing listens there, so a weather forecast can only come from the shared cache
+            "WEATHER_API_KEY": "fake",
+            "WEATHER_API_BASE_URL": "http://127.0.0.1:9",
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10.0)
+
+    def up():
+        assert worker.poll() is None, "worker exited during startup"
+        try:
+            return client.get("/").status_code == 200
+        except httpx.TransportError:
+            return False
+
+    try:
+        wait_for(up, 60)
+        yield client, shared_path
+    finally:
+        client.close()
+        worker.terminate()
+        worker.wait(10)
+        for name in os.listdir(shared_dir):
+            os.remove(os.path.join(shared_dir, name))
+        os.rmdir(shared_dir)
+
+
+def test_write_in_this_worker_invalidates_the_other(other_worker, monkeypatch):
+    client, _ = other_worker
+    monkeypatch.setattr(settings, "MULTI_WORKER", True)
+
+    conn = get_db()
+    user_id = conn.execute(
+        "INSERT INTO users (email, username, password_hash) VALUES ('bus@example.com', 'bus', 'x')"
+    ).lastrowid
+    trip_id = conn.execute("""
+        INSERT INTO trips (user_id, destination_id, start_date, end_date, num_travelers, share_token, is_public)
+        VALUES (?, 1, '2030-06-01', '2030-06-08', 1, 'bus-test-token', 1)
+    """, (user_id,)).lastrowid
+    conn.commit()
+
+    # Cached in the other worker's snapshot LRU, which never expires entries
+    assert client.get("/shared/bus-test-token").json()["num_travelers"] == 1
+
+    conn.execute("UPDATE trips SET num_travelers = 4 WHERE id = ?", (trip_id,))
+    rebuild_trip_snapshots(conn.cursor(), [trip_id])
+    conn.commit()
+    conn.close()
+
+    wait_for(
+        lambda: client.get("/shared/bus-test-token").json()["num_travelers"] == 4,
+        5 * settings.BUS_POLL_SECONDS
+    )
+
+
+def test_shared_cache_put_is_visible_to_the_other_worker(other_worker):
+    client, shared_path = other_worker
+    conn = get_db()
+    dest = conn.execute("SELECT latitude, longitude FROM destinations WHERE id = 2").fetchone()
+    conn.close()
+
+    forecast = [{"date": "2030-01-01", "temp_high": 99, "temp_low": 88, "condition": "Shared", "humidity": 50}]
+    cache = SharedCache(shared_path, 100, 1024 * 1024)
+    cache.put("weather", forecast_cache_key(dest["latitude"], dest["longitude"], 1), forecast, time.time(), 600)
+
+    weather = client.get("/weather/2", params={"days": 1}).json()
+    assert weather["source"] == "openweathermap"
+    assert weather["forecast"] == forecast
+
+
+def test_worker_skips_its_own_events(monkeypatch):
+    monkeypatch.setattr(settings, "MULTI_WORKER", True)
+    init_db()
+    own = InvalidationBus()
+    other = InvalidationBus(origin="other-worker")
+    own.start()
+    other.start()
+    try:
+        seen = own.last_event_id
+        publish("trending", {"destination_id": DESTINATION_ID, "event": "trip", "timestamp": time.time()})
+        wait_for(lambda: own.last_event_id > seen and other.last_event_id > seen, 5 * settings.BUS_POLL_SECONDS)
+        assert DESTINATION_ID in dict(trending.top())
+    finally:
+        own.stop()
+        other.stop()
+        trending._remove(DESTINATION_ID)
+
+    assert own.origin == ORIGIN
+    assert own.events_applied == 0
+    assert other.events_applied == 1
@@ -0,0 +1,96 @@
+"""
+Pooled provider clients against the local fake provider
+"""
+import asyncio
+import socket
+import threading
+import time
+import pytest
+import uvicorn
+from external.clients import ProviderClients
+from external.fake_provider import FakeProviderConfig, create_app
+
+CALLS = 20
+
+
+class ConnectionTracker:
+    """ASGI wrapper recording the client address of every request (one per TCP connection)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.connections.add(tuple(scope["client"]))
+        await self.app(scope, receive, send)
+
+
+@pytest.fixture(scope="module")
+def fake_provider():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    tracker = ConnectionTracker(create_app(FakeProviderConfig(latency_ms=1, latency_distribution="fixed")))
+    server = uvicorn.Server(uvicorn.Config(tracker, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    yield f"http://127.0.0.1:{port}", tracker
+
+    server.should_exit = True
+    thread.join(5)
+
+
+def forecast(client):
+    return client.get("/data/2.5/forecast", params={"lat": 48.85, "lon": 2.35, "appid": "fake", "cnt": 8})
+
+
+def test_pooled_client_reuses_one_connection(fake_provider):
+    base_url, tracker = fake_provider
+    clients = ProviderClients({"fake": {"base_url": base_url, "max_connections": 10}})
+
+    async def run():
+        clients.start()
+        for _ in range(CALLS):
+            response = await forecast(clients.get("fake"))
+            assert response.status_code == 200
+        await clients.close()
+
+    tracker.connections.clear()
+    asyncio.run(run())
+    assert len(tracker.connections) == 1
+
+
+def test_pooled_calls_are_faster_than_a_client_per_call(fake_provider):
+    base_url, tracker = fake_provider
+    clients = ProviderClients({"fake": {"base_url": base_url, "max_connections": 10}})
+
+    async def pooled():
+        clients.start()
+        client = clients.get("fake")
+        await forecast(client)  # connect outside the timed loop
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            await forecast(client)
+        elapsed = time.perf_counter() - started
+        await clients.close()
+        return elapsed
+
+    async def fresh():
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            client = clients._build("fake")
+            await forecast(client)
+            await client.aclose()
+        return time.perf_counter() - started
+
+    tracker.connections.clear()
+    fresh_seconds = asyncio.run(fresh())
+    assert len(tracker.connections) == CALLS
+
+    pooled_seconds = asyncio.run(pooled())
+    assert pooled_seconds < fresh_seconds
@@ -0,0 +1,20 @@
+"""
+Trip cost calculation shared by trip creation and repricing
+"""
+from datetime import datetime
+
+
+def trip_duration(start_date: str, end_date: str) -> int:
+    """Number of nights between two YYYY-MM-DD dates"""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    return (end - start).days
+
+
+def calculate_trip_costs(avg_daily_cost, flight_cost_estimate, duration, num_travelers):
+    """Return (flight_price, hotel_price, total_cost) for a trip"""
+    flight_price = flight_cost_estimate * num_travelers
+    hotel_price = avg_daily_cost * 0.6 * duration * num_travelers
+    other_expenses = avg_daily_cost * 0.4 * duration * num_travelers
+    total_cost = flight_price + hotel_price + other_expenses
+    return flight_price, hotel_price, total_cost
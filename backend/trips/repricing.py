@@ -0,0 +1,216 @@
+"""
+Background repricing of planned trips after destination cost changes
+
+Jobs are stored in the repricing_jobs table so a restart resumes from the
+last trip id that was written. The worker walks matching trips in small
+id-ordered chunks and commits after each one, so other writers get the
+lock between chunks. A job whose chunks keep failing is marked 'failed'
+after REPRICING_MAX_ATTEMPTS so the jobs queued behind it still run.
+"""
+import threading
+import time
+from datetime import datetime
+from database import get_db
+from admin.stats import record_trip_repriced
+from config import settings
+from social.snapshots import rebuild_trip_snapshots, snapshot_cache
+from trips.pricing import trip_duration, calculate_trip_costs
+
+
+def enqueue_repricing(cursor, destination_id: int):
+    """Queue a repricing job for a destination (call inside the writing transaction)"""
+    cursor.execute(
+        """SELECT id FROM repricing_jobs
+           WHERE destination_id = ? AND status IN ('pending', 'running')""",
+        (destination_id,)
+    )
+    job = cursor.fetchone()
+
+    if job:
+        # Restart the open job so trips already walked pick up the new costs
+        cursor.execute(
+            "UPDATE repricing_jobs SET last_trip_id = 0 WHERE id = ?",
+            (job["id"],)
+        )
+        return job["id"]
+
+    cursor.execute(
+        "INSERT INTO repricing_jobs (destination_id) VALUES (?)",
+        (destination_id,)
+    )
+    return cursor.lastrowid
+
+
+def reprice_chunk(conn, job: dict, chunk_size: int) -> int:
+    """Reprice the next chunk of trips for a job, returns rows processed"""
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+
+    c.execute(
+        "SELECT avg_daily_cost, flight_cost_estimate FROM destinations WHERE id = ?",
+        (job["destination_id"],)
+    )
+    dest = c.fetchone()
+
+    # Re-read the cursor inside the transaction, enqueue may have reset it
+    c.execute("SELECT last_trip_id FROM repricing_jobs WHERE id = ?", (job["id"],))
+    last_trip_id = c.fetchone()["last_trip_id"]
+
+    trips = []
+    if dest:
+        c.execute("""
+            SELECT id, start_date, end_date, num_travelers, total_cost,
+                   date(created_at) as day
+            FROM trips
+            WHERE destination_id = ? AND status = 'planned' AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (job["destination_id"], last_trip_id, chunk_size))
+        trips = c.fetchall()
+
+    updates = []
+    revenue_deltas = {}
+    for trip in trips:
+        try:
+            duration = trip_duration(trip["start_date"], trip["end_date"])
+        except (TypeError, ValueError):
+            continue
+        flight_price, hotel_price, total_cost = calculate_trip_costs(
+            dest["avg_daily_cost"],
+            dest["flight_cost_estimate"],
+            duration,
+            trip["num_travelers"]
+        )
+        updates.append((total_cost, flight_price, hotel_price, trip["id"]))
+        revenue_deltas[trip["day"]] = revenue_deltas.get(trip["day"], 0) + total_cost - (trip["total_cost"] or 0)
+
+    c.executemany(
+        "UPDATE trips SET total_cost = ?, flight_price = ?, hotel_price = ? WHERE id = ?",
+        updates
+    )
+    tokens = rebuild_trip_snapshots(c, [u[3] for u in updates])
+    for day, delta in revenue_deltas.items():
+        record_trip_repriced(c, day, job["destination_id"], delta)
+
+    if len(trips) < chunk_size:
+        c.execute("""
+            UPDATE repricing_jobs
+            SET status = 'done', trips_repriced = trips_repriced + ?, finished_at = ?
+            WHERE id = ?
+        """, (len(updates), datetime.now().isoformat(), job["id"]))
+    else:
+        c.execute("""
+            UPDATE repricing_jobs
+            SET last_trip_id = ?, trips_repriced = trips_repriced + ?
+            WHERE id = ?
+        """, (trips[-1]["id"], len(updates), job["id"]))
+
+    conn.commit()
+    snapshot_cache.invalidate(tokens)
+    return len(trips)
+
+
+class RepricingWorker:
+    """Daemon thread that drains the repricing job queue"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.trips_processed = 0
+        self.chunks_processed = 0
+        self.busy_seconds = 0.0
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="repricing-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self):
+        """Wake the worker after a job was enqueued"""
+        self._wake.set()
+
+    def _next_job(self, conn):
+        c = conn.cursor()
+        c.execute("""
+            SELECT * FROM repricing_jobs
+            WHERE status IN ('pending', 'running')
+            ORDER BY id LIMIT 1
+        """)
+        job = c.fetchone()
+        if job and job["status"] == "pending":
+            c.execute(
+                "UPDATE repricing_jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), job["id"])
+            )
+            conn.commit()
+        return dict(job) if job else None
+
+    def _record_failure(self, conn, job: dict, error: str):
+        """Count a failed attempt, giving up on the job after REPRICING_MAX_ATTEMPTS"""
+        conn.execute("""
+            UPDATE repricing_jobs
+            SET attempts = attempts + 1, error = ?,
+                status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END,
+                finished_at = CASE WHEN attempts + 1 >= ? THEN ? ELSE finished_at END
+            WHERE id = ?
+        """, (error, settings.REPRICING_MAX_ATTEMPTS, settings.REPRICING_MAX_ATTEMPTS,
+              datetime.now().isoformat(), job["id"]))
+        conn.commit()
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = get_db()
+            job = None
+            try:
+                job = self._next_job(conn)
+                while job and not self._stop.is_set():
+                    started = time.perf_counter()
+                    processed = reprice_chunk(conn, job, settings.REPRICING_CHUNK_SIZE)
+                    self.busy_seconds += time.perf_counter() - started
+                    self.trips_processed += processed
+                    self.chunks_processed += 1
+
+                    # Yield the write lock before the next chunk
+                    self._stop.wait(settings.REPRICING_PAUSE_SECONDS)
+                    job = self._next_job(conn)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Repricing worker error: {e}")
+                try:
+                    conn.rollback()
+                    if job:
+                        self._record_failure(conn, job, str(e))
+                except Exception as record_error:
+                    # Usually the same lock contention; the attempt goes uncounted
+                    # and the job is retried next poll instead of killing the thread
+                    print(f"Repricing worker could not record the failure: {record_error}")
+            finally:
+                conn.close()
+
+            self._wake.wait(settings.REPRICING_POLL_SECONDS)
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        throughput = self.trips_processed / self.busy_seconds if self.busy_seconds else 0.0
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "trips_processed": self.trips_processed,
+            "chunks_processed": self.chunks_processed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "trips_per_second": round(throughput, 1),
+            "chunk_size": settings.REPRICING_CHUNK_SIZE,
+            "last_error": self.last_error
+        }
+
+
+repricing_worker = RepricingWorker()
@@ -2,13 +2,30 @@
 Trip management routes
 """
 from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 from database import get_db
+from admin.stats import record_trip_added, record_trips_removed
+from external.flights import find_flights, validate_flight_date
+from external.hotels import query_hotels
+from external.weather import find_weather
 from models import TripCreate, TripResponse
 from auth.utils import get_current_user
+from destinations.trending import trending
+from social.snapshots import drop_snapshots, rebuild_trip_snapshots, snapshot_cache
+from trips.pricing import trip_duration, calculate_trip_costs
+
+# Hotels shown per plan and the longest forecast requested
+PLAN_HOTELS = 5
+PLAN_FORECAST_DAYS = 7
 
 router = APIRouter(prefix="/trips", tags=["Trips"])
 
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.post("", response_model=TripResponse)
 def create_trip(trip: TripCreate, user: dict = Depends(get_current_user)):
     """Create a new trip"""
@@ -16,7 +33,7 @@ def create_trip(trip: TripCreate, user: dict = Depends(get_current_user)):
     c = conn.cursor()
     
     # Get destination info
-    c.execute("SELECT * FROM destinations WHERE id = ?", (trip.destination_id,))
+    c.execute("SELECT * FROM destinations WHERE id = ? AND deleted_at IS NULL", (trip.destination_id,))
     dest = c.fetchone()
     
     if not dest:
@@ -25,9 +42,7 @@ def create_trip(trip: TripCreate, user: dict = Depends(get_current_user)):
     dest = dict(dest)
     
     # Calculate trip duration
-    start = datetime.strptime(trip.start_date, "%Y-%m-%d")
-    end = datetime.strptime(trip.end_date, "%Y-%m-%d")
-    duration = (end - start).days
+    duration = trip_duration(trip.start_date, trip.end_date)
     
     if duration <= 0:
         raise HTTPException(
@@ -36,10 +51,12 @@ def create_trip(trip: TripCreate, user: dict = Depends(get_current_user)):
         )
     
     # Calculate costs
-    flight_price = dest["flight_cost_estimate"] * trip.num_travelers
-    hotel_price = dest["avg_daily_cost"] * 0.6 * duration * trip.num_travelers
-    other_expenses = dest["avg_daily_cost"] * 0.4 * duration * trip.num_travelers
-    total_cost = flight_price + hotel_price + other_expenses
+    flight_price, hotel_price, total_cost = calculate_trip_costs(
+        dest["avg_daily_cost"],
+        dest["flight_cost_estimate"],
+        duration,
+        trip.num_travelers
+    )
     
     # Insert trip
     c.execute("""
@@ -60,9 +77,12 @@ def create_trip(trip: TripCreate, user: dict = Depends(get_current_user)):
     ))
     
     trip_id = c.lastrowid
+    record_trip_added(c, trip.destination_id, user["id"], total_cost)
     conn.commit()
     conn.close()
     
+    trending.record(trip.destination_id, "trip")
+    
     return TripResponse(
         id=trip_id,
         total_cost=round(total_cost, 2),
@@ -89,6 +109,123 @@ def get_trips(user: dict = Depends(get_current_user)):
     
     return trips
 
+@router.get("/plan")
+async def plan_trip(
+    destination_id: int,
+    origin: str,
+    start_date: str,
+    end_date: str,
+    num_travelers: int = 1,
+    cabin: str = "economy"
+):
+    """Plan a trip in one call, streamed as Server-Sent Events
+    
+    Sends a "destination" event right away, then "weather", "flights" and
+    "hotels" events as each lookup finishes (they run concurrently), and
+    ends with an "estimate" event priced like create_trip. A lookup that
+    fails sends an "error" event naming its section.
+    """
+    validate_flight_date(start_date)
+    try:
+        duration = trip_duration(start_date, end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    if duration <= 0:
+        raise HTTPException(
+            status_code=400,
+            detail="End date must be after start date"
+        )
+    
+    num_travelers = max(1, num_travelers)
+    
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT * FROM destinations WHERE id = ? AND deleted_at IS NULL", (destination_id,))
+    dest = c.fetchone()
+    conn.close()
+    
+    if not dest:
+        raise HTTPException(status_code=404, detail="Destination not found")
+    
+    dest = dict(dest)
+    
+    async def weather():
+        return await find_weather(dest, min(duration, PLAN_FORECAST_DAYS))
+    
+    async def flights():
+        offers, source = await find_flights(origin, dest, start_date, num_travelers, cabin)
+        return {"origin": origin.upper(), "date": start_date, "flights": offers, "source": source}
+    
+    def hotels():
+        conn = get_db()
+        try:
+            found, _ = query_hotels(
+                conn.cursor(),
+                destination_id,
+                guests=num_travelers,
+                sort="price_low",
+                limit=PLAN_HOTELS
+            )
+        finally:
+            conn.close()
+        for hotel in found:
+            hotel["total_cost"] = round(hotel["price_per_night"] * duration, 2)
+        return {"nights": duration, "hotels": found}
+    
+    async def section(name, lookup):
+        try:
+            return name, await lookup, None
+        except Exception as e:
+            print(f"Trip plan {name} error: {e!r}")
+            return name, None, str(e) or type(e).__name__
+    
+    async def stream():
+        yield sse_event("destination", dest)
+        
+        tasks = [
+            asyncio.ensure_future(section("weather", weather())),
+            asyncio.ensure_future(section("flights", flights())),
+            asyncio.ensure_future(section("hotels", asyncio.to_thread(hotels)))
+        ]
+        results = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                name, data, error = await next_done
+                if error:
+                    yield sse_event("error", {"section": name, "detail": error})
+                else:
+                    results[name] = data
+                    yield sse_event(name, data)
+        finally:
+            # Client went away: stop lookups that haven't finished
+            for task in tasks:
+                task.cancel()
+        
+        flight_price, hotel_price, total_cost = calculate_trip_costs(
+            dest["avg_daily_cost"],
+            dest["flight_cost_estimate"],
+            duration,
+            num_travelers
+        )
+        offers = results.get("flights", {}).get("flights") or []
+        options = results.get("hotels", {}).get("hotels") or []
+        yield sse_event("estimate", {
+            "duration": duration,
+            "num_travelers": num_travelers,
+            "flight_price": round(flight_price, 2),
+            "hotel_price": round(hotel_price, 2),
+            "total_cost": round(total_cost, 2),
+            "cheapest_flight": min((f["price"] for f in offers), default=None),
+            "cheapest_hotel_total": min((h["total_cost"] for h in options), default=None)
+        })
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @router.get("/{trip_id}")
 def get_trip(trip_id: int, user: dict = Depends(get_current_user)):
     """Get single trip by ID"""
@@ -116,6 +253,9 @@ def delete_trip(trip_id: int, user: dict = Depends(get_current_user)):
     conn = get_db()
     c = conn.cursor()
     
+    tokens = drop_snapshots(c, "id = ? AND user_id = ?", (trip_id, user["id"]))
+    record_trips_removed(c, "id = ? AND user_id = ?", (trip_id, user["id"]))
+    
     c.execute(
         "DELETE FROM trips WHERE id = ? AND user_id = ?",
         (trip_id, user["id"])
@@ -127,6 +267,8 @@ def delete_trip(trip_id: int, user: dict = Depends(get_current_user)):
     conn.commit()
     conn.close()
     
+    snapshot_cache.invalidate(tokens)
+    
     return {"message": "Trip deleted successfully"}
 
 @router.put("/{trip_id}/status")
@@ -155,7 +297,11 @@ def update_trip_status(
     if c.rowcount == 0:
         raise HTTPException(status_code=404, detail="Trip not found")
     
+    tokens = rebuild_trip_snapshots(c, [trip_id])
+    
     conn.commit()
     conn.close()
     
+    snapshot_cache.invalidate(tokens)
+    
     return {"message": f"Trip status updated to {status}"}
\ No newline at end of file
@@ -375,10 +375,10 @@ function AdminDashboard({ token, onClose }) {
             <div className="chart-section">
               <h3>📊 Monthly Revenue</h3>
               <div className="chart-bars">
-                {analytics.revenue.monthly.map((m, i) => (
+                {analytics.revenue.series.map((m, i) => (
                   <div key={i} className="chart-bar">
                     <div className="bar" style={{ height: `${(m.revenue / 10000) * 100}%` }}></div>
-                    <span className="bar-label">{m.month}</span>
+                    <span className="bar-label">{m.period}</span>
                     <span className="bar-value">${m.revenue?.toLocaleString()}</span>
                   </div>
                 ))}